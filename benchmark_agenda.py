@@ -0,0 +1,567 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do gerador da Agenda da Federação de SAFs.
+
+Gera agendas sintéticas com o mesmo formato do agenda_data.json, em vários
+tamanhos (número de SAFs, membros da diretoria, atividades por mês, fotos e
+resolução das fotos), mede o gerar_agenda de ponta a ponta e por fase, e
+grava/compara uma baseline em JSON. Um helper que ficou quadrático ou fotos
+que voltaram a ficar enormes aparecem como números, e não como reclamação.
+
+Uso:
+    python benchmark_agenda.py
+    python benchmark_agenda.py --cenarios pequena media --repeticoes 5
+    python benchmark_agenda.py --salvar-baseline baseline.json
+    python benchmark_agenda.py --comparar baseline.json
+    python benchmark_agenda.py --gerar-dados pasta --safs 200 --fotos 50
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import gerar_agenda
+from gerar_agenda import (
+    VERSAO_GERADOR,
+    CacheImagens,
+    CacheSecoes,
+    ContextoGeracao,
+    PerfilGeracao,
+)
+
+try:
+    from PIL import Image
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+MESES = [
+    'janeiro',
+    'fevereiro',
+    'marco',
+    'abril',
+    'maio',
+    'junho',
+    'julho',
+    'agosto',
+    'setembro',
+    'outubro',
+    'novembro',
+    'dezembro',
+]
+
+# Tamanhos padrão: do tamanho de uma federação real até bem além dele
+CENARIOS = {
+    'pequena': {
+        'safs': 10,
+        'diretoria': 8,
+        'atividades_por_mes': 2,
+        'fotos': 10,
+        'resolucao': (600, 800),
+    },
+    'media': {
+        'safs': 40,
+        'diretoria': 12,
+        'atividades_por_mes': 4,
+        'fotos': 40,
+        'resolucao': (1200, 1600),
+    },
+    'grande': {
+        'safs': 150,
+        'diretoria': 20,
+        'atividades_por_mes': 8,
+        'fotos': 120,
+        'resolucao': (1200, 1600),
+    },
+    'muito_grande': {
+        'safs': 400,
+        'diretoria': 30,
+        'atividades_por_mes': 15,
+        'fotos': 300,
+        'resolucao': (3000, 4000),
+    },
+}
+CENARIOS_PADRAO = ['pequena', 'media', 'grande']
+
+# Diferenças menores que isto (ms) não contam como regressão
+TOLERANCIA_ABSOLUTA_MS = 5.0
+
+
+def _data(rnd):
+    return f"{rnd.randint(1, 28):02d}/{rnd.randint(1, 12):02d}"
+
+
+def _nome(rnd, i):
+    nomes = ['Maria', 'Ana', 'Lúcia', 'Conceição', 'Marta', 'Raquel', 'Débora']
+    sobrenomes = ['Araújo', 'Silva', 'Oliveira', 'Sá Machado', 'Gonçalves']
+    return f"{rnd.choice(nomes)} {rnd.choice(sobrenomes)} {i}"
+
+
+def _gerar_foto(caminho, resolucao, rnd):
+    """
+    Foto sintética: poucos pixels aleatórios ampliados com interpolação, o
+    que dá uma imagem suave, com tamanho de arquivo parecido com o de foto.
+    """
+    largura, altura = resolucao
+    pequena = Image.new('RGB', (12, 16))
+    pequena.putdata(
+        [
+            (rnd.randrange(256), rnd.randrange(256), rnd.randrange(256))
+            for _ in range(12 * 16)
+        ]
+    )
+    pequena.resize((largura, altura), Image.BICUBIC).save(caminho, 'JPEG', quality=90)
+
+
+def gerar_dados_sinteticos(
+    pasta,
+    safs=10,
+    diretoria=8,
+    atividades_por_mes=2,
+    fotos=10,
+    resolucao=(600, 800),
+    ano=2026,
+    semente=0,
+):
+    """
+    Grava em pasta um agenda.json sintético (mesmo formato do
+    agenda_data.json) e suas fotos em pasta/fotos.
+    fotos: quantas fotos diferentes existem; diretoria, SAFs e missionário
+    as usam em rodízio (0 = agenda sem fotos, capa e calendário).
+    resolucao: (largura, altura) das fotos 3x4, em pixels.
+    Retorna o caminho do JSON.
+    """
+    rnd = random.Random(semente)
+    os.makedirs(pasta, exist_ok=True)
+
+    if fotos and not PIL_AVAILABLE:
+        print("[AVISO] Pillow não instalado: agenda sintética sem fotos")
+        fotos = 0
+
+    nomes_fotos = []
+    if fotos:
+        pasta_fotos = os.path.join(pasta, 'fotos')
+        os.makedirs(pasta_fotos, exist_ok=True)
+        for i in range(fotos):
+            nome = f"foto_{i:04d}.jpg"
+            _gerar_foto(os.path.join(pasta_fotos, nome), resolucao, rnd)
+            nomes_fotos.append(nome)
+        # Capa e calendário em paisagem, maiores que as fotos 3x4
+        largura, altura = resolucao
+        _gerar_foto(
+            os.path.join(pasta_fotos, 'capa.jpg'), (altura * 2, largura * 2), rnd
+        )
+        _gerar_foto(
+            os.path.join(pasta_fotos, 'calendario.jpg'), (altura * 2, largura * 2), rnd
+        )
+
+    def foto(i):
+        return nomes_fotos[i % len(nomes_fotos)] if nomes_fotos else ''
+
+    texto = (
+        "Prezadas irmãs, mais uma vez o Senhor nos colocou na direção desta "
+        "Federação, e com alegria apresentamos a agenda deste ano. "
+    )
+    dados = {
+        'ano': ano,
+        'presidente': {
+            'nome': _nome(rnd, 0),
+            'mensagem': '\n\n'.join([texto * 3] * 4),
+            'foto': '',
+        },
+        'diretoria': [
+            {
+                'cargo': f"Cargo {i + 1}",
+                'nome': _nome(rnd, i),
+                'data_nascimento': _data(rnd),
+                'email': f"diretoria{i}@exemplo.org",
+                'endereco': f"Rua das Flores, {i + 10} – Centro",
+                'foto': foto(i),
+            }
+            for i in range(diretoria)
+        ],
+        'safs': [
+            {
+                'numero': i + 1,
+                'nome': f"SAF da Igreja Presbiteriana {i + 1}",
+                'endereco': f"Avenida Principal, {i * 7 + 1} – Bairro {i % 13}",
+                'pastor': {
+                    'nome': f"Rev. {_nome(rnd, i)}",
+                    'data_nascimento': _data(rnd),
+                },
+                'presidente': {
+                    'nome': _nome(rnd, i),
+                    'data_nascimento': _data(rnd),
+                    'endereco': f"Rua {i + 1}, {i * 3}",
+                    'cep': f"28.{i % 1000:03d}-000",
+                    'telefone': f"(22) 9{i % 10000:04d}-{i % 10000:04d}",
+                    'email': f"saf{i}@exemplo.org",
+                },
+                'conselheiro': {'nome': _nome(rnd, i), 'data_nascimento': _data(rnd)},
+                'aniversario': {'data': _data(rnd), 'anos': rnd.randint(5, 90)},
+                'foto': foto(diretoria + i),
+            }
+            for i in range(safs)
+        ],
+        'atividades_realizadas_2023': [
+            {'data': _data(rnd), 'descricao': f"Atividade realizada {i + 1}"}
+            for i in range(atividades_por_mes * 6)
+        ],
+        f'atividades_planejadas_{ano}': {
+            mes: [
+                {'data': _data(rnd), 'descricao': f"Atividade de {mes} {i + 1}"}
+                for i in range(atividades_por_mes)
+            ]
+            for mes in MESES
+        },
+        'informacoes_gerais': {
+            'missionario_oracao': {
+                'nome': _nome(rnd, 0),
+                'data_nascimento': _data(rnd),
+                'campo': 'Campo Missionário – BA',
+                'whatsapp': '71- 99999-0000',
+                'foto': foto(0),
+            },
+            'observacoes': [f"Observação {i + 1}: {texto}" for i in range(6)],
+            # Uma linha por item, como no agenda_data_exemplo.json
+            'lema': [
+                'Vitoriosas por Cristo Jesus',
+                '"Graças a Deus, que nos dá a vitória',
+                'por intermédio de nosso Senhor Jesus Cristo."',
+                '1 Coríntios 15.57',
+            ],
+        },
+        'capa': 'capa.jpg' if nomes_fotos else '',
+        'calendario': 'calendario.jpg' if nomes_fotos else '',
+    }
+
+    data_file = os.path.join(pasta, 'agenda.json')
+    with open(data_file, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    return data_file
+
+
+def _numero_registros(parametros):
+    """SAFs + diretoria + atividades: a unidade para ver o custo por item"""
+    return (
+        parametros['safs']
+        + parametros['diretoria']
+        + parametros['atividades_por_mes'] * 18
+    )
+
+
+def _executar(data_file, saida, pasta_cache, backend, com_cache, perfil):
+    """Uma geração com caches isolados na pasta do cenário"""
+    if not com_cache:
+        shutil.rmtree(pasta_cache, ignore_errors=True)
+    ctx = ContextoGeracao.para_arquivo(
+        data_file,
+        cache=CacheImagens(os.path.join(pasta_cache, 'imagens')),
+        cache_secoes=(
+            CacheSecoes(os.path.join(pasta_cache, 'secoes')) if com_cache else False
+        ),
+    )
+    ctx.perfil = perfil
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        gerar_agenda.gerar_agenda(data_file, saida, ctx, backend)
+    return (time.perf_counter() - inicio) * 1000
+
+
+def medir_cenario(
+    parametros, repeticoes=3, backend='docx', com_cache=False, memoria=False
+):
+    """
+    Gera a agenda sintética do cenário e mede repeticoes gerações.
+    Sem com_cache, cada geração começa com os caches de imagens e seções
+    vazios (o pior caso); com com_cache, mede a regeneração sem mudanças.
+    Retorna um dicionário com as medianas do tempo total e de cada fase,
+    o tamanho do .docx e das imagens, e (com memoria) o pico por fase.
+    """
+    with tempfile.TemporaryDirectory(prefix='agenda-benchmark-') as pasta:
+        data_file = gerar_dados_sinteticos(pasta, **parametros)
+        saida = os.path.join(pasta, 'agenda.docx')
+        pasta_cache = os.path.join(pasta, 'cache')
+        destino_perfil = os.path.join(pasta, 'perfil.json')
+
+        # Aquecimento: imports, esqueleto do documento e caches do cenário
+        _executar(
+            data_file,
+            saida,
+            pasta_cache,
+            backend,
+            com_cache,
+            PerfilGeracao(destino_perfil, memoria=False),
+        )
+
+        totais = []
+        fases = {}
+        for _ in range(repeticoes):
+            perfil = PerfilGeracao(destino_perfil, memoria=False)
+            totais.append(
+                _executar(data_file, saida, pasta_cache, backend, com_cache, perfil)
+            )
+            for registro in perfil.fases:
+                fases.setdefault(registro['fase'], []).append(registro['tempo_ms'])
+
+        relatorio = perfil.relatorio()
+        resultado = {
+            'parametros': dict(parametros, resolucao=list(parametros['resolucao'])),
+            'registros': _numero_registros(parametros),
+            'tempo_total_ms': round(statistics.median(totais), 3),
+            'tempo_min_ms': round(min(totais), 3),
+            'fases_ms': {
+                nome: round(statistics.median(tempos), 3)
+                for nome, tempos in fases.items()
+            },
+            'bytes_arquivo': relatorio['bytes_arquivo'],
+            'bytes_imagens': sum(imagem['bytes'] for imagem in relatorio['imagens']),
+            'imagens': len(relatorio['imagens']),
+        }
+
+        if memoria:
+            # Execução separada: o tracemalloc distorce os tempos
+            perfil = PerfilGeracao(destino_perfil, memoria=True)
+            _executar(data_file, saida, pasta_cache, backend, com_cache, perfil)
+            resultado['pico_memoria_kb'] = {
+                registro['fase']: registro['pico_memoria_kb']
+                for registro in perfil.fases
+            }
+        return resultado
+
+
+def executar_benchmark(
+    cenarios, repeticoes=3, backend='docx', com_cache=False, memoria=False
+):
+    """
+    Mede cada cenário (nome -> parâmetros) e retorna o resultado completo,
+    no formato gravado como baseline.
+    """
+    resultado = {
+        'versao': VERSAO_GERADOR,
+        'data': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'backend': backend,
+        'com_cache': com_cache,
+        'repeticoes': repeticoes,
+        'cenarios': {},
+    }
+    for nome, parametros in cenarios.items():
+        print(f"Medindo cenário '{nome}'...", flush=True)
+        resultado['cenarios'][nome] = medir_cenario(
+            parametros, repeticoes, backend, com_cache, memoria
+        )
+    return resultado
+
+
+def tabela_resultado(resultado):
+    """Tabela em texto: uma linha por cenário e as fases de cada um"""
+    linhas = [
+        f"{'Cenário':<14}{'SAFs':>6}{'Dir.':>6}{'Ativ.':>6}{'Fotos':>7}"
+        f"{'Total (ms)':>12}{'ms/registro':>13}{'.docx (KB)':>12}{'Imagens (KB)':>14}",
+        '-' * 90,
+    ]
+    for nome, cenario in resultado['cenarios'].items():
+        parametros = cenario['parametros']
+        linhas.append(
+            f"{nome:<14}{parametros['safs']:>6}{parametros['diretoria']:>6}"
+            f"{parametros['atividades_por_mes']:>6}{parametros['fotos']:>7}"
+            f"{cenario['tempo_total_ms']:>12.1f}"
+            f"{cenario['tempo_total_ms'] / cenario['registros']:>13.3f}"
+            f"{cenario['bytes_arquivo'] / 1024:>12.1f}"
+            f"{cenario['bytes_imagens'] / 1024:>14.1f}"
+        )
+
+    nomes = list(resultado['cenarios'])
+    fases = []
+    for cenario in resultado['cenarios'].values():
+        for fase in cenario['fases_ms']:
+            if fase not in fases:
+                fases.append(fase)
+    linhas.append('')
+    linhas.append(f"{'Fase (ms)':<24}" + ''.join(f"{nome:>14}" for nome in nomes))
+    linhas.append('-' * (24 + 14 * len(nomes)))
+    for fase in fases:
+        valores = ''.join(
+            (
+                f"{cenario['fases_ms'][fase]:>14.1f}"
+                if fase in cenario['fases_ms']
+                else f"{'-':>14}"
+            )
+            for cenario in resultado['cenarios'].values()
+        )
+        linhas.append(f"{fase:<24}{valores}")
+    return '\n'.join(linhas)
+
+
+def comparar_com_baseline(
+    resultado, baseline, tolerancia=0.25, tolerancia_tamanho=0.05
+):
+    """
+    Compara com uma baseline gravada antes. Retorna a lista de regressões
+    (textos): tempo total ou de fase acima de (1 + tolerancia) vezes a
+    baseline, ou .docx/imagens acima de (1 + tolerancia_tamanho) vezes.
+    """
+    regressoes = []
+    for nome, atual in resultado['cenarios'].items():
+        anterior = baseline.get('cenarios', {}).get(nome)
+        if anterior is None:
+            continue
+        if anterior['parametros'] != atual['parametros']:
+            print(f"[AVISO] Cenário '{nome}' mudou desde a baseline; não comparado")
+            continue
+
+        tempos = [('total', anterior['tempo_total_ms'], atual['tempo_total_ms'])]
+        for fase, tempo in atual['fases_ms'].items():
+            if fase in anterior['fases_ms']:
+                tempos.append((fase, anterior['fases_ms'][fase], tempo))
+        for fase, antes, agora in tempos:
+            if (
+                agora > antes * (1 + tolerancia)
+                and agora - antes > TOLERANCIA_ABSOLUTA_MS
+            ):
+                regressoes.append(
+                    f"{nome}/{fase}: {antes:.1f} ms -> {agora:.1f} ms "
+                    f"(+{(agora / antes - 1) * 100 if antes else 100:.0f}%)"
+                )
+
+        for campo in ('bytes_arquivo', 'bytes_imagens'):
+            antes, agora = anterior[campo], atual[campo]
+            if agora > antes * (1 + tolerancia_tamanho):
+                regressoes.append(
+                    f"{nome}/{campo}: {antes / 1024:.1f} KB -> {agora / 1024:.1f} KB"
+                )
+    return regressoes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Benchmark do gerador da Agenda com dados sintéticos"
+    )
+    parser.add_argument(
+        '--cenarios',
+        nargs='+',
+        choices=sorted(CENARIOS),
+        help=f"cenários a medir (padrão: {' '.join(CENARIOS_PADRAO)})",
+    )
+    parser.add_argument('--safs', type=int, help="cenário personalizado: SAFs")
+    parser.add_argument('--diretoria', type=int, help="cenário personalizado: membros")
+    parser.add_argument(
+        '--atividades', type=int, help="cenário personalizado: atividades por mês"
+    )
+    parser.add_argument('--fotos', type=int, help="cenário personalizado: fotos")
+    parser.add_argument(
+        '--resolucao',
+        help="cenário personalizado: resolução das fotos, ex. 1200x1600",
+    )
+    parser.add_argument(
+        '--repeticoes', type=int, default=3, help="gerações medidas por cenário"
+    )
+    parser.add_argument(
+        '--backend', choices=gerar_agenda.BACKENDS, default='docx', help="backend"
+    )
+    parser.add_argument(
+        '--com-cache',
+        action='store_true',
+        help="mede a regeneração com os caches cheios (padrão: caches vazios)",
+    )
+    parser.add_argument(
+        '--memoria', action='store_true', help="mede também o pico de memória por fase"
+    )
+    parser.add_argument(
+        '--salvar-baseline', metavar='ARQUIVO', help="grava o resultado"
+    )
+    parser.add_argument(
+        '--comparar', metavar='ARQUIVO', help="compara com uma baseline gravada antes"
+    )
+    parser.add_argument(
+        '--tolerancia',
+        type=float,
+        default=0.25,
+        help="aumento de tempo aceito na comparação (padrão: 0.25 = 25%%)",
+    )
+    parser.add_argument(
+        '--gerar-dados',
+        metavar='PASTA',
+        help="só grava a agenda sintética (JSON e fotos) na pasta, sem medir",
+    )
+    args = parser.parse_args(argv)
+
+    personalizado = None
+    if any(
+        valor is not None
+        for valor in (
+            args.safs,
+            args.diretoria,
+            args.atividades,
+            args.fotos,
+            args.resolucao,
+        )
+    ):
+        personalizado = dict(CENARIOS['pequena'])
+        for chave, valor in (
+            ('safs', args.safs),
+            ('diretoria', args.diretoria),
+            ('atividades_por_mes', args.atividades),
+            ('fotos', args.fotos),
+        ):
+            if valor is not None:
+                personalizado[chave] = valor
+        if args.resolucao:
+            try:
+                largura, altura = (int(v) for v in args.resolucao.lower().split('x'))
+            except ValueError:
+                parser.error("--resolucao deve ser LARGURAxALTURA, ex. 1200x1600")
+            personalizado['resolucao'] = (largura, altura)
+
+    if args.gerar_dados:
+        parametros = personalizado or CENARIOS[(args.cenarios or ['pequena'])[0]]
+        data_file = gerar_dados_sinteticos(args.gerar_dados, **parametros)
+        print(f"[OK] Agenda sintética gravada em: {data_file}")
+        return 0
+
+    if personalizado is not None:
+        cenarios = {'personalizado': personalizado}
+    else:
+        cenarios = {nome: CENARIOS[nome] for nome in args.cenarios or CENARIOS_PADRAO}
+
+    resultado = executar_benchmark(
+        cenarios, args.repeticoes, args.backend, args.com_cache, args.memoria
+    )
+    print()
+    print(tabela_resultado(resultado))
+
+    if args.salvar_baseline:
+        with open(args.salvar_baseline, 'w', encoding='utf-8') as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+        print(f"\n[OK] Baseline gravada em: {args.salvar_baseline}")
+
+    if args.comparar:
+        with open(args.comparar, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+        regressoes = comparar_com_baseline(resultado, baseline, args.tolerancia)
+        if regressoes:
+            print(f"\n[ERRO] {len(regressoes)} regressão(ões) em relação à baseline:")
+            for regressao in regressoes:
+                print(f"  - {regressao}")
+            return 1
+        print("\n[OK] Nenhuma regressão em relação à baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -50,6 +50,10 @@ pyinstaller --name="EditorAgendaSAF" ^
     %ICONE_PARAM% ^
     --add-data="agenda_data.json;." ^
     --add-data="gerar_agenda.py;." ^
+    --add-data="gerar_agenda_streaming.py;." ^
+    --add-data="servidor_agenda.py;." ^
+    --add-data="observar_agenda.py;." ^
+    --add-data="importar_fotos.py;." ^
     --add-data="gerar_com_fotos.py;." ^
     --add-data="extrair_fotos.py;." ^
     --hidden-import=tkinter ^
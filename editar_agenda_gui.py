@@ -4,20 +4,941 @@
 Interface gráfica para editar os dados da agenda da Federação de SAFs
 """
 
+import hashlib
+import io
 import json
+import math
+import multiprocessing
 import os
-import shutil
+import queue
+import sys
+import threading
 import tkinter as tk
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
 from tkinter import filedialog, messagebox, scrolledtext, simpledialog, ttk
 
 try:
-    from PIL import Image, ImageTk
+    from PIL import Image, ImageOps, ImageTk
 
     PIL_AVAILABLE = True
 except ImportError:
     PIL_AVAILABLE = False
 
+import importar_fotos
+
+# Nomes das etapas da geração (gerar_agenda.ETAPAS) mostrados no status
+ETAPAS_GERACAO = {
+    'json': "lendo os dados",
+    'imagens': "conferindo as fotos",
+    'capa': "capa",
+    'palavra_presidente': "Palavra da Presidente",
+    'diretoria': "Diretoria",
+    'safs': "SAFs",
+    'atividades_realizadas': "atividades realizadas",
+    'atividades_planejadas': "atividades planejadas",
+    'informacoes_gerais': "informações gerais",
+    'ultima_pagina': "última página",
+    'save': "gravando o arquivo",
+}
+
+
+# Classes de prioridade do Windows (SetPriorityClass)
+_PRIORIDADE_ABAIXO_DO_NORMAL = 0x4000  # BELOW_NORMAL_PRIORITY_CLASS
+_PRIORIDADE_NORMAL = 0x20  # NORMAL_PRIORITY_CLASS
+_PROCESSO_DEFINIR_INFORMACAO = 0x0200  # PROCESS_SET_INFORMATION
+
+
+def _reduzir_prioridade_processo():
+    """
+    Baixa a prioridade do processo atual, para a geração antecipada não
+    disputar a CPU com a interface
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetPriorityClass(
+                kernel32.GetCurrentProcess(), _PRIORIDADE_ABAIXO_DO_NORMAL
+            )
+        else:
+            os.nice(10)
+    except (AttributeError, OSError):
+        pass
+
+
+def _restaurar_prioridade(pid):
+    """
+    Devolve o processo pid à prioridade da interface; retorna False se o
+    sistema não deixar (fora do Windows, aumentar a prioridade costuma
+    exigir privilégios)
+    """
+    try:
+        if sys.platform == 'win32':
+            import ctypes
+
+            kernel32 = ctypes.windll.kernel32
+            processo = kernel32.OpenProcess(_PROCESSO_DEFINIR_INFORMACAO, False, pid)
+            if not processo:
+                return False
+            try:
+                return bool(kernel32.SetPriorityClass(processo, _PRIORIDADE_NORMAL))
+            finally:
+                kernel32.CloseHandle(processo)
+        os.setpriority(os.PRIO_PROCESS, pid, os.getpriority(os.PRIO_PROCESS, 0))
+        return True
+    except (AttributeError, OSError):
+        return False
+
+
+def _gerar_word_em_processo(
+    arquivo_dados, conteudo, fila, cancelamento, prioridade_baixa
+):
+    """
+    Roda no processo de geração; não toca em nenhum widget.
+    Gera o .docx na memória e manda pela fila os eventos da geração e, por
+    último, ('fim', fim, resultado): 'ok' e os bytes do .docx, 'cancelado'
+    ou 'erro' e a mensagem.
+    """
+    if prioridade_baixa:
+        _reduzir_prioridade_processo()
+    try:
+        import gerar_agenda
+    except Exception as e:
+        fila.put(('fim', 'erro', f"Não foi possível carregar o gerador: {e}"))
+        return
+    try:
+        ctx = gerar_agenda.ContextoGeracao.para_arquivo(
+            arquivo_dados, cancelamento=cancelamento
+        )
+        ctx.ouvintes.append(fila.put)
+        # Os dados vêm dos mesmos bytes usados na chave
+        resultado = gerar_agenda.gerar_documento(io.BytesIO(conteudo), ctx=ctx)
+        fila.put(('fim', 'ok', resultado))
+    except gerar_agenda.GeracaoCancelada:
+        fila.put(('fim', 'cancelado', None))
+    except Exception as e:
+        fila.put(('fim', 'erro', str(e) or type(e).__name__))
+
+
+# Processos que importam as fotos (importar_fotos), criados no primeiro uso
+_executor_importacao = None
+
+
+def executor_importacao():
+    """Pool de processos da importação de fotos (threads se não houver processos)"""
+    global _executor_importacao
+    if _executor_importacao is None:
+        try:
+            _executor_importacao = ProcessPoolExecutor(
+                max_workers=min(4, os.cpu_count() or 1)
+            )
+        except (OSError, NotImplementedError):
+            # Ambientes sem multiprocessing (sem /dev/shm, por exemplo)
+            _executor_importacao = ThreadPoolExecutor(max_workers=2)
+    return _executor_importacao
+
+
+class CacheMiniaturas:
+    """
+    Cache LRU das miniaturas (imagens PIL já reduzidas) das fotos,
+    compartilhado por todos os diálogos. A chave inclui tamanho e data de
+    modificação do arquivo, para uma foto trocada não mostrar a antiga.
+    """
+
+    def __init__(self, capacidade=64):
+        self.capacidade = capacidade
+        self._itens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def obter(self, caminho, lado):
+        """Miniatura da foto com o maior lado <= lado (pode ser chamado de threads)"""
+        st = os.stat(caminho)
+        chave = (os.path.abspath(caminho), st.st_size, st.st_mtime_ns, lado)
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+
+        with Image.open(caminho) as img:
+            # JPEG: decodificar já em escala reduzida, nunca no tamanho cheio
+            img.draft('RGB', (lado, lado))
+            miniatura = ImageOps.exif_transpose(img).convert('RGB')
+        miniatura.thumbnail((lado, lado))
+
+        with self._lock:
+            self._itens[chave] = miniatura
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return miniatura
+
+
+cache_miniaturas = CacheMiniaturas()
+# Threads que abrem as fotos, para a interface não travar com fotos grandes
+_executor_miniaturas = None
+
+
+def executor_miniaturas():
+    """Threads que decodificam as miniaturas (diálogos e listas)"""
+    global _executor_miniaturas
+    if _executor_miniaturas is None:
+        _executor_miniaturas = ThreadPoolExecutor(max_workers=2)
+    return _executor_miniaturas
+
+
+def carregar_miniatura(caminho, lado):
+    """Future com a miniatura (CacheMiniaturas), decodificada fora da thread do Tk"""
+    return executor_miniaturas().submit(cache_miniaturas.obter, caminho, lado)
+
+
+# Miniaturas das listas de diretoria e SAFs, em pixels (3x4)
+TAMANHO_MINIATURA_LISTA = (30, 40)
+# Miniaturas guardadas em disco (cada uma tem uns 3 KB)
+LIMITE_MINIATURAS_DISCO = 2000
+
+
+class CacheMiniaturasLista:
+    """
+    Miniaturas 3x4 das fotos das listas, recortadas como no documento.
+    Ficam em memória (LRU limitado) e em disco, na pasta de cache do
+    gerar_agenda, com o nome pelo hash do conteúdo da foto: abrir o editor
+    de novo não precisa decodificar as fotos outra vez. A pasta guarda até
+    limite_disco miniaturas; passando disso, as usadas há mais tempo (mtime,
+    atualizado a cada leitura) são apagadas.
+    """
+
+    def __init__(
+        self,
+        capacidade=512,
+        tamanho=TAMANHO_MINIATURA_LISTA,
+        limite_disco=LIMITE_MINIATURAS_DISCO,
+    ):
+        self.capacidade = capacidade
+        self.tamanho = tamanho
+        self.limite_disco = limite_disco
+        self._itens = OrderedDict()
+        # (caminho, tamanho, mtime) -> sha256 do arquivo
+        self._hashes = {}
+        self._lock = threading.Lock()
+        self._pasta = None
+        # Miniaturas na pasta (contadas na primeira gravação)
+        self._no_disco = None
+        self._lock_disco = threading.Lock()
+
+    def _hash(self, caminho):
+        st = os.stat(caminho)
+        chave = (caminho, st.st_size, st.st_mtime_ns)
+        with self._lock:
+            hash_foto = self._hashes.get(chave)
+        if hash_foto is None:
+            with open(caminho, 'rb') as f:
+                hash_foto = hashlib.sha256(f.read()).hexdigest()
+            with self._lock:
+                self._hashes[chave] = hash_foto
+        return hash_foto
+
+    def obter(self, caminho, recorte=None):
+        """Miniatura (imagem PIL) da foto; chamado das threads de fundo"""
+        import gerar_agenda  # recorte e pasta de cache iguais aos da geração
+
+        recorte = gerar_agenda._normalizar_recorte(recorte)
+        largura, altura = self.tamanho
+        chave = (
+            f"{self._hash(caminho)}-{largura}x{altura}-"
+            f"{gerar_agenda._sufixo_recorte(recorte, 'centro')}"
+        )
+        with self._lock:
+            if chave in self._itens:
+                self._itens.move_to_end(chave)
+                return self._itens[chave]
+
+        if self._pasta is None:
+            self._pasta = os.path.join(gerar_agenda.obter_pasta_cache(), 'miniaturas')
+        arquivo = os.path.join(self._pasta, chave + '.png')
+        try:
+            with Image.open(arquivo) as img:
+                miniatura = img.convert('RGB')
+            try:
+                os.utime(arquivo)  # Usada agora: fica por último na limpeza
+            except OSError:
+                pass
+        except (OSError, ValueError):
+            with Image.open(caminho) as img:
+                # Resolução suficiente mesmo para um recorte pequeno da foto
+                img.draft('RGB', (largura * 8, altura * 8))
+                img = ImageOps.exif_transpose(img).convert('RGB')
+            caixa = gerar_agenda.retangulo_recorte(
+                img.width, img.height, largura / altura, recorte
+            )
+            miniatura = img.crop(caixa).resize((largura, altura), Image.LANCZOS)
+            try:
+                saida = io.BytesIO()
+                miniatura.save(saida, 'PNG')
+                gerar_agenda.gravar_arquivo_atomico(arquivo, saida.getvalue())
+                self._gravou_no_disco()
+            except OSError:
+                pass  # Sem cache em disco a miniatura continua valendo
+
+        with self._lock:
+            self._itens[chave] = miniatura
+            while len(self._itens) > self.capacidade:
+                self._itens.popitem(last=False)
+        return miniatura
+
+    def _miniaturas_no_disco(self):
+        """[(mtime, caminho)] das miniaturas da pasta"""
+        miniaturas = []
+        try:
+            with os.scandir(self._pasta) as entradas:
+                for entrada in entradas:
+                    if not entrada.name.endswith('.png'):
+                        continue
+                    try:
+                        miniaturas.append((entrada.stat().st_mtime_ns, entrada.path))
+                    except OSError:
+                        pass  # Apagada por outro editor aberto
+        except OSError:
+            pass
+        return miniaturas
+
+    def _gravou_no_disco(self):
+        """
+        Conta uma miniatura gravada; passando do limite, apaga as usadas há
+        mais tempo até 90% dele, para não varrer a pasta a cada gravação
+        """
+        with self._lock_disco:
+            if self._no_disco is None:
+                self._no_disco = len(self._miniaturas_no_disco())
+            else:
+                self._no_disco += 1
+            if self._no_disco <= self.limite_disco:
+                return
+            miniaturas = sorted(self._miniaturas_no_disco())
+            excesso = max(len(miniaturas) - int(self.limite_disco * 0.9), 0)
+            for _, arquivo in miniaturas[:excesso]:
+                try:
+                    os.remove(arquivo)
+                except OSError:
+                    pass
+            self._no_disco = len(miniaturas) - excesso
+
+
+cache_miniaturas_lista = CacheMiniaturasLista()
+
+
+class MiniaturasTreeview:
+    """
+    Miniaturas das fotos na coluna da árvore (#0) de um Treeview.
+    Só as linhas visíveis são carregadas, em segundo plano, quando a lista
+    é atualizada ou rolada. As imagens do Tk também são limitadas (LRU);
+    uma linha que perde a imagem carrega de novo quando volta a aparecer.
+    """
+
+    CAPACIDADE_TK = 200
+    ESTILO = 'Miniaturas.Treeview'
+
+    def __init__(self, tree, scrollbar, resolver):
+        """
+        scrollbar: barra de rolagem vertical do tree (a rolagem avisa aqui)
+        resolver: função que devolve o caminho da foto (ou None)
+        """
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.resolver = resolver
+        self.ativo = False
+        # iid -> (foto, recorte) de cada linha
+        self.fotos = {}
+        # iid -> chave da imagem mostrada na linha
+        self._carregadas = {}
+        # chave -> PhotoImage
+        self._imagens = OrderedDict()
+        self._pedidos = set()
+        self._visiveis = frozenset()
+        self._resultados = queue.Queue()
+        self._agendado = None
+        self._recebendo = False
+        self._imagem_ausente = None
+
+        altura = TAMANHO_MINIATURA_LISTA[1] + 4
+        ttk.Style(tree).configure(self.ESTILO, rowheight=altura)
+        tree.heading('#0', text='Foto')
+        tree.column('#0', width=TAMANHO_MINIATURA_LISTA[0] + 24, stretch=False)
+        tree.configure(yscrollcommand=self.rolou)
+        tree.bind('<Configure>', lambda e: self.agendar(), add='+')
+        tree.bind('<Map>', lambda e: self.agendar(), add='+')
+
+    def definir_visivel(self, mostrar):
+        """Mostra ou esconde a coluna das miniaturas"""
+        self.ativo = bool(mostrar) and PIL_AVAILABLE
+        if self.ativo:
+            self.tree.configure(show='tree headings', style=self.ESTILO)
+            self.agendar()
+        else:
+            self.tree.configure(show='headings', style='Treeview')
+
+    def definir(self, iid, foto, recorte=None):
+        """Foto da linha iid (chamar ao inserir ou alterar a linha)"""
+        self.fotos[iid] = (foto, recorte)
+        if iid in self._carregadas and self._carregadas[iid] != self._chave(iid):
+            del self._carregadas[iid]
+            self.tree.item(iid, image='')
+        self.agendar()
+
+    def remover(self, iid):
+        """Esquece a linha iid (chamar ao remover a linha)"""
+        self.fotos.pop(iid, None)
+        self._carregadas.pop(iid, None)
+
+    def _chave(self, iid):
+        foto, recorte = self.fotos.get(iid, (None, None))
+        if not foto:
+            return None
+        return (foto, json.dumps(recorte, sort_keys=True))
+
+    def rolou(self, inicio, fim):
+        """yscrollcommand do tree: move a barra e carrega as linhas que apareceram"""
+        self.scrollbar.set(inicio, fim)
+        self.agendar()
+
+    def agendar(self):
+        """Carrega as miniaturas visíveis em breve (agrupa rolagens seguidas)"""
+        if self.ativo and self._agendado is None:
+            self._agendado = self.tree.after(30, self._carregar_visiveis)
+
+    def _linhas_visiveis(self):
+        linhas = self.tree.get_children()
+        if not linhas:
+            return ()
+        inicio, fim = self.tree.yview()
+        primeira = int(inicio * len(linhas))
+        ultima = min(len(linhas), math.ceil(fim * len(linhas)) + 1)
+        return linhas[primeira:ultima]
+
+    def _carregar_visiveis(self):
+        self._agendado = None
+        if not self.ativo or not self.tree.winfo_exists():
+            return
+        if not self.tree.winfo_ismapped():
+            return  # Aba escondida: carrega quando aparecer (<Map>)
+        visiveis = self._linhas_visiveis()
+        self._visiveis = frozenset(visiveis)
+        for iid in visiveis:
+            chave = self._chave(iid)
+            if chave is None or self._carregadas.get(iid) == chave:
+                continue
+            if chave in self._imagens:
+                self._mostrar(iid, chave, self._imagens[chave])
+                continue
+            if iid in self._pedidos:
+                continue
+            self._pedidos.add(iid)
+            foto, recorte = self.fotos[iid]
+            executor_miniaturas().submit(self._trabalhar, iid, chave, foto, recorte)
+        if self._pedidos and not self._recebendo:
+            self._recebendo = True
+            self.tree.after(50, self._receber)
+
+    def _trabalhar(self, iid, chave, foto, recorte):
+        """Thread de fundo: decodifica a miniatura se a linha ainda aparece"""
+        if iid not in self._visiveis:
+            self._resultados.put((iid, chave, None, False))
+            return
+        try:
+            caminho = self.resolver(foto)
+            miniatura = (
+                cache_miniaturas_lista.obter(caminho, recorte) if caminho else None
+            )
+        except Exception:
+            miniatura = None
+        self._resultados.put((iid, chave, miniatura, True))
+
+    def _receber(self):
+        if not self.tree.winfo_exists():
+            return
+        while True:
+            try:
+                iid, chave, miniatura, carregada = self._resultados.get_nowait()
+            except queue.Empty:
+                break
+            self._pedidos.discard(iid)
+            if not carregada:
+                # Saiu da tela antes da vez; se voltou, pedir de novo
+                if iid in self._visiveis:
+                    self.agendar()
+                continue
+            if not self.tree.exists(iid) or self._chave(iid) != chave:
+                continue
+            if miniatura is None:
+                imagem = self._ausente()
+            else:
+                imagem = ImageTk.PhotoImage(miniatura)
+                self._guardar(chave, imagem)
+            self._mostrar(iid, chave, imagem)
+        if self._pedidos:
+            self.tree.after(50, self._receber)
+        else:
+            self._recebendo = False
+
+    def _mostrar(self, iid, chave, imagem):
+        self.tree.item(iid, image=imagem)
+        self._carregadas[iid] = chave
+
+    def _guardar(self, chave, imagem):
+        self._imagens[chave] = imagem
+        self._imagens.move_to_end(chave)
+        while len(self._imagens) > self.CAPACIDADE_TK:
+            antiga, _ = self._imagens.popitem(last=False)
+            for iid, chave_linha in list(self._carregadas.items()):
+                if chave_linha == antiga:
+                    del self._carregadas[iid]
+                    if self.tree.exists(iid):
+                        self.tree.item(iid, image='')
+
+    def _ausente(self):
+        """Marca das linhas cuja foto não foi encontrada ou não abre"""
+        if self._imagem_ausente is None:
+            largura, altura = TAMANHO_MINIATURA_LISTA
+            img = Image.new('RGB', (largura, altura), '#f2c4c4')
+            img.paste('#c0392b', (0, 0, largura, 3))
+            img.paste('#c0392b', (0, altura - 3, largura, altura))
+            self._imagem_ausente = ImageTk.PhotoImage(img)
+        return self._imagem_ausente
+
+
+class ListaTreeview:
+    """
+    Liga uma lista de registros (dicts de self.dados) às linhas de um
+    Treeview. Cada atualização só mexe nas linhas inseridas, removidas,
+    alteradas ou fora de ordem, então a seleção e a rolagem continuam onde
+    estavam. O iid de cada linha é a identidade do registro: os diálogos
+    alteram o dict no lugar para a linha continuar a mesma.
+    Só as primeiras JANELA linhas entram no Treeview; as seguintes são
+    acrescentadas quando a rolagem chega perto do fim, então uma lista muito
+    longa não cria de uma vez um item do Tk por registro (a barra de
+    rolagem mostra as linhas já carregadas).
+    """
+
+    JANELA = 200
+    # Fração da rolagem a partir da qual mais linhas são carregadas
+    PERTO_DO_FIM = 0.9
+
+    def __init__(
+        self,
+        tree,
+        valores,
+        assinatura=None,
+        ao_definir=None,
+        ao_remover=None,
+        ao_rolar=None,
+    ):
+        """
+        valores: registro -> valores das colunas
+        assinatura: registro -> dados que não aparecem nas colunas, mas que
+                    também devem contar como mudança da linha (ex.: a foto)
+        ao_definir: chamado com (iid, registro) ao inserir ou alterar a linha
+        ao_remover: chamado com o iid ao remover a linha
+        ao_rolar: chamado com (inicio, fim) a cada rolagem (o yscrollcommand
+                  do tree passa a ser desta classe)
+        """
+        self.tree = tree
+        self.valores = valores
+        self.assinatura = assinatura
+        self.ao_definir = ao_definir
+        self.ao_remover = ao_remover
+        self.ao_rolar = ao_rolar
+        # iid -> registro (mantém o dict vivo, então o id não se repete)
+        self._registros = {}
+        # iid -> (valores, assinatura) mostrados
+        self._mostrados = {}
+        # iids na ordem em que estão no Treeview
+        self._ordem = []
+        self._desejado = []
+        # Linhas que já estão na ordem certa entre si e não precisam mover
+        self._fixas = set()
+        # Quantas linhas do começo da lista ficam no Treeview
+        self._limite = self.JANELA
+        self._estendendo = None
+        tree.configure(yscrollcommand=self._rolou)
+
+    def registro(self, iid):
+        """Registro mostrado na linha iid"""
+        return self._registros.get(iid)
+
+    def atualizar(self, registros):
+        """Deixa o Treeview igual ao começo (até a janela) da lista de registros"""
+        self._desejado = [(f"r{id(registro)}", registro) for registro in registros]
+        desejados = {iid for iid, _ in self._desejado}
+        self._remover([iid for iid in self._ordem if iid not in desejados])
+        posicoes = {iid: i for i, iid in enumerate(self._ordem)}
+        self._fixas = _maior_sequencia_crescente(
+            [iid for iid, _ in self._desejado if iid in posicoes], posicoes
+        )
+        self._aplicar()
+
+    def _remover(self, iids):
+        if not iids:
+            return
+        self.tree.delete(*iids)
+        removidos = set(iids)
+        for iid in iids:
+            del self._registros[iid]
+            del self._mostrados[iid]
+            if self.ao_remover:
+                self.ao_remover(iid)
+        self._ordem = [iid for iid in self._ordem if iid not in removidos]
+
+    def _rolou(self, inicio, fim):
+        if self.ao_rolar:
+            self.ao_rolar(inicio, fim)
+        if (
+            float(fim) >= self.PERTO_DO_FIM
+            and len(self._ordem) < len(self._desejado)
+            and self._estendendo is None
+        ):
+            # Fora do callback da rolagem: inserir linhas rola de novo
+            self._estendendo = self.tree.after_idle(self._estender)
+
+    def _estender(self):
+        """Carrega mais uma janela de linhas"""
+        self._estendendo = None
+        self._limite = max(self._limite, len(self._ordem)) + self.JANELA
+        self._aplicar()
+
+    def _aplicar(self):
+        fim = min(len(self._desejado), self._limite)
+        for posicao in range(fim):
+            iid, registro = self._desejado[posicao]
+            valores = tuple(self.valores(registro))
+            mostrado = (valores, self.assinatura(registro) if self.assinatura else None)
+            if iid not in self._registros:
+                self.tree.insert('', posicao, iid=iid, values=valores)
+                self._ordem.insert(posicao, iid)
+                self._registros[iid] = registro
+            else:
+                # As linhas antes da posição já estão certas; as que estão
+                # fora da ordem e ocupam o lugar vão para o fim até a vez delas
+                while (
+                    self._ordem[posicao] != iid
+                    and self._ordem[posicao] not in self._fixas
+                ):
+                    self.tree.move(self._ordem[posicao], '', tk.END)
+                    self._ordem.append(self._ordem.pop(posicao))
+                if self._ordem[posicao] != iid:
+                    self.tree.move(iid, '', posicao)
+                    self._ordem.remove(iid)
+                    self._ordem.insert(posicao, iid)
+                if self._mostrados[iid] == mostrado:
+                    continue
+                if self._mostrados[iid][0] != valores:
+                    self.tree.item(iid, values=valores)
+            self._mostrados[iid] = mostrado
+            if self.ao_definir:
+                self.ao_definir(iid, registro)
+        # Linhas que ficaram depois da janela saem do Treeview
+        self._remover(self._ordem[fim:])
+
+
+def _maior_sequencia_crescente(iids, posicoes):
+    """
+    Maior conjunto de iids (na ordem desejada) cujas posições atuais já
+    são crescentes: essas linhas ficam paradas e só as outras se movem
+    """
+    # Ordenação por paciência: finais[k] = índice do menor final de uma
+    # sequência de tamanho k + 1
+    finais = []
+    anterior = [None] * len(iids)
+    for i, iid in enumerate(iids):
+        posicao = posicoes[iid]
+        inicio, fim = 0, len(finais)
+        while inicio < fim:
+            meio = (inicio + fim) // 2
+            if posicoes[iids[finais[meio]]] < posicao:
+                inicio = meio + 1
+            else:
+                fim = meio
+        if inicio > 0:
+            anterior[i] = finais[inicio - 1]
+        if inicio == len(finais):
+            finais.append(i)
+        else:
+            finais[inicio] = i
+    fixas = set()
+    i = finais[-1] if finais else None
+    while i is not None:
+        fixas.add(iids[i])
+        i = anterior[i]
+    return fixas
+
+
+def atualizar_listbox(listbox, textos):
+    """
+    Deixa o Listbox com os textos mexendo só no trecho que mudou (o início
+    e o fim iguais ficam), para a seleção e a rolagem não se perderem
+    """
+    atuais = listbox.get(0, tk.END)
+    textos = list(textos)
+    inicio = 0
+    limite = min(len(atuais), len(textos))
+    while inicio < limite and atuais[inicio] == textos[inicio]:
+        inicio += 1
+    fim_atuais, fim_textos = len(atuais), len(textos)
+    while (
+        fim_atuais > inicio
+        and fim_textos > inicio
+        and atuais[fim_atuais - 1] == textos[fim_textos - 1]
+    ):
+        fim_atuais -= 1
+        fim_textos -= 1
+    if fim_atuais > inicio:
+        listbox.delete(inicio, fim_atuais - 1)
+    if fim_textos > inicio:
+        listbox.insert(inicio, *textos[inicio:fim_textos])
+
+
+class EditorRecorte:
+    """
+    Pré-visualização da foto com o quadro 3x4 do recorte, que pode ser
+    arrastado (e redimensionado pelo canto inferior direito). O recorte é
+    um dict {"x", "y", "largura", "altura"} em frações da foto, o formato
+    que o gerar_agenda lê do JSON; None usa o recorte automático do centro.
+    Com editavel=False, só mostra a foto (fotos que o documento não recorta).
+    """
+
+    LADO = 240
+    PROPORCAO = 3 / 4  # largura / altura
+    TAMANHO_ALCA = 8
+
+    def __init__(self, parent, foto_var, resolver, recorte=None, editavel=True):
+        """
+        foto_var: StringVar com a foto (trocar a foto descarta o recorte)
+        resolver: função que devolve o caminho da foto (ou None)
+        """
+        self.foto_var = foto_var
+        self.resolver = resolver
+        self.recorte = recorte
+        self.editavel = editavel
+
+        self.frame = ttk.Frame(parent)
+        self.canvas = tk.Canvas(
+            self.frame,
+            width=self.LADO,
+            height=self.LADO,
+            background='#404040',
+            highlightthickness=0,
+        )
+        self.canvas.pack(side=tk.LEFT)
+        if editavel:
+            lateral = ttk.Frame(self.frame)
+            lateral.pack(side=tk.LEFT, fill=tk.Y, padx=5)
+            ttk.Label(
+                lateral,
+                text="Arraste o quadro para\nescolher o recorte 3x4;\n"
+                "o canto inferior direito\nmuda o tamanho.",
+            ).pack(anchor=tk.W)
+            ttk.Button(lateral, text="Centralizar", command=self.centralizar).pack(
+                anchor=tk.W, pady=5
+            )
+
+        self.miniatura = None
+        self.foto_tk = None
+        self.caixa = None
+        self._arrasto = None
+        self._pedido = 0
+
+        if editavel:
+            self.canvas.bind('<ButtonPress-1>', self._pressionar)
+            self.canvas.bind('<B1-Motion>', self._arrastar)
+            self.canvas.bind('<ButtonRelease-1>', self._soltar)
+        self._trace = foto_var.trace_add('write', self._foto_trocada)
+        self.frame.bind('<Destroy>', self._destruido)
+        self.carregar()
+
+    def obter_recorte(self):
+        """Recorte escolhido (dict) ou None se a foto não foi recortada"""
+        return dict(self.recorte) if self.recorte else None
+
+    def centralizar(self):
+        """Volta ao recorte padrão (maior quadro 3x4 no centro)"""
+        self.recorte = None
+        self._caixa_inicial()
+        self._desenhar()
+
+    def carregar(self):
+        """Abre a miniatura da foto atual em segundo plano"""
+        self._pedido += 1
+        self.miniatura = None
+        self.canvas.delete('all')
+        if not PIL_AVAILABLE:
+            self._mensagem("Pré-visualização\nindisponível\n(instale o Pillow)")
+            return
+        caminho = self.resolver(self.foto_var.get())
+        if not caminho:
+            self._mensagem(
+                "Sem foto" if not self.foto_var.get() else "Foto não encontrada"
+            )
+            return
+        self._mensagem("Carregando...")
+        self._acompanhar(carregar_miniatura(caminho, self.LADO), self._pedido)
+
+    def _acompanhar(self, futuro, pedido):
+        if pedido != self._pedido or not self.canvas.winfo_exists():
+            return
+        if not futuro.done():
+            self.canvas.after(50, self._acompanhar, futuro, pedido)
+            return
+        try:
+            miniatura = futuro.result()
+        except Exception:
+            self.canvas.delete('all')
+            self._mensagem("Não foi possível\nabrir a foto")
+            return
+        self.miniatura = miniatura
+        self.foto_tk = ImageTk.PhotoImage(miniatura)
+        self.origem = (
+            (self.LADO - miniatura.width) // 2,
+            (self.LADO - miniatura.height) // 2,
+        )
+        self._caixa_inicial()
+        self._desenhar()
+
+    def _mensagem(self, texto):
+        self.canvas.delete('all')
+        self.canvas.create_text(
+            self.LADO // 2, self.LADO // 2, text=texto, fill='white', justify=tk.CENTER
+        )
+
+    def _caixa_inicial(self):
+        """Caixa (em pixels da miniatura) a partir do recorte salvo ou do centro"""
+        if self.miniatura is None:
+            return
+        largura, altura = self.miniatura.size
+        x0, y0, x1, y1 = 0, 0, largura, altura
+        if self.recorte:
+            try:
+                x0 = max(0.0, float(self.recorte['x'])) * largura
+                y0 = max(0.0, float(self.recorte['y'])) * altura
+                x1 = min(1.0, x0 / largura + float(self.recorte['largura'])) * largura
+                y1 = min(1.0, y0 / altura + float(self.recorte['altura'])) * altura
+            except (KeyError, TypeError, ValueError):
+                x0, y0, x1, y1 = 0, 0, largura, altura
+        # Mesmo ajuste do gerador: a partir do centro, na proporção 3x4
+        l, a = max(1.0, x1 - x0), max(1.0, y1 - y0)
+        if l > a * self.PROPORCAO:
+            l = a * self.PROPORCAO
+        else:
+            a = l / self.PROPORCAO
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        self.caixa = [cx - l / 2, cy - a / 2, cx + l / 2, cy + a / 2]
+        self._limitar()
+
+    def _limitar(self):
+        """Mantém a caixa dentro da foto"""
+        largura, altura = self.miniatura.size
+        x0, y0, x1, y1 = self.caixa
+        dx = max(0 - x0, min(0, largura - x1))
+        dy = max(0 - y0, min(0, altura - y1))
+        self.caixa = [x0 + dx, y0 + dy, x1 + dx, y1 + dy]
+
+    def _desenhar(self):
+        if self.miniatura is None:
+            return
+        c = self.canvas
+        c.delete('all')
+        ox, oy = self.origem
+        largura, altura = self.miniatura.size
+        c.create_image(ox, oy, image=self.foto_tk, anchor=tk.NW)
+        if not self.editavel:
+            return
+        x0, y0, x1, y1 = (
+            self.caixa[0] + ox,
+            self.caixa[1] + oy,
+            self.caixa[2] + ox,
+            self.caixa[3] + oy,
+        )
+        # Escurecer o que fica fora do recorte
+        for retangulo in (
+            (ox, oy, ox + largura, y0),
+            (ox, y1, ox + largura, oy + altura),
+            (ox, y0, x0, y1),
+            (x1, y0, ox + largura, y1),
+        ):
+            if retangulo[2] > retangulo[0] and retangulo[3] > retangulo[1]:
+                c.create_rectangle(
+                    *retangulo, fill='black', stipple='gray50', outline=''
+                )
+        c.create_rectangle(x0, y0, x1, y1, outline='yellow', width=2)
+        t = self.TAMANHO_ALCA
+        c.create_rectangle(x1 - t, y1 - t, x1, y1, fill='yellow', outline='')
+
+    def _pressionar(self, evento):
+        if self.miniatura is None:
+            return
+        x = evento.x - self.origem[0]
+        y = evento.y - self.origem[1]
+        x0, y0, x1, y1 = self.caixa
+        t = self.TAMANHO_ALCA + 2
+        if x1 - t <= x <= x1 + 2 and y1 - t <= y <= y1 + 2:
+            self._arrasto = ('tamanho', x, y)
+            return
+        if not (x0 <= x <= x1 and y0 <= y <= y1):
+            # Clique fora: centralizar o quadro no ponto
+            l, a = x1 - x0, y1 - y0
+            self.caixa = [x - l / 2, y - a / 2, x + l / 2, y + a / 2]
+            self._limitar()
+            self._desenhar()
+        self._arrasto = ('mover', x, y)
+
+    def _arrastar(self, evento):
+        if self._arrasto is None:
+            return
+        modo, x_ant, y_ant = self._arrasto
+        x = evento.x - self.origem[0]
+        y = evento.y - self.origem[1]
+        x0, y0, x1, y1 = self.caixa
+        if modo == 'mover':
+            self.caixa = [
+                x0 + x - x_ant,
+                y0 + y - y_ant,
+                x1 + x - x_ant,
+                y1 + y - y_ant,
+            ]
+            self._limitar()
+        else:
+            largura, altura = self.miniatura.size
+            # Largura pelo ponteiro, limitada à foto, e altura na proporção 3x4
+            l = min(max(20.0, x - x0), largura - x0, (altura - y0) * self.PROPORCAO)
+            self.caixa = [x0, y0, x0 + l, y0 + l / self.PROPORCAO]
+        self._arrasto = (modo, x, y)
+        self._desenhar()
+
+    def _soltar(self, evento):
+        if self._arrasto is None:
+            return
+        self._arrasto = None
+        largura, altura = self.miniatura.size
+        x0, y0, x1, y1 = self.caixa
+        self.recorte = {
+            'x': round(x0 / largura, 4),
+            'y': round(y0 / altura, 4),
+            'largura': round((x1 - x0) / largura, 4),
+            'altura': round((y1 - y0) / altura, 4),
+        }
+
+    def _foto_trocada(self, *args):
+        if not self.canvas.winfo_exists():
+            return
+        self.recorte = None
+        self.carregar()
+
+    def _destruido(self, evento):
+        if evento.widget is self.frame:
+            try:
+                self.foto_var.trace_remove('write', self._trace)
+            except tk.TclError:
+                pass
+
 
 class EditorAgendaGUI:
     def __init__(self, root):
@@ -27,6 +948,11 @@ class EditorAgendaGUI:
 
         self.dados = None
         self.arquivo_atual = 'agenda_data.json'
+        # Geração do Word em andamento (fila de mensagens e cancelamento)
+        self.geracao = None
+        # Geração antecipada, iniciada a cada salvamento para o conteúdo
+        # salvo; o "Gerar Word" aproveita o resultado se o JSON não mudou
+        self.pre_geracao = None
 
         # Criar menu
         self.criar_menu()
@@ -64,6 +990,17 @@ class EditorAgendaGUI:
         menu_arquivo.add_separator()
         menu_arquivo.add_command(label="Sair", command=self.root.quit)
 
+        # Menu Exibir
+        menu_exibir = tk.Menu(menubar, tearoff=0)
+        menubar.add_cascade(label="Exibir", menu=menu_exibir)
+        self.mostrar_miniaturas_var = tk.BooleanVar(value=PIL_AVAILABLE)
+        menu_exibir.add_checkbutton(
+            label="Miniaturas das fotos nas listas",
+            variable=self.mostrar_miniaturas_var,
+            command=self.alternar_miniaturas,
+            state=tk.NORMAL if PIL_AVAILABLE else tk.DISABLED,
+        )
+
         # Menu Ajuda
         menu_ajuda = tk.Menu(menubar, tearoff=0)
         menubar.add_cascade(label="Ajuda", menu=menu_ajuda)
@@ -87,15 +1024,26 @@ class EditorAgendaGUI:
         btn_salvar.pack(side=tk.LEFT, padx=2)
 
         # Botão Gerar Word
-        btn_gerar = ttk.Button(
+        self.btn_gerar = ttk.Button(
             toolbar_frame, text="📄 Gerar Word", command=self.gerar_word, width=15
         )
-        btn_gerar.pack(side=tk.LEFT, padx=2)
+        self.btn_gerar.pack(side=tk.LEFT, padx=2)
 
         # Separador
         separator = ttk.Separator(toolbar_frame, orient=tk.VERTICAL)
         separator.pack(side=tk.LEFT, fill=tk.Y, padx=5)
 
+        # Progresso e cancelamento da geração (visíveis só durante a geração)
+        self.barra_progresso = ttk.Progressbar(
+            toolbar_frame, length=160, maximum=100, mode='determinate'
+        )
+        self.btn_cancelar = ttk.Button(
+            toolbar_frame,
+            text="✖ Cancelar",
+            command=self.cancelar_geracao,
+            width=12,
+        )
+
         # Label de status
         self.status_label = ttk.Label(
             toolbar_frame, text="Pronto", relief=tk.SUNKEN, anchor=tk.W
@@ -226,13 +1174,22 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
-                    self.presidente_foto_var.set(nome_arquivo)
+
+                self.importar_foto(arquivo, self.presidente_foto_var.set)
+
+        # A Palavra da Presidente não leva a foto no documento: não há
+        # recorte a escolher, só a pré-visualização
+        def visualizar_foto_presidente():
+            self.dialog_recorte(
+                "Foto da Presidente", self.presidente_foto_var, None, None
+            )
 
         ttk.Button(
             frame, text="Selecionar Foto", command=selecionar_foto_presidente
         ).grid(row=2, column=1, sticky=tk.E, padx=5)
+        ttk.Button(
+            frame, text="Visualizar...", command=visualizar_foto_presidente
+        ).grid(row=2, column=2, sticky=tk.W, padx=5)
 
         # Mensagem da Presidente
         ttk.Label(frame, text="Mensagem da Presidente:").grid(
@@ -268,9 +1225,9 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
-                    self.capa_var.set(nome_arquivo)
+                self.importar_foto(
+                    arquivo, self.capa_var.set, importar_fotos.LADO_MAXIMO_PAGINA
+                )
 
         ttk.Button(frame, text="Selecionar Capa", command=selecionar_capa).grid(
             row=5, column=1, sticky=tk.E, padx=5
@@ -293,9 +1250,9 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
-                    self.calendario_var.set(nome_arquivo)
+                self.importar_foto(
+                    arquivo, self.calendario_var.set, importar_fotos.LADO_MAXIMO_PAGINA
+                )
 
         ttk.Button(
             frame, text="Selecionar Calendário", command=selecionar_calendario
@@ -344,7 +1301,23 @@ class EditorAgendaGUI:
         scrollbar_diretoria = ttk.Scrollbar(
             tree_frame, orient=tk.VERTICAL, command=self.tree_diretoria.yview
         )
-        self.tree_diretoria.configure(yscrollcommand=scrollbar_diretoria.set)
+        self.miniaturas_diretoria = MiniaturasTreeview(
+            self.tree_diretoria, scrollbar_diretoria, self.caminho_foto
+        )
+        self.miniaturas_diretoria.definir_visivel(self.mostrar_miniaturas_var.get())
+        self.lista_diretoria = ListaTreeview(
+            self.tree_diretoria,
+            lambda membro: (
+                membro.get('cargo', ''),
+                membro.get('nome', ''),
+                membro.get('data_nascimento', ''),
+                membro.get('email', ''),
+            ),
+            self._assinatura_foto,
+            self._definir_miniatura(self.miniaturas_diretoria),
+            self.miniaturas_diretoria.remover,
+            self.miniaturas_diretoria.rolou,
+        )
 
         self.tree_diretoria.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar_diretoria.pack(side=tk.RIGHT, fill=tk.Y)
@@ -391,7 +1364,23 @@ class EditorAgendaGUI:
         scrollbar_safs = ttk.Scrollbar(
             tree_frame, orient=tk.VERTICAL, command=self.tree_safs.yview
         )
-        self.tree_safs.configure(yscrollcommand=scrollbar_safs.set)
+        self.miniaturas_safs = MiniaturasTreeview(
+            self.tree_safs, scrollbar_safs, self.caminho_foto
+        )
+        self.miniaturas_safs.definir_visivel(self.mostrar_miniaturas_var.get())
+        self.lista_safs = ListaTreeview(
+            self.tree_safs,
+            lambda saf: (
+                saf.get('numero', ''),
+                saf.get('nome', ''),
+                (saf.get('presidente') or {}).get('nome', ''),
+                (saf.get('pastor') or {}).get('nome', ''),
+            ),
+            self._assinatura_foto,
+            self._definir_miniatura(self.miniaturas_safs),
+            self.miniaturas_safs.remover,
+            self.miniaturas_safs.rolou,
+        )
 
         self.tree_safs.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar_safs.pack(side=tk.RIGHT, fill=tk.Y)
@@ -554,6 +1543,7 @@ class EditorAgendaGUI:
         # Foto do Missionário
         ttk.Label(miss_frame, text="Foto:").grid(row=4, column=0, sticky=tk.W, pady=2)
         self.miss_foto_var = tk.StringVar()
+        self.miss_recorte = None
         foto_entry_miss = ttk.Entry(
             miss_frame, textvariable=self.miss_foto_var, width=30
         )
@@ -568,13 +1558,30 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
+
+                def importada(nome_arquivo):
                     self.miss_foto_var.set(nome_arquivo)
+                    self.miss_recorte = None
+
+                self.importar_foto(arquivo, importada)
+
+        def recortar_foto_missionario():
+            def aplicar(recorte):
+                self.miss_recorte = recorte
+
+            self.dialog_recorte(
+                "Recorte da Foto do Missionário",
+                self.miss_foto_var,
+                self.miss_recorte,
+                aplicar,
+            )
 
         ttk.Button(
             miss_frame, text="Selecionar Foto", command=selecionar_foto_missionario
         ).grid(row=4, column=1, sticky=tk.E, padx=5, pady=2)
+        ttk.Button(
+            miss_frame, text="Recortar...", command=recortar_foto_missionario
+        ).grid(row=4, column=2, sticky=tk.W, padx=5, pady=2)
 
         # Observações
         obs_frame = ttk.LabelFrame(main_frame, text="Observações", padding=10)
@@ -607,49 +1614,35 @@ class EditorAgendaGUI:
     # Métodos de atualização de listas
     def atualizar_lista_diretoria(self):
         """Atualiza a lista de diretoria"""
-        for item in self.tree_diretoria.get_children():
-            self.tree_diretoria.delete(item)
-
-        for membro in self.dados.get('diretoria', []):
-            self.tree_diretoria.insert(
-                '',
-                tk.END,
-                values=(
-                    membro.get('cargo', ''),
-                    membro.get('nome', ''),
-                    membro.get('data_nascimento', ''),
-                    membro.get('email', ''),
-                ),
-            )
+        self.lista_diretoria.atualizar(self.dados.get('diretoria', []))
 
     def atualizar_lista_safs(self):
         """Atualiza a lista de SAFs"""
-        for item in self.tree_safs.get_children():
-            self.tree_safs.delete(item)
+        self.lista_safs.atualizar(self.dados.get('safs', []))
 
-        for saf in self.dados.get('safs', []):
-            pres_nome = (
-                saf.get('presidente', {}).get('nome', '')
-                if saf.get('presidente')
-                else ''
-            )
-            pastor_nome = (
-                saf.get('pastor', {}).get('nome', '') if saf.get('pastor') else ''
-            )
-            self.tree_safs.insert(
-                '',
-                tk.END,
-                values=(
-                    saf.get('numero', ''),
-                    saf.get('nome', ''),
-                    pres_nome,
-                    pastor_nome,
-                ),
-            )
+    @staticmethod
+    def _assinatura_foto(registro):
+        """Foto e recorte: mudam a miniatura sem mudar as colunas"""
+        return (
+            registro.get('foto'),
+            json.dumps(registro.get('recorte'), sort_keys=True),
+        )
+
+    @staticmethod
+    def _definir_miniatura(miniaturas):
+        def definir(iid, registro):
+            miniaturas.definir(iid, registro.get('foto'), registro.get('recorte'))
+
+        return definir
+
+    def alternar_miniaturas(self):
+        """Mostra ou esconde as miniaturas das fotos nas listas"""
+        mostrar = self.mostrar_miniaturas_var.get()
+        self.miniaturas_diretoria.definir_visivel(mostrar)
+        self.miniaturas_safs.definir_visivel(mostrar)
 
     def atualizar_lista_atividades_planejadas(self):
         """Atualiza a lista de atividades planejadas"""
-        self.listbox_atividades.delete(0, tk.END)
         mes = self.mes_var.get()
         meses_map = {
             'Janeiro': 'janeiro',
@@ -668,21 +1661,23 @@ class EditorAgendaGUI:
         mes_key = meses_map.get(mes, 'janeiro')
 
         atividades = self.dados.get('atividades_planejadas_2024', {}).get(mes_key, [])
-        for ativ in atividades:
-            data_str = f"{ativ.get('data', '')} – " if ativ.get('data') else ""
-            self.listbox_atividades.insert(
-                tk.END, f"{data_str}{ativ.get('descricao', '')}"
-            )
+        atualizar_listbox(
+            self.listbox_atividades,
+            (self._texto_atividade(ativ) for ativ in atividades),
+        )
 
     def atualizar_lista_atividades_realizadas(self):
         """Atualiza a lista de atividades realizadas"""
-        self.listbox_atividades_realizadas.delete(0, tk.END)
         atividades = self.dados.get('atividades_realizadas_2023', [])
-        for ativ in atividades:
-            data_str = f"{ativ.get('data', '')} – " if ativ.get('data') else ""
-            self.listbox_atividades_realizadas.insert(
-                tk.END, f"{data_str}{ativ.get('descricao', '')}"
-            )
+        atualizar_listbox(
+            self.listbox_atividades_realizadas,
+            (self._texto_atividade(ativ) for ativ in atividades),
+        )
+
+    @staticmethod
+    def _texto_atividade(ativ):
+        data_str = f"{ativ.get('data', '')} – " if ativ.get('data') else ""
+        return f"{data_str}{ativ.get('descricao', '')}"
 
     def carregar_outras_info(self):
         """Carrega outras informações"""
@@ -694,38 +1689,100 @@ class EditorAgendaGUI:
         self.miss_campo_var.set(miss.get('campo', ''))
         self.miss_whats_var.set(miss.get('whatsapp', ''))
         self.miss_foto_var.set(miss.get('foto', ''))
+        self.miss_recorte = miss.get('recorte')
 
-        self.listbox_observacoes.delete(0, tk.END)
-        for obs in info.get('observacoes', []):
-            self.listbox_observacoes.insert(tk.END, obs)
+        atualizar_listbox(self.listbox_observacoes, info.get('observacoes', []))
 
     # Métodos de diálogos
-    def copiar_foto_para_pasta_fotos(self, caminho_origem):
-        """Copia foto para a pasta fotos do projeto"""
+    def importar_foto(
+        self, caminho_origem, ao_concluir, lado_maximo=importar_fotos.LADO_MAXIMO_FOTO
+    ):
+        """
+        Importa a foto para a pasta fotos do projeto em outro processo
+        (rotação corrigida, sem metadados, reduzida e com nome pelo conteúdo)
+        e chama ao_concluir(nome_arquivo) quando terminar
+        """
         if not caminho_origem or not os.path.exists(caminho_origem):
-            return None
+            return
 
-        # Criar pasta fotos se não existir
         pasta_atual = os.path.dirname(os.path.abspath(self.arquivo_atual))
         pasta_fotos = os.path.join(pasta_atual, 'fotos')
-        os.makedirs(pasta_fotos, exist_ok=True)
-
-        # Copiar arquivo
-        nome_arquivo = os.path.basename(caminho_origem)
-        caminho_destino = os.path.join(pasta_fotos, nome_arquivo)
+        futuro = executor_importacao().submit(
+            importar_fotos.importar_foto, caminho_origem, pasta_fotos, lado_maximo
+        )
+        self.status_label.config(
+            text=f"Importando foto: {os.path.basename(caminho_origem)}..."
+        )
+        self._acompanhar_importacao(futuro, ao_concluir)
 
+    def _acompanhar_importacao(self, futuro, ao_concluir):
+        if not futuro.done():
+            self.root.after(50, self._acompanhar_importacao, futuro, ao_concluir)
+            return
         try:
-            shutil.copy2(caminho_origem, caminho_destino)
-            return nome_arquivo  # Retorna apenas o nome do arquivo
+            nome_arquivo = futuro.result()
         except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao copiar foto: {e}")
+            self.status_label.config(text="Erro ao importar foto")
+            messagebox.showerror("Erro", f"Erro ao importar foto: {e}")
+            return
+        self.status_label.config(text=f"Foto importada: {nome_arquivo}")
+        ao_concluir(nome_arquivo)
+
+    def caminho_foto(self, nome):
+        """Caminho de uma foto do JSON (pasta fotos/, pasta do JSON ou absoluto)"""
+        if not nome:
             return None
+        pasta_atual = os.path.dirname(os.path.abspath(self.arquivo_atual))
+        for caminho in (
+            os.path.join(pasta_atual, 'fotos', nome),
+            os.path.join(pasta_atual, nome),
+        ):
+            if os.path.isfile(caminho):
+                return caminho
+        return None
+
+    def dialog_recorte(self, titulo, foto_var, recorte, ao_salvar):
+        """
+        Diálogo com o EditorRecorte; ao_salvar recebe o recorte (ou None).
+        Sem ao_salvar, só mostra a foto.
+        """
+        if not foto_var.get():
+            messagebox.showinfo(titulo, "Selecione uma foto primeiro.")
+            return
+        dialog = tk.Toplevel(self.root)
+        dialog.title(titulo)
+        dialog.transient(self.root)
+        dialog.grab_set()
+
+        editor_recorte = EditorRecorte(
+            dialog,
+            foto_var,
+            self.caminho_foto,
+            recorte,
+            editavel=ao_salvar is not None,
+        )
+        editor_recorte.frame.pack(padx=10, pady=10)
+
+        btn_frame = ttk.Frame(dialog)
+        btn_frame.pack(pady=10)
+        if ao_salvar is None:
+            ttk.Button(btn_frame, text="Fechar", command=dialog.destroy).pack()
+            return
+
+        def salvar():
+            ao_salvar(editor_recorte.obter_recorte())
+            dialog.destroy()
+
+        ttk.Button(btn_frame, text="Salvar", command=salvar).pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancelar", command=dialog.destroy).pack(
+            side=tk.LEFT, padx=5
+        )
 
     def dialog_membro_diretoria(self, membro=None):
         """Diálogo para adicionar/editar membro da diretoria"""
         dialog = tk.Toplevel(self.root)
         dialog.title("Membro da Diretoria" if membro else "Novo Membro")
-        dialog.geometry("550x420")
+        dialog.geometry("550x700")
         dialog.transient(self.root)
         dialog.grab_set()
 
@@ -788,14 +1845,21 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
-                    foto_var.set(nome_arquivo)
+                self.importar_foto(arquivo, foto_var.set)
 
         ttk.Button(dialog, text="Selecionar Foto", command=selecionar_foto).grid(
             row=5, column=1, padx=5, pady=5, sticky=tk.E
         )
 
+        # Pré-visualização e recorte 3x4 da foto
+        editor_recorte = EditorRecorte(
+            dialog,
+            foto_var,
+            self.caminho_foto,
+            membro.get('recorte') if membro else None,
+        )
+        editor_recorte.frame.grid(row=6, column=0, columnspan=2, padx=5, pady=5)
+
         def salvar():
             novo_membro = {
                 "cargo": cargo_var.get(),
@@ -808,19 +1872,22 @@ class EditorAgendaGUI:
                 novo_membro["endereco"] = endereco_var.get()
             if foto_var.get():
                 novo_membro["foto"] = foto_var.get()
+                if editor_recorte.obter_recorte():
+                    novo_membro["recorte"] = editor_recorte.obter_recorte()
 
             if membro:
-                idx = self.dados['diretoria'].index(membro)
-                self.dados['diretoria'][idx] = novo_membro
+                # Alterar no lugar: a linha da lista continua a mesma
+                membro.clear()
+                membro.update(novo_membro)
             else:
                 self.dados['diretoria'].append(novo_membro)
 
             self.atualizar_lista_diretoria()
             dialog.destroy()
 
-        ttk.Button(dialog, text="Salvar", command=salvar).grid(row=6, column=1, pady=10)
+        ttk.Button(dialog, text="Salvar", command=salvar).grid(row=7, column=1, pady=10)
         ttk.Button(dialog, text="Cancelar", command=dialog.destroy).grid(
-            row=6, column=0, pady=10
+            row=7, column=0, pady=10
         )
 
     def dialog_saf(self, saf=None):
@@ -872,14 +1939,21 @@ class EditorAgendaGUI:
                 ],
             )
             if arquivo:
-                nome_arquivo = self.copiar_foto_para_pasta_fotos(arquivo)
-                if nome_arquivo:
-                    foto_saf_var.set(nome_arquivo)
+                self.importar_foto(arquivo, foto_saf_var.set)
 
         ttk.Button(aba_geral, text="Selecionar Foto", command=selecionar_foto_saf).grid(
             row=2, column=1, sticky=tk.E, padx=5
         )
 
+        # Pré-visualização e recorte 3x4 da foto
+        editor_recorte = EditorRecorte(
+            aba_geral,
+            foto_saf_var,
+            self.caminho_foto,
+            saf.get('recorte') if saf else None,
+        )
+        editor_recorte.frame.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+
         # Aba Pastor
         aba_pastor = ttk.Frame(notebook)
         notebook.add(aba_pastor, text="Pastor")
@@ -1098,10 +2172,13 @@ class EditorAgendaGUI:
             # Remover foto se estiver vazia
             if not nova_saf.get('foto'):
                 nova_saf.pop('foto', None)
+            elif editor_recorte.obter_recorte():
+                nova_saf['recorte'] = editor_recorte.obter_recorte()
 
             if saf:
-                idx = self.dados['safs'].index(saf)
-                self.dados['safs'][idx] = nova_saf
+                # Alterar no lugar: a linha da lista continua a mesma
+                saf.clear()
+                saf.update(nova_saf)
             else:
                 self.dados['safs'].append(nova_saf)
 
@@ -1206,11 +2283,7 @@ class EditorAgendaGUI:
             messagebox.showwarning("Aviso", "Selecione um membro para editar!")
             return
 
-        item = self.tree_diretoria.item(selecionado[0])
-        valores = item['values']
-        cargo = valores[0]
-
-        membro = next((m for m in self.dados['diretoria'] if m['cargo'] == cargo), None)
+        membro = self.lista_diretoria.registro(selecionado[0])
         if membro:
             self.dialog_membro_diretoria(membro)
 
@@ -1221,12 +2294,9 @@ class EditorAgendaGUI:
             return
 
         if messagebox.askyesno("Confirmar", "Deseja realmente remover este membro?"):
-            item = self.tree_diretoria.item(selecionado[0])
-            valores = item['values']
-            cargo = valores[0]
-
+            membro = self.lista_diretoria.registro(selecionado[0])
             self.dados['diretoria'] = [
-                m for m in self.dados['diretoria'] if m['cargo'] != cargo
+                m for m in self.dados['diretoria'] if m is not membro
             ]
             self.atualizar_lista_diretoria()
 
@@ -1239,10 +2309,7 @@ class EditorAgendaGUI:
             messagebox.showwarning("Aviso", "Selecione uma SAF para editar!")
             return
 
-        item = self.tree_safs.item(selecionado[0])
-        num = int(item['values'][0])
-
-        saf = next((s for s in self.dados['safs'] if s['numero'] == num), None)
+        saf = self.lista_safs.registro(selecionado[0])
         if saf:
             self.dialog_saf(saf)
 
@@ -1253,10 +2320,8 @@ class EditorAgendaGUI:
             return
 
         if messagebox.askyesno("Confirmar", "Deseja realmente remover esta SAF?"):
-            item = self.tree_safs.item(selecionado[0])
-            num = int(item['values'][0])
-
-            self.dados['safs'] = [s for s in self.dados['safs'] if s['numero'] != num]
+            saf = self.lista_safs.registro(selecionado[0])
+            self.dados['safs'] = [s for s in self.dados['safs'] if s is not saf]
             # Renumerar
             for i, s in enumerate(self.dados['safs'], 1):
                 s['numero'] = i
@@ -1390,6 +2455,7 @@ class EditorAgendaGUI:
             filetypes=[("JSON files", "*.json"), ("All files", "*.*")],
         )
         if arquivo:
+            self._descartar_pre_geracao()
             self.arquivo_atual = arquivo
             self.carregar_dados()
             self.criar_abas()  # Recriar abas com novos dados
@@ -1410,6 +2476,8 @@ class EditorAgendaGUI:
             self.dados['presidente']['foto'] = self.presidente_foto_var.get()
         elif 'foto' in self.dados.get('presidente', {}):
             del self.dados['presidente']['foto']
+        # Recorte de versões anteriores do editor (o documento não o usa)
+        self.dados['presidente'].pop('recorte', None)
 
         # Salvar capa e calendário
         if self.capa_var.get():
@@ -1437,6 +2505,10 @@ class EditorAgendaGUI:
             ] = self.miss_foto_var.get()
         elif 'foto' in self.dados['informacoes_gerais']['missionario_oracao']:
             del self.dados['informacoes_gerais']['missionario_oracao']['foto']
+        if self.miss_foto_var.get() and self.miss_recorte:
+            self.dados['informacoes_gerais']['missionario_oracao'][
+                'recorte'
+            ] = self.miss_recorte
 
         try:
             # Verificar se o arquivo existe e está protegido
@@ -1470,6 +2542,8 @@ class EditorAgendaGUI:
                 with open(self.arquivo_atual, 'w', encoding='utf-8') as f:
                     json.dump(self.dados, f, ensure_ascii=False, indent=2)
 
+            # Já começar a gerar o Word do que foi salvo
+            self._pre_geracao_atual()
             messagebox.showinfo("Sucesso", f"Dados salvos em '{self.arquivo_atual}'")
             # Atualizar status
             if hasattr(self, 'status_label'):
@@ -1511,73 +2585,253 @@ class EditorAgendaGUI:
             self.salvar_dados()
 
     def gerar_word(self):
-        """Gera o documento Word"""
+        """Gera o documento Word em segundo plano, com progresso e cancelamento"""
+        if self.geracao is not None:
+            # Já há uma geração em andamento
+            return
         self.salvar_dados()  # Salvar antes de gerar
+
+        # Obter ano do JSON
+        ano = self.dados.get('ano', 2024)
+        nome_padrao = f"Agenda {ano}.docx"
+
+        # Pedir ao usuário onde salvar o arquivo
+        nome_arquivo = filedialog.asksaveasfilename(
+            title="Salvar Agenda Word",
+            defaultextension=".docx",
+            filetypes=[("Documentos Word", "*.docx"), ("Todos os arquivos", "*.*")],
+            initialfile=nome_padrao,
+            initialdir=os.path.dirname(os.path.abspath(self.arquivo_atual)),
+        )
+
+        # Se cancelar, não fazer nada
+        if not nome_arquivo:
+            return
+
+        # Garantir que termina com .docx
+        if not nome_arquivo.endswith('.docx'):
+            nome_arquivo += '.docx'
+
+        # Normalmente a geração antecipada do salvamento já terminou (ou
+        # está rodando) e o Word só precisa ser gravado no destino
+        geracao = self._pre_geracao_atual(prioridade_baixa=False)
+        if geracao is None:
+            messagebox.showerror("Erro", f"Não foi possível ler '{self.arquivo_atual}'")
+            return
+        geracao['destino'] = nome_arquivo
+        geracao['ano'] = ano
+        self.geracao = geracao
+
+        self.btn_gerar.state(['disabled'])
+        self.barra_progresso['value'] = 0
+        self.barra_progresso.pack(side=tk.LEFT, padx=2)
+        self.btn_cancelar.state(['!disabled'])
+        self.btn_cancelar.pack(side=tk.LEFT, padx=2)
+        self.status_label.config(text="Gerando Word...")
+        self._acompanhar_geracao()
+
+    def _pre_geracao_atual(self, prioridade_baixa=True):
+        """
+        Geração do Word para o JSON salvo: reaproveita a que já está rodando
+        (ou terminou) para o mesmo arquivo e conteúdo ou começa uma nova.
+        Retorna None se o arquivo não puder ser lido.
+        """
+        arquivo_dados = os.path.abspath(self.arquivo_atual)
+        try:
+            with open(arquivo_dados, 'rb') as f:
+                conteudo = f.read()
+        except OSError:
+            return None
+        # As fotos são relativas à pasta do JSON, então o caminho entra na chave
+        chave = (arquivo_dados, hashlib.sha256(conteudo).hexdigest())
+
+        geracao = self.pre_geracao
+        if (
+            geracao is not None
+            and geracao['chave'] == chave
+            and not geracao['cancelamento'].is_set()
+            and geracao['fim'] in (None, 'ok')
+        ):
+            if (
+                prioridade_baixa
+                or not geracao['prioridade_baixa']
+                or geracao['fim'] is not None
+            ):
+                return geracao
+            # O usuário pediu o Word: a geração antecipada volta à prioridade
+            # normal ou, se o sistema não deixar, recomeça com ela
+            if _restaurar_prioridade(geracao['processo'].pid):
+                geracao['prioridade_baixa'] = False
+                return geracao
+
+        self._descartar_pre_geracao()
+        # A geração roda em outro processo (com a prioridade reduzida, ela
+        # não disputa a CPU nem o GIL com a interface) e manda os eventos
+        # por uma fila; a thread de _repassar_eventos os passa para
+        # geracao['fila'] e define o 'fim', lidos pelo loop do Tk em
+        # _acompanhar_geracao
         try:
-            import os
-            import subprocess
-            import sys
-
-            # Obter ano do JSON
-            ano = self.dados.get('ano', 2024)
-            nome_padrao = f"Agenda {ano}.docx"
-
-            # Pedir ao usuário onde salvar o arquivo
-            nome_arquivo = filedialog.asksaveasfilename(
-                title="Salvar Agenda Word",
-                defaultextension=".docx",
-                filetypes=[("Documentos Word", "*.docx"), ("Todos os arquivos", "*.*")],
-                initialfile=nome_padrao,
-                initialdir=os.path.dirname(os.path.abspath(self.arquivo_atual)),
+            fila_processo = multiprocessing.Queue()
+            cancelamento = multiprocessing.Event()
+            processo = multiprocessing.Process(
+                target=_gerar_word_em_processo,
+                args=(
+                    arquivo_dados,
+                    conteudo,
+                    fila_processo,
+                    cancelamento,
+                    prioridade_baixa,
+                ),
+                daemon=True,
             )
-
-            # Se cancelar, não fazer nada
-            if not nome_arquivo:
+            processo.start()
+        except (OSError, NotImplementedError):
+            # Ambientes sem multiprocessing: uma thread, sem mudar a
+            # prioridade (no Windows ela é do processo todo)
+            fila_processo = queue.Queue()
+            cancelamento = threading.Event()
+            processo = threading.Thread(
+                target=_gerar_word_em_processo,
+                args=(arquivo_dados, conteudo, fila_processo, cancelamento, False),
+                daemon=True,
+            )
+            processo.start()
+        geracao = {
+            'chave': chave,
+            'fila': queue.Queue(),
+            'cancelamento': cancelamento,
+            'processo': processo,
+            'prioridade_baixa': prioridade_baixa,
+            'avisos': [],
+            'fim': None,
+            'resultado': None,
+        }
+        threading.Thread(
+            target=self._repassar_eventos,
+            args=(geracao, fila_processo),
+            daemon=True,
+        ).start()
+        self.pre_geracao = geracao
+        return geracao
+
+    def _descartar_pre_geracao(self):
+        """Abandona a geração antecipada (cancela se ninguém está esperando)"""
+        geracao = self.pre_geracao
+        self.pre_geracao = None
+        if geracao is not None and geracao is not self.geracao:
+            geracao['cancelamento'].set()
+
+    def _repassar_eventos(self, geracao, fila_processo):
+        """
+        Roda em uma thread; não toca em nenhum widget.
+        Passa os eventos do processo de geração para geracao['fila'] e guarda
+        o resultado quando ele termina.
+        """
+        processo = geracao['processo']
+        while True:
+            # Conferido antes de ler: se o processo já tinha terminado, tudo o
+            # que ele mandou já está na fila
+            vivo = processo.is_alive()
+            try:
+                mensagem = fila_processo.get(timeout=0.5)
+            except queue.Empty:
+                if vivo:
+                    continue
+                geracao['resultado'] = "O processo de geração terminou inesperadamente"
+                geracao['fim'] = 'erro'
+                return
+            if isinstance(mensagem, tuple):
+                _, fim, resultado = mensagem
+                geracao['resultado'] = resultado
+                geracao['fim'] = fim
+                processo.join()
                 return
+            geracao['fila'].put(mensagem)
+
+    def _acompanhar_geracao(self):
+        """Lê os eventos da geração (chamado pelo loop do Tk)"""
+        geracao = self.geracao
+        # 'fim' é lido antes de esvaziar a fila: a thread só o define depois
+        # do último evento
+        fim = geracao['fim']
+        while True:
+            try:
+                evento = geracao['fila'].get_nowait()
+            except queue.Empty:
+                break
+            self._mostrar_evento_geracao(evento)
+        if fim is None:
+            self.root.after(100, self._acompanhar_geracao)
+            return
 
-            # Garantir que termina com .docx
-            if not nome_arquivo.endswith('.docx'):
-                nome_arquivo += '.docx'
+        self._encerrar_geracao()
+        if fim == 'ok':
+            import gerar_agenda
 
-            # Atualizar status
-            if hasattr(self, 'status_label'):
-                self.status_label.config(text="Gerando Word...")
-            self.root.update()  # Atualizar interface
-
-            # Usar python ou python3 dependendo do sistema
-            python_cmd = sys.executable if hasattr(sys, 'executable') else 'python'
-
-            # Obter caminho do script gerar_agenda.py
-            script_dir = os.path.dirname(os.path.abspath(__file__))
-            script_path = os.path.join(script_dir, 'gerar_agenda.py')
-
-            # Executar gerar_agenda.py com o nome do arquivo especificado
-            result = subprocess.run(
-                [python_cmd, script_path, self.arquivo_atual, nome_arquivo],
-                check=True,
-                capture_output=True,
-                text=True,
-            )
-            messagebox.showinfo(
-                "Sucesso",
-                f"Documento Word gerado com sucesso!\n\nArquivo: {nome_arquivo}",
+            nome_arquivo = os.path.abspath(
+                gerar_agenda.nome_arquivo_saida(geracao['destino'], geracao['ano'])
             )
-            # Atualizar status
-            if hasattr(self, 'status_label'):
-                self.status_label.config(text=f"Word gerado: {nome_arquivo}")
-        except subprocess.CalledProcessError as e:
-            error_msg = e.stderr if e.stderr else str(e)
-            messagebox.showerror("Erro", f"Erro ao gerar Word:\n{error_msg}")
-            if hasattr(self, 'status_label'):
+            try:
+                with open(nome_arquivo, 'wb') as f:
+                    f.write(geracao['resultado'])
+            except OSError as e:
                 self.status_label.config(text="Erro ao gerar Word")
-        except FileNotFoundError:
-            messagebox.showerror("Erro", "Arquivo gerar_agenda.py não encontrado!")
-            if hasattr(self, 'status_label'):
-                self.status_label.config(text="Erro: gerar_agenda.py não encontrado")
-        except Exception as e:
-            messagebox.showerror("Erro", f"Erro ao gerar Word: {e}")
-            if hasattr(self, 'status_label'):
-                self.status_label.config(text=f"Erro: {str(e)[:30]}")
+                messagebox.showerror(
+                    "Erro",
+                    f"Não foi possível gravar '{nome_arquivo}':\n{e}\n\n"
+                    f"Verifique se o arquivo não está aberto no Word.",
+                )
+                return
+            self.status_label.config(text=f"Word gerado: {nome_arquivo}")
+            texto = f"Documento Word gerado com sucesso!\n\nArquivo: {nome_arquivo}"
+            avisos = geracao['avisos']
+            if avisos:
+                texto += "\n\nAvisos:\n" + "\n".join(
+                    f"• {aviso}" for aviso in avisos[:10]
+                )
+                if len(avisos) > 10:
+                    texto += f"\n... e mais {len(avisos) - 10}"
+            messagebox.showinfo("Sucesso", texto)
+        elif fim == 'cancelado':
+            self.status_label.config(text="Geração do Word cancelada")
+        else:
+            self.status_label.config(text="Erro ao gerar Word")
+            messagebox.showerror("Erro", f"Erro ao gerar Word:\n{geracao['resultado']}")
+
+    def _mostrar_evento_geracao(self, evento):
+        """Atualiza a barra de progresso e o status com um evento da geração"""
+        if evento['tipo'] == 'aviso':
+            self.geracao['avisos'].append(evento['mensagem'])
+            return
+        nome = ETAPAS_GERACAO.get(evento.get('etapa'), evento.get('etapa'))
+        if evento['tipo'] == 'etapa_iniciada' and evento['indice'] is not None:
+            self.geracao['etapa'] = (evento['indice'], evento['total'])
+            fracao = evento['indice'] / evento['total']
+            texto = f"Gerando Word: {nome}..."
+        elif evento['tipo'] == 'item' and 'etapa' in self.geracao:
+            # Registro dentro da etapa atual (membro, SAF, atividade...)
+            indice, total = self.geracao['etapa']
+            fracao = (indice + evento['indice'] / evento['total']) / total
+            texto = f"Gerando Word: {nome} ({evento['indice']}/{evento['total']})..."
+        else:
+            return
+        self.barra_progresso['value'] = fracao * 100
+        if not self.geracao['cancelamento'].is_set():
+            self.status_label.config(text=texto)
+
+    def cancelar_geracao(self):
+        """Pede o cancelamento; a geração para no próximo registro"""
+        if self.geracao is not None:
+            self.geracao['cancelamento'].set()
+            self.btn_cancelar.state(['disabled'])
+            self.status_label.config(text="Cancelando...")
+
+    def _encerrar_geracao(self):
+        """Volta a barra de ferramentas ao estado normal"""
+        self.geracao = None
+        self.barra_progresso.pack_forget()
+        self.btn_cancelar.pack_forget()
+        self.btn_gerar.state(['!disabled'])
 
     def mostrar_sobre(self):
         messagebox.showinfo(
@@ -1587,6 +2841,9 @@ class EditorAgendaGUI:
 
 
 def main():
+    # Executável do PyInstaller no Windows: os processos da importação de
+    # fotos rodam o próprio executável
+    multiprocessing.freeze_support()
     root = tk.Tk()
     app = EditorAgendaGUI(root)
     root.mainloop()
@@ -6,18 +6,41 @@ a partir de um arquivo JSON estruturado.
 Formato: Folder vertical com 2 colunas e linha divisória no centro.
 """
 
+import argparse
+import contextlib
+import copy
+import glob
+import hashlib
+import io
+import itertools
 import json
 import os
 import re
-from datetime import datetime
+import stat
+import struct
+import tempfile
+import threading
+import time
+import tracemalloc
+import unicodedata
+import zipfile
+import zlib
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
 
 try:
     from docx import Document
     from docx.enum.section import WD_SECTION
     from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.image.image import Image as ImagemDocx
     from docx.oxml import OxmlElement, parse_xml
+    from docx.opc.packuri import PackURI
+    from docx.opc.part import Part
+    from docx.opc.pkgwriter import _ContentTypesItem
     from docx.oxml.ns import nsdecls, qn
-    from docx.shared import Inches, Pt, RGBColor, Twips
+    from docx.shared import Emu, Inches, Pt, RGBColor, Twips
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
 except ImportError:
     print("Instalando python-docx...")
     import subprocess
@@ -26,9 +49,603 @@ except ImportError:
     from docx import Document
     from docx.enum.section import WD_SECTION
     from docx.enum.text import WD_ALIGN_PARAGRAPH
+    from docx.image.image import Image as ImagemDocx
     from docx.oxml import OxmlElement, parse_xml
+    from docx.opc.packuri import PackURI
+    from docx.opc.part import Part
+    from docx.opc.pkgwriter import _ContentTypesItem
     from docx.oxml.ns import nsdecls, qn
-    from docx.shared import Inches, Pt, RGBColor, Twips
+    from docx.shared import Emu, Inches, Pt, RGBColor, Twips
+    from docx.table import Table
+    from docx.text.paragraph import Paragraph
+
+from lxml import etree
+
+try:
+    from PIL import Image, ImageFilter, ImageOps
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+VERSAO_GERADOR = '1.0.0'
+
+# Resolução usada ao reamostrar as fotos para o tamanho de impressão
+DPI_IMAGENS = 300
+
+# Largura das fotos 3x4 de cada seção, em polegadas
+LARGURA_FOTO_DIRETORIA = 0.5
+LARGURA_FOTO_SAF = 0.6
+LARGURA_FOTO_MISSIONARIO = 0.6
+# Capa e calendário: meia página útil (A4 paisagem, margens de 0.4") menos margem
+LARGURA_MEIA_PAGINA = Inches(11.69 - 0.8).inches / 2 - 0.3
+# Largura útil da página em EMU, igual a doc._block_width com
+# configurar_pagina (a seção guarda as medidas em twips); constante, para
+# não consultar as seções do documento a cada registro
+LARGURA_BLOCO = Twips(Inches(11.69).twips) - 2 * Twips(Inches(0.4).twips)
+QUALIDADE_JPEG = 85
+
+# Como escolher o recorte 3x4 das fotos que não têm recorte salvo no JSON:
+# o maior retângulo 3x4 no centro da foto, ou posicionado por uma heurística
+# de bordas e tom de pele (veja retangulo_recorte)
+MODOS_RECORTE = ('centro', 'automatico')
+
+# Tamanho máximo da pasta de cache das fotos reduzidas (cada recorte ou
+# tamanho de cada foto é um arquivo); passando disso, as usadas há mais
+# tempo são apagadas
+LIMITE_CACHE_IMAGENS = 300 * 1024 * 1024
+# Fragmentos guardados de cada seção no cache de seções (uma entrada por
+# versão dos dados; várias agendas geradas no mesmo computador dividem o
+# limite) e tamanho máximo da mídia desses fragmentos
+LIMITE_CACHE_SECOES = 40
+LIMITE_CACHE_MIDIA = 200 * 1024 * 1024
+
+# Nível de compressão (zlib, 0 a 9) das partes XML do .docx
+NIVEL_COMPRESSAO_XML = 6
+# Partes a partir deste tamanho são comprimidas em threads (o zlib libera o GIL)
+LIMIAR_COMPRESSAO_PARALELA = 64 * 1024
+# Imagens que já vêm comprimidas: gravadas no zip sem deflate
+EXTENSOES_SEM_COMPRESSAO = {'jpg', 'jpeg', 'png', 'gif'}
+
+# Propriedade personalizada do .docx com o manifesto (veja
+# ContextoGeracao.manifesto) dos dados que geraram o documento
+PROPRIEDADE_MANIFESTO = 'AgendaManifesto'
+CT_PROPRIEDADES_PERSONALIZADAS = (
+    'application/vnd.openxmlformats-officedocument.custom-properties+xml'
+)
+RT_PROPRIEDADES_PERSONALIZADAS = (
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships/'
+    'custom-properties'
+)
+
+
+def _data_fixa():
+    """
+    Data gravada nas entradas do zip e nas propriedades do documento. É
+    fixa para os mesmos dados gerarem sempre os mesmos bytes: a de
+    SOURCE_DATE_EPOCH, se definida, senão 1980-01-01 (a menor data do zip).
+    """
+    try:
+        epoca = max(int(os.environ['SOURCE_DATE_EPOCH']), 315532800)
+    except (KeyError, ValueError):
+        epoca = 315532800
+    return datetime.fromtimestamp(epoca, timezone.utc).replace(tzinfo=None)
+
+
+DATA_FIXA = _data_fixa()
+
+
+def obter_pasta_cache():
+    """Retorna a pasta de cache do usuário (pode ser trocada por AGENDA_SAF_CACHE)"""
+    pasta = os.environ.get('AGENDA_SAF_CACHE')
+    if not pasta:
+        base = (
+            os.environ.get('LOCALAPPDATA')
+            or os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache')
+        )
+        pasta = os.path.join(base, 'agenda-saf')
+    return pasta
+
+
+def gravar_arquivo_atomico(destino, conteudo):
+    """
+    Grava bytes em um arquivo temporário na mesma pasta e renomeia,
+    para que outro processo nunca leia um arquivo de cache pela metade.
+    """
+    pasta = os.path.dirname(destino)
+    os.makedirs(pasta, exist_ok=True)
+    fd, temp = tempfile.mkstemp(suffix='.tmp', dir=pasta)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temp, destino)
+    except Exception:
+        if os.path.exists(temp):
+            os.remove(temp)
+        raise
+
+
+class LimitePastaCache:
+    """
+    Limite de uma pasta de cache em disco, em arquivos e/ou bytes. Com
+    grupo (função do nome do arquivo), o limite vale para cada grupo.
+    Cada leitura atualiza o mtime do arquivo (usar) e, quando uma gravação
+    passa do limite, os arquivos usados há mais tempo são apagados até 90%
+    dele, para a pasta não ser varrida a cada gravação. Outros processos
+    podem usar a mesma pasta: os totais são recontados a cada limpeza.
+    """
+
+    def __init__(self, pasta, max_arquivos=None, max_bytes=None, grupo=None):
+        self.pasta = pasta
+        self.max_arquivos = max_arquivos
+        self.max_bytes = max_bytes
+        self.grupo = grupo or (lambda nome: None)
+        self._lock = threading.Lock()
+        # grupo -> [arquivos, bytes], contados na primeira gravação
+        self._totais = None
+
+    def _listar(self):
+        """{grupo: [(mtime_ns, tamanho, caminho)]} dos arquivos da pasta"""
+        grupos = {}
+        try:
+            with os.scandir(self.pasta) as entradas:
+                for entrada in entradas:
+                    # .tmp: gravação em andamento (gravar_arquivo_atomico)
+                    if entrada.name.endswith('.tmp'):
+                        continue
+                    try:
+                        if not entrada.is_file():
+                            continue
+                        st = entrada.stat()
+                    except OSError:
+                        continue  # Apagado por outro processo
+                    grupos.setdefault(self.grupo(entrada.name), []).append(
+                        (st.st_mtime_ns, st.st_size, entrada.path)
+                    )
+        except OSError:
+            pass
+        return grupos
+
+    def _excede(self, arquivos, tamanho, fracao=1.0):
+        return (
+            self.max_arquivos is not None and arquivos > self.max_arquivos * fracao
+        ) or (self.max_bytes is not None and tamanho > self.max_bytes * fracao)
+
+    def usar(self, caminho):
+        """
+        Marca o arquivo como usado agora (fica por último na limpeza).
+        Levanta FileNotFoundError se ele não existe.
+        """
+        try:
+            os.utime(caminho)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            pass  # Pasta só de leitura: o arquivo vale, só não é marcado
+
+    def gravou(self, caminho, tamanho):
+        """Conta um arquivo gravado na pasta; passando do limite, faz a limpeza"""
+        grupo = self.grupo(os.path.basename(caminho))
+        with self._lock:
+            if self._totais is None:
+                # A listagem já inclui o arquivo gravado. Na primeira
+                # contagem todos os grupos são conferidos (inclusive os que
+                # não recebem mais gravações, como os de versões antigas)
+                listagem = self._listar()
+                self._totais = {
+                    g: [len(arquivos), sum(t for _, t, _ in arquivos)]
+                    for g, arquivos in listagem.items()
+                }
+                for g, arquivos in listagem.items():
+                    if self._excede(*self._totais[g]):
+                        self._limpar(g, arquivos, caminho)
+                return
+
+            total = self._totais.setdefault(grupo, [0, 0])
+            total[0] += 1
+            total[1] += tamanho
+            if self._excede(*total):
+                self._limpar(grupo, self._listar().get(grupo, []), caminho)
+
+    def _limpar(self, grupo, arquivos, preservar):
+        """Apaga os arquivos do grupo usados há mais tempo, menos preservar"""
+        n, total = len(arquivos), sum(t for _, t, _ in arquivos)
+        for _, t, arquivo in sorted(arquivos):
+            if not self._excede(n, total, 0.9):
+                break
+            if arquivo == preservar:
+                continue
+            try:
+                os.remove(arquivo)
+            except OSError:
+                continue
+            n -= 1
+            total -= t
+        self._totais[grupo] = [n, total]
+
+
+def _assinatura_gerador():
+    """Hash do código deste módulo: muda sempre que o layout gerado pode mudar"""
+    h = hashlib.sha256(VERSAO_GERADOR.encode())
+    try:
+        with open(os.path.abspath(__file__), 'rb') as f:
+            h.update(f.read())
+    except (OSError, NameError):
+        # Executável empacotado: o código só muda junto com a versão
+        pass
+    return h.hexdigest()
+
+
+ASSINATURA_GERADOR = _assinatura_gerador()
+
+
+class CacheImagens:
+    """
+    Cache em disco das fotos já reduzidas para o tamanho de impressão.
+    A chave é o hash do conteúdo da foto original mais o tamanho final em
+    pixels, então builds repetidos reaproveitam o arquivo já processado.
+    A pasta fica limitada a limite_bytes (LimitePastaCache).
+    """
+
+    def __init__(
+        self,
+        pasta=None,
+        dpi=DPI_IMAGENS,
+        qualidade=QUALIDADE_JPEG,
+        limite_bytes=LIMITE_CACHE_IMAGENS,
+    ):
+        self.pasta = pasta or os.path.join(obter_pasta_cache(), 'imagens')
+        self.dpi = dpi
+        self.qualidade = qualidade
+        self.limite = LimitePastaCache(self.pasta, max_bytes=limite_bytes)
+        self._hashes = {}
+        self._lock = threading.Lock()
+
+    def _hash_arquivo(self, caminho):
+        """Hash SHA-256 do conteúdo, memorizado por (caminho, tamanho, mtime)"""
+        st = os.stat(caminho)
+        chave = (os.path.abspath(caminho), st.st_size, st.st_mtime_ns)
+        with self._lock:
+            if chave in self._hashes:
+                return self._hashes[chave]
+
+        h = hashlib.sha256()
+        with open(caminho, 'rb') as f:
+            for bloco in iter(lambda: f.read(1024 * 1024), b''):
+                h.update(bloco)
+        digest = h.hexdigest()
+
+        with self._lock:
+            self._hashes[chave] = digest
+        return digest
+
+    def preparar(
+        self,
+        caminho,
+        largura_in,
+        altura_in=None,
+        dpi=None,
+        recorte=None,
+        modo_recorte='centro',
+    ):
+        """
+        Retorna o caminho de uma cópia da imagem reamostrada para
+        largura_in x altura_in polegadas no DPI informado (ou o do cache).
+        Se altura_in for None, mantém a proporção original; senão, uma foto
+        com outra proporção é recortada (e não esticada) pelo recorte salvo
+        no JSON ou, sem ele, pelo modo_recorte (veja retangulo_recorte).
+        Em caso de falha (ou sem Pillow) retorna o caminho original.
+        """
+        if not PIL_AVAILABLE:
+            return caminho
+
+        dpi = dpi or self.dpi
+        recorte = _normalizar_recorte(recorte)
+
+        try:
+            with Image.open(caminho) as img:
+                # Considerar a rotação EXIF (fotos de celular)
+                largura_orig, altura_orig = img.size
+                girada = img.getexif().get(0x0112, 1) in (5, 6, 7, 8)
+                if girada:
+                    largura_orig, altura_orig = altura_orig, largura_orig
+
+                largura_px = max(1, round(largura_in * dpi))
+                if altura_in is None:
+                    altura_px = max(1, round(largura_px * altura_orig / largura_orig))
+                else:
+                    altura_px = max(1, round(altura_in * dpi))
+
+                # Recortar quando há recorte salvo ou a proporção da foto
+                # difere da caixa em pelo menos um pixel
+                recortar = altura_in is not None and (
+                    recorte is not None
+                    or abs(largura_orig * altura_px - altura_orig * largura_px)
+                    >= altura_px
+                )
+
+                # Foto já é menor que o tamanho de impressão: usar original
+                if (
+                    not recortar
+                    and largura_orig <= largura_px
+                    and altura_orig <= altura_px
+                ):
+                    return caminho
+
+                digest = self._hash_arquivo(caminho)
+                nome_base = f"{digest}_{largura_px}x{altura_px}_q{self.qualidade}"
+                if recortar:
+                    nome_base += '_' + _sufixo_recorte(recorte, modo_recorte)
+                pronta = self._obter(nome_base)
+                if pronta is not None:
+                    return pronta
+
+                # JPEG: decodificar já em escala reduzida (bem mais rápido),
+                # mantendo resolução suficiente para a parte recortada
+                largura_draft, altura_draft = largura_px, altura_px
+                if recortar:
+                    x0, y0, x1, y1 = retangulo_recorte(
+                        largura_orig, altura_orig, largura_px / altura_px, recorte
+                    )
+                    largura_draft = largura_px * largura_orig / max(1, x1 - x0)
+                    altura_draft = altura_px * altura_orig / max(1, y1 - y0)
+                tamanho_draft = (round(largura_draft), round(altura_draft))
+                img.draft('RGB', tamanho_draft[::-1] if girada else tamanho_draft)
+                tem_alfa = img.mode in ('RGBA', 'LA') or (
+                    img.mode == 'P' and 'transparency' in img.info
+                )
+                convertida = ImageOps.exif_transpose(img).convert(
+                    'RGBA' if tem_alfa else 'RGB'
+                )
+                if recortar:
+                    convertida = convertida.crop(
+                        retangulo_recorte(
+                            convertida.width,
+                            convertida.height,
+                            largura_px / altura_px,
+                            recorte,
+                            modo_recorte,
+                            convertida,
+                        )
+                    )
+                    # Recorte menor que o tamanho de impressão: não ampliar
+                    if convertida.width < largura_px:
+                        largura_px, altura_px = convertida.width, max(
+                            1, round(convertida.width * altura_px / largura_px)
+                        )
+                reduzida = convertida.resize((largura_px, altura_px), Image.LANCZOS)
+
+                buffer = io.BytesIO()
+                if tem_alfa:
+                    reduzida.save(buffer, 'PNG', optimize=True)
+                else:
+                    reduzida.save(buffer, 'JPEG', quality=self.qualidade, optimize=True)
+
+                ext = '.png' if tem_alfa else '.jpg'
+                return self._guardar(nome_base + ext, buffer.getvalue())
+        except Exception as e:
+            print(f"[AVISO] Não foi possível reduzir a imagem '{caminho}': {e}")
+            return caminho
+
+    def _obter(self, nome_base):
+        """Imagem já reduzida (caminho no cache) ou None"""
+        for ext in ('.jpg', '.png'):
+            destino = os.path.join(self.pasta, nome_base + ext)
+            try:
+                self.limite.usar(destino)
+            except FileNotFoundError:
+                continue
+            return destino
+        return None
+
+    def _guardar(self, nome, conteudo):
+        """Guarda a imagem reduzida e retorna o caminho no cache"""
+        destino = os.path.join(self.pasta, nome)
+        gravar_arquivo_atomico(destino, conteudo)
+        self.limite.gravou(destino, len(conteudo))
+        return destino
+
+
+class CacheImagensMemoria(CacheImagens):
+    """
+    Variante do CacheImagens que guarda as imagens reduzidas na memória,
+    sem gravar nada em disco. preparar retorna um BytesIO em vez de um
+    caminho quando a foto precisou ser reduzida.
+    """
+
+    def __init__(self, dpi=DPI_IMAGENS, qualidade=QUALIDADE_JPEG):
+        super().__init__(pasta='', dpi=dpi, qualidade=qualidade)
+        self._imagens = {}
+
+    def _obter(self, nome_base):
+        with self._lock:
+            conteudo = self._imagens.get(nome_base)
+        return io.BytesIO(conteudo) if conteudo is not None else None
+
+    def _guardar(self, nome, conteudo):
+        with self._lock:
+            self._imagens[os.path.splitext(nome)[0]] = conteudo
+        return io.BytesIO(conteudo)
+
+
+# Cache de imagens compartilhado por todas as gerações do processo
+cache_imagens = CacheImagens()
+
+
+def _normalizar_recorte(recorte):
+    """
+    Recorte salvo no JSON ({"x", "y", "largura", "altura"}, em frações da
+    foto já girada pelo EXIF) como tupla (x0, y0, x1, y1), ou None se não
+    houver recorte ou ele for inválido
+    """
+    if isinstance(recorte, tuple):
+        return recorte
+    if not isinstance(recorte, dict):
+        return None
+    try:
+        x, y = float(recorte['x']), float(recorte['y'])
+        largura, altura = float(recorte['largura']), float(recorte['altura'])
+    except (KeyError, TypeError, ValueError):
+        return None
+    x0, y0 = max(0.0, x), max(0.0, y)
+    x1, y1 = min(1.0, x + largura), min(1.0, y + altura)
+    if x1 <= x0 or y1 <= y0:
+        return None
+    return tuple(round(v, 4) for v in (x0, y0, x1, y1))
+
+
+def _sufixo_recorte(recorte, modo):
+    """Parte do nome no cache de imagens que identifica o recorte"""
+    if recorte is None:
+        return modo
+    return 'r' + hashlib.sha1(repr(recorte).encode()).hexdigest()[:12]
+
+
+def retangulo_recorte(
+    largura, altura, proporcao, recorte=None, modo='centro', imagem=None
+):
+    """
+    Retângulo (x0, y0, x1, y1), em pixels, com a proporção largura/altura
+    pedida, dentro de uma imagem largura x altura.
+    recorte: tupla de _normalizar_recorte; o retângulo salvo é ajustado à
+             proporção a partir do seu centro
+    modo: sem recorte, o maior retângulo possível fica no centro ('centro')
+          ou onde _centro_automatico indicar ('automatico', usa a imagem)
+    """
+    if recorte is not None:
+        x0, y0 = recorte[0] * largura, recorte[1] * altura
+        x1, y1 = recorte[2] * largura, recorte[3] * altura
+    else:
+        x0, y0, x1, y1 = 0, 0, largura, altura
+    largura_recorte, altura_recorte = x1 - x0, y1 - y0
+    if largura_recorte > altura_recorte * proporcao:
+        largura_recorte = altura_recorte * proporcao
+    else:
+        altura_recorte = largura_recorte / proporcao
+
+    centro_x, centro_y = (x0 + x1) / 2, (y0 + y1) / 2
+    if recorte is None and modo == 'automatico' and imagem is not None:
+        centro_x, centro_y = _centro_automatico(imagem, largura_recorte, altura_recorte)
+    esquerda = min(max(centro_x - largura_recorte / 2, 0), largura - largura_recorte)
+    topo = min(max(centro_y - altura_recorte / 2, 0), altura - altura_recorte)
+    return (
+        round(esquerda),
+        round(topo),
+        round(esquerda + largura_recorte),
+        round(topo + altura_recorte),
+    )
+
+
+def _centro_automatico(imagem, largura_recorte, altura_recorte):
+    """
+    Centro do recorte pela heurística: em uma miniatura, cada pixel pesa
+    pelas bordas (onde há detalhe) e pelo tom de pele (rostos), e o recorte
+    vai, no eixo em que pode andar, para a janela de maior peso. Sem nada
+    que se destaque, fica no centro.
+    """
+    largura, altura = imagem.size
+    escala = 64 / max(largura, altura)
+    mini_l, mini_a = max(1, round(largura * escala)), max(1, round(altura * escala))
+    miniatura = imagem.resize((mini_l, mini_a), Image.BOX).convert('RGB')
+    bordas = miniatura.convert('L').filter(ImageFilter.FIND_EDGES).tobytes()
+    cores = miniatura.convert('YCbCr').tobytes()
+    pesos = [
+        borda / 255 + (1.0 if 77 <= cb <= 127 and 133 <= cr <= 173 else 0.0)
+        for borda, cb, cr in zip(bordas, cores[1::3], cores[2::3])
+    ]
+
+    horizontal = largura - largura_recorte >= 1
+    if horizontal:
+        perfil = [sum(pesos[x::mini_l]) for x in range(mini_l)]
+        janela = round(largura_recorte * mini_l / largura)
+    else:
+        perfil = [sum(pesos[y * mini_l : (y + 1) * mini_l]) for y in range(mini_a)]
+        janela = round(altura_recorte * mini_a / altura)
+    n = len(perfil)
+    if janela <= 0 or janela >= n or sum(perfil) <= 0:
+        return largura / 2, altura / 2
+
+    somas = [sum(perfil[:janela])]
+    for i in range(1, n - janela + 1):
+        somas.append(somas[-1] + perfil[i + janela - 1] - perfil[i - 1])
+    meio = (n - janela) / 2
+    # Empate: a posição mais perto do centro
+    melhor = max(range(len(somas)), key=lambda i: (somas[i], -abs(i - meio)))
+    centro = (melhor + janela / 2) / n
+    if horizontal:
+        return centro * largura, altura / 2
+    return largura / 2, centro * altura
+
+
+class CacheSecoes:
+    """
+    Cache em disco dos fragmentos OOXML de cada seção do conteúdo.
+    Cada fragmento é guardado sob o nome da seção e o hash dos dados dela,
+    das fotos que ela usa e do código do gerador; as imagens do fragmento
+    ficam em uma pasta de mídia endereçada por conteúdo. Cada seção guarda
+    até limite fragmentos e a mídia até limite_midia bytes; passando disso,
+    os usados há mais tempo são apagados (LimitePastaCache). Um fragmento
+    cuja mídia foi apagada é só refeito.
+    """
+
+    def __init__(
+        self, pasta=None, limite=LIMITE_CACHE_SECOES, limite_midia=LIMITE_CACHE_MIDIA
+    ):
+        self.pasta = pasta or os.path.join(obter_pasta_cache(), 'secoes')
+        self.pasta_midia = os.path.join(self.pasta, 'midia')
+        # Arquivos '<seção>-<hash>.json' (ContextoGeracao.chave_secao); os
+        # de versões antigas, sem a seção no nome, formam um grupo só
+        self.limite = LimitePastaCache(
+            self.pasta,
+            max_arquivos=limite,
+            grupo=lambda nome: nome.rpartition('-')[0],
+        )
+        self.limite_midia = LimitePastaCache(self.pasta_midia, max_bytes=limite_midia)
+
+    def _arquivo(self, chave):
+        return os.path.join(self.pasta, f"{chave}.json")
+
+    def obter(self, chave):
+        """Retorna {'elementos': [xml, ...], 'imagens': {rId: arquivo}} ou None"""
+        try:
+            with open(self._arquivo(chave), 'r', encoding='utf-8') as f:
+                fragmento = json.load(f)
+            self.limite.usar(self._arquivo(chave))
+        except (OSError, ValueError):
+            return None
+        # Descartar fragmento cuja mídia foi apagada da pasta de cache
+        for arquivo in fragmento['imagens'].values():
+            try:
+                self.limite_midia.usar(os.path.join(self.pasta_midia, arquivo))
+            except FileNotFoundError:
+                return None
+        return fragmento
+
+    def guardar(self, chave, elementos, imagens):
+        """
+        elementos: lista de elementos XML do corpo do documento
+        imagens: {rId: ImagePart} das imagens referenciadas pelos elementos
+        """
+        arquivos = {}
+        for rId, image_part in imagens.items():
+            arquivo = f"{image_part.sha1}{os.path.splitext(image_part.partname)[1]}"
+            destino = os.path.join(self.pasta_midia, arquivo)
+            try:
+                self.limite_midia.usar(destino)
+            except FileNotFoundError:
+                gravar_arquivo_atomico(destino, image_part.blob)
+                self.limite_midia.gravou(destino, len(image_part.blob))
+            arquivos[rId] = arquivo
+
+        fragmento = {
+            'elementos': [etree.tostring(el, encoding='unicode') for el in elementos],
+            'imagens': arquivos,
+        }
+        conteudo = json.dumps(fragmento, ensure_ascii=False).encode('utf-8')
+        gravar_arquivo_atomico(self._arquivo(chave), conteudo)
+        self.limite.gravou(self._arquivo(chave), len(conteudo))
 
 
 def configurar_colunas_secao(
@@ -109,67 +726,454 @@ def adicionar_linha_vertical_pagina(section):
     r._r.append(pict)
 
 
-def adicionar_titulo_secao(doc, texto):
-    """Adiciona um título de seção principal (centralizado, negrito, Arial 14)"""
-    p = doc.add_paragraph()
+def configurar_pagina(section):
+    """Configura a seção como A4 paisagem com margens de 0.4\" """
+    section.page_height = Inches(8.27)
+    section.page_width = Inches(11.69)
+    section.left_margin = Inches(0.4)
+    section.right_margin = Inches(0.4)
+    section.top_margin = Inches(0.4)
+    section.bottom_margin = Inches(0.4)
+
+
+def _construir_esqueleto(com_capa):
+    """
+    Monta o documento base e retorna o pacote .docx em bytes:
+    A4 paisagem, seção da capa (1 coluna, se com_capa) e seção do conteúdo
+    com 2 colunas, linha divisória e a linha vertical no header.
+    """
+    doc = Document()
+
+    section = doc.sections[0]
+    configurar_pagina(section)
+
+    if com_capa:
+        # Primeira seção para a capa: 1 coluna (meia folha) sem linha divisória
+        configurar_colunas_secao(
+            section, num_colunas=1, espacamento=0.25, linha_divisoria=False
+        )
+        # Após a capa, nova seção para o conteúdo com colunas
+        section = doc.add_section(WD_SECTION.NEW_PAGE)
+        configurar_pagina(section)
+
+    # CONFIGURAR 2 COLUNAS COM LINHA DIVISÓRIA NO CENTRO
+    configurar_colunas_secao(
+        section, num_colunas=2, espacamento=0.25, linha_divisoria=True
+    )
+    # Adicionar linha vertical preta no header (aparece em todas as páginas)
+    adicionar_linha_vertical_pagina(section)
+
+    _enxugar_pacote(doc)
+    _registrar_estilos(doc)
+    _fixar_propriedades(doc)
+
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+# Partes do modelo padrão do python-docx que a agenda não usa
+_RELACOES_DISPENSAVEIS = (
+    'http://schemas.openxmlformats.org/package/2006/relationships/metadata/thumbnail',
+    'http://schemas.microsoft.com/office/2007/relationships/stylesWithEffects',
+    'http://schemas.openxmlformats.org/officeDocument/2006/relationships/customXml',
+)
+
+
+def _xml_propriedades_personalizadas(manifesto):
+    """docProps/custom.xml com o manifesto da geração"""
+    raiz = etree.Element(
+        '{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}'
+        'Properties',
+        nsmap={
+            None: 'http://schemas.openxmlformats.org/officeDocument/2006/'
+            'custom-properties',
+            'vt': 'http://schemas.openxmlformats.org/officeDocument/2006/'
+            'docPropsVTypes',
+        },
+    )
+    propriedade = etree.SubElement(
+        raiz,
+        '{http://schemas.openxmlformats.org/officeDocument/2006/custom-properties}'
+        'property',
+        fmtid='{D5CDD505-2E9C-101B-9397-08002B2CF9AE}',
+        pid='2',
+        name=PROPRIEDADE_MANIFESTO,
+    )
+    etree.SubElement(
+        propriedade,
+        '{http://schemas.openxmlformats.org/officeDocument/2006/docPropsVTypes}'
+        'lpwstr',
+    ).text = manifesto
+    return etree.tostring(raiz, xml_declaration=True, encoding='UTF-8', standalone=True)
+
+
+def _fixar_propriedades(doc):
+    """
+    Propriedades do documento independentes do modelo e do momento da
+    geração (autor, datas, revisão), e a parte docProps/custom.xml onde
+    cada geração grava o seu manifesto
+    """
+    propriedades = doc.core_properties
+    propriedades.author = 'Federação de SAFs'
+    propriedades.comments = f'Gerado pelo gerar_agenda {VERSAO_GERADOR}'
+    propriedades.last_modified_by = ''
+    propriedades.revision = 1
+    propriedades.created = DATA_FIXA
+    propriedades.modified = DATA_FIXA
+
+    pacote = doc.part.package
+    parte = Part(
+        PackURI('/docProps/custom.xml'),
+        CT_PROPRIEDADES_PERSONALIZADAS,
+        _xml_propriedades_personalizadas(''),
+        pacote,
+    )
+    pacote.relate_to(parte, RT_PROPRIEDADES_PERSONALIZADAS)
+
+
+def _gravar_manifesto(doc, manifesto):
+    """Grava o manifesto na parte docProps/custom.xml do documento"""
+    for parte in doc.part.package.iter_parts():
+        if parte.partname == '/docProps/custom.xml':
+            parte._blob = _xml_propriedades_personalizadas(manifesto)
+            return
+
+
+def ler_manifesto(caminho):
+    """
+    Manifesto de um .docx gerado pela agenda, ou None. Um documento salvo
+    de novo no Word (a data de modificação muda) não conta como gerado.
+    """
+    try:
+        with zipfile.ZipFile(caminho) as pacote:
+            propriedades = etree.fromstring(pacote.read('docProps/custom.xml'))
+            core = etree.fromstring(pacote.read('docProps/core.xml'))
+    except (OSError, KeyError, zipfile.BadZipFile, etree.XMLSyntaxError):
+        return None
+    modificado = core.findtext('{http://purl.org/dc/terms/}modified')
+    if modificado != DATA_FIXA.strftime('%Y-%m-%dT%H:%M:%SZ'):
+        return None
+    for propriedade in propriedades:
+        if propriedade.get('name') == PROPRIEDADE_MANIFESTO and len(propriedade):
+            return propriedade[0].text
+    return None
+
+
+def info_zip(nome, nivel=NIVEL_COMPRESSAO_XML):
+    """
+    ZipInfo de uma parte do .docx com a data fixa (DATA_FIXA) e a
+    compressão de tipo_compressao, para o zipfile (backend de streaming)
+    """
+    info = zipfile.ZipInfo(nome, DATA_FIXA.timetuple()[:6])
+    info.compress_type = tipo_compressao(nome)
+    info._compresslevel = nivel
+    return info
+
+
+def _enxugar_pacote(doc):
+    """
+    Remove do documento base o que a agenda não usa: miniatura, cópia dos
+    estilos para o Word 2010, itens customXml e os ~160 estilos do modelo
+    padrão (ficam só os estilos padrão e os usados). Cada geração carrega
+    e salva bem menos XML.
+    """
+    for rels in (doc.part.package.rels, doc.part.rels):
+        for rId, rel in list(rels.items()):
+            if rel.reltype in _RELACOES_DISPENSAVEIS:
+                rels.pop(rId)
+
+    xml_usado = etree.tostring(doc.element) + b''.join(
+        etree.tostring(section.header._element) for section in doc.sections
+    )
+    usados = set(
+        re.findall(rb'w:(?:pStyle|rStyle|tblStyle) w:val="([^"]+)"', xml_usado)
+    )
+    usados = {u.decode() for u in usados}
+
+    estilos = doc.styles.element
+    por_id = {st.get(qn('w:styleId')): st for st in estilos.findall(qn('w:style'))}
+    pendentes = [i for i, st in por_id.items() if st.get(qn('w:default')) == '1']
+    pendentes += [i for i in usados if i in por_id]
+    manter = set()
+    while pendentes:
+        style_id = pendentes.pop()
+        if style_id in manter or style_id not in por_id:
+            continue
+        manter.add(style_id)
+        for dep in ('w:basedOn', 'w:link', 'w:next'):
+            el = por_id[style_id].find(qn(dep))
+            if el is not None:
+                pendentes.append(el.get(qn('w:val')))
+
+    for style_id, st in por_id.items():
+        if style_id not in manter:
+            estilos.remove(st)
+
+
+# Estilos da agenda, registrados uma vez no styles.xml do esqueleto. Os
+# parágrafos só referenciam o estilo (w:pStyle) em vez de repetir fonte,
+# tamanho e espaçamento em cada run; só o que foge do estilo (outro tamanho,
+# negrito em parte do texto) continua como formatação direta.
+_ESTILOS_AGENDA = [
+    # Título de seção: centralizado, negrito, Arial 14
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaTitulo">'
+    '<w:name w:val="Agenda Título"/><w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:spacing w:before="240" w:after="120"/><w:jc w:val="center"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:b/><w:sz w:val="28"/></w:rPr>'
+    '</w:style>',
+    # Subtítulo: negrito, Arial 12
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaSubtitulo">'
+    '<w:name w:val="Agenda Subtítulo"/><w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:spacing w:before="160" w:after="40"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:b/><w:sz w:val="24"/></w:rPr>'
+    '</w:style>',
+    # Texto corrido justificado (mensagem da presidente)
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaTexto">'
+    '<w:name w:val="Agenda Texto"/><w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:spacing w:before="0" w:after="40"/><w:jc w:val="both"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="24"/></w:rPr>'
+    '</w:style>',
+    # Linha de lista (atividades, observações, lema), espaçamento simples
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaLinha">'
+    '<w:name w:val="Agenda Linha"/><w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:spacing w:before="0" w:after="0" w:line="240" w:lineRule="auto"/>'
+    '</w:pPr><w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="24"/>'
+    '</w:rPr></w:style>',
+    # Linhas de texto ao lado da foto (diretoria, SAFs, missionário)
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaItem">'
+    '<w:name w:val="Agenda Item"/><w:basedOn w:val="Normal"/><w:qFormat/>'
+    '<w:pPr><w:spacing w:before="0" w:after="20"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="24"/></w:rPr>'
+    '</w:style>',
+    # Parágrafo da foto 3x4, centralizado na célula
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaFoto">'
+    '<w:name w:val="Agenda Foto"/><w:basedOn w:val="Normal"/>'
+    '<w:pPr><w:jc w:val="center"/></w:pPr>'
+    '</w:style>',
+    # Linhas para anotações na última página
+    '<w:style {ns} w:type="paragraph" w:customStyle="1" w:styleId="AgendaAnotacao">'
+    '<w:name w:val="Agenda Anotação"/><w:basedOn w:val="Normal"/>'
+    '<w:pPr><w:spacing w:before="0" w:after="60" w:line="240" w:lineRule="auto"/>'
+    '<w:jc w:val="center"/></w:pPr>'
+    '<w:rPr><w:rFonts w:ascii="Arial" w:hAnsi="Arial"/><w:sz w:val="24"/></w:rPr>'
+    '</w:style>',
+    # Destaque em negrito dentro de um parágrafo
+    '<w:style {ns} w:type="character" w:customStyle="1" w:styleId="AgendaNegrito">'
+    '<w:name w:val="Agenda Negrito"/><w:basedOn w:val="DefaultParagraphFont"/>'
+    '<w:qFormat/><w:rPr><w:b/></w:rPr>'
+    '</w:style>',
+    # Tabelas de layout (foto | texto, última página): sem bordas
+    '<w:style {ns} w:type="table" w:customStyle="1" w:styleId="AgendaSemBordas">'
+    '<w:name w:val="Agenda Sem Bordas"/><w:basedOn w:val="TableNormal"/>'
+    '<w:tblPr><w:tblBorders><w:top w:val="nil"/><w:left w:val="nil"/>'
+    '<w:bottom w:val="nil"/><w:right w:val="nil"/><w:insideH w:val="nil"/>'
+    '<w:insideV w:val="nil"/></w:tblBorders></w:tblPr>'
+    '</w:style>',
+]
+
+# Tamanho de fonte (pt) dos estilos de texto; outros tamanhos vão no run
+TAMANHO_ESTILO = 12
+
+
+def _registrar_estilos(doc):
+    """Acrescenta os estilos da agenda ao styles.xml do documento"""
+    estilos = doc.styles.element
+    for xml in _ESTILOS_AGENDA:
+        estilos.append(parse_xml(xml.format(ns=nsdecls('w'))))
+
+
+def _paragrafo(container, estilo, texto=None):
+    """Novo parágrafo com um estilo da agenda (styleId) e o texto, se houver"""
+    p = container.add_paragraph()
+    p._p.style = estilo
+    if texto is not None:
+        p.add_run(texto)
+    return p
+
+
+def _adicionar_texto_run(p, texto, tamanho=TAMANHO_ESTILO, negrito=False):
+    """Run com formatação direta só no que difere do estilo do parágrafo"""
     run = p.add_run(texto)
-    run.bold = True
-    run.font.size = Pt(14)
-    run.font.name = 'Arial'
-    p.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    p.paragraph_format.space_before = Pt(12)
-    p.paragraph_format.space_after = Pt(6)
+    if tamanho != TAMANHO_ESTILO:
+        run.font.size = Pt(tamanho)
+    if negrito:
+        run._r.style = 'AgendaNegrito'
+    return run
+
+
+def _tabela_sem_bordas(doc, cols=2):
+    """Tabela de layout de uma linha com o estilo sem bordas"""
+    table = doc.add_table(rows=1, cols=cols)
+    table.autofit = False
+    table._tbl.tblPr.style = 'AgendaSemBordas'
+    return table
+
+
+# Protótipos XML dos blocos que se repetem a cada registro (linha de texto e
+# tabela foto | texto). Cada um é montado uma vez e copiado com deepcopy,
+# preenchendo só o que muda (texto, rId da foto, id do desenho), em vez de
+# montar tabela, células, propriedades e o desenho pela API do python-docx.
+_prototipos = {}
+
+_XML_ESPACO = '{http://www.w3.org/XML/1998/namespace}space'
+
+
+def _prototipo_paragrafo(estilo, tamanho=TAMANHO_ESTILO, negrito=False):
+    """<w:p> com o estilo e um run vazio (com rStyle/sz se diferirem do estilo)"""
+    chave = ('p', estilo, tamanho, negrito)
+    prototipo = _prototipos.get(chave)
+    if prototipo is None:
+        rPr = ''
+        if negrito:
+            rPr += '<w:rStyle w:val="AgendaNegrito"/>'
+        if tamanho != TAMANHO_ESTILO:
+            rPr += f'<w:sz w:val="{Pt(tamanho).pt * 2:.0f}"/>'
+        if rPr:
+            rPr = f'<w:rPr>{rPr}</w:rPr>'
+        prototipo = parse_xml(
+            f'<w:p {nsdecls("w")}><w:pPr><w:pStyle w:val="{estilo}"/></w:pPr>'
+            f'<w:r>{rPr}<w:t/></w:r></w:p>'
+        )
+        _prototipos[chave] = prototipo
+    return prototipo
+
+
+def _novo_paragrafo(elemento_pai, estilo, texto, tamanho=TAMANHO_ESTILO, negrito=False):
+    """Acrescenta ao corpo/célula um parágrafo copiado do protótipo"""
+    p = copy.deepcopy(_prototipo_paragrafo(estilo, tamanho, negrito))
+    t = p[-1][-1]
+    t.text = texto
+    if texto != texto.strip():
+        t.set(_XML_ESPACO, 'preserve')
+    _anexar_bloco(elemento_pai, p)
     return p
 
 
+def _paragrafo_texto(container, estilo, texto, tamanho=TAMANHO_ESTILO, negrito=False):
+    """
+    Parágrafo com um único run de texto, pelo protótipo. Texto com quebras
+    de linha ou tabulações segue pelo python-docx, que as converte em
+    w:br/w:tab.
+    """
+    bloco = getattr(container, '_body', container)
+    if any(c in texto for c in '\n\r\t'):
+        p = _paragrafo(bloco, estilo)
+        _adicionar_texto_run(p, texto, tamanho, negrito)
+        return p
+    return Paragraph(
+        _novo_paragrafo(bloco._element, estilo, texto, tamanho, negrito), bloco
+    )
+
+
+def _prototipo_item_foto(largura_coluna, largura_foto):
+    """
+    Tabela foto | texto sem bordas (mesma estrutura do add_table do
+    python-docx): foto 3x4 na célula esquerda, célula direita sem parágrafos.
+    """
+    chave = ('item_foto', largura_coluna, largura_foto)
+    prototipo = _prototipos.get(chave)
+    if prototipo is None:
+        coluna = Emu(largura_coluna).twips
+        celula_foto = Inches(largura_foto + 0.1).twips
+        cx = Inches(largura_foto)
+        cy = Inches(largura_foto * (4 / 3))  # Proporção 3x4
+        prototipo = parse_xml(
+            f'<w:tbl {nsdecls("w", "wp", "r")}>'
+            '<w:tblPr><w:tblStyle w:val="AgendaSemBordas"/>'
+            '<w:tblW w:type="auto" w:w="0"/><w:tblLayout w:type="fixed"/>'
+            '<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" '
+            'w:lastRow="0" w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr>'
+            f'<w:tblGrid><w:gridCol w:w="{coluna}"/><w:gridCol w:w="{coluna}"/>'
+            '</w:tblGrid><w:tr>'
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{celula_foto}"/>'
+            '</w:tcPr><w:p><w:pPr><w:pStyle w:val="AgendaFoto"/></w:pPr><w:r>'
+            f'<w:drawing><wp:inline {nsdecls("a", "pic")}>'
+            f'<wp:extent cx="{cx}" cy="{cy}"/>'
+            '<wp:docPr id="0" name=""/><wp:cNvGraphicFramePr>'
+            '<a:graphicFrameLocks noChangeAspect="1"/>'
+            '</wp:cNvGraphicFramePr>'
+            '<a:graphic><a:graphicData '
+            'uri="http://schemas.openxmlformats.org/drawingml/2006/picture">'
+            '<pic:pic><pic:nvPicPr><pic:cNvPr id="0" name=""/><pic:cNvPicPr/>'
+            '</pic:nvPicPr><pic:blipFill><a:blip r:embed=""/><a:stretch>'
+            '<a:fillRect/></a:stretch></pic:blipFill><pic:spPr><a:xfrm>'
+            f'<a:off x="0" y="0"/><a:ext cx="{cx}" cy="{cy}"/></a:xfrm>'
+            '<a:prstGeom prst="rect"/></pic:spPr></pic:pic></a:graphicData>'
+            '</a:graphic></wp:inline></w:drawing></w:r></w:p></w:tc>'
+            f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{Inches(4.0).twips}"/>'
+            '</w:tcPr></w:tc></w:tr></w:tbl>'
+        )
+        _prototipos[chave] = prototipo
+    return prototipo
+
+
+# Esqueletos montados uma vez por processo (chave: com_capa)
+_esqueletos = {}
+_esqueletos_lock = threading.Lock()
+
+
+def pacote_esqueleto(com_capa=False):
+    """Retorna o pacote .docx (bytes) do esqueleto, montando-o na primeira vez"""
+    with _esqueletos_lock:
+        if com_capa not in _esqueletos:
+            _esqueletos[com_capa] = _construir_esqueleto(com_capa)
+        return _esqueletos[com_capa]
+
+
+def novo_documento(com_capa=False):
+    """
+    Retorna um documento novo clonado do esqueleto pré-montado, evitando
+    refazer a configuração de página, colunas e header a cada geração.
+    """
+    return Document(io.BytesIO(pacote_esqueleto(com_capa)))
+
+
+def adicionar_titulo_secao(doc, texto):
+    """Adiciona um título de seção principal (centralizado, negrito, Arial 14)"""
+    return _paragrafo_texto(doc, 'AgendaTitulo', texto)
+
+
 def adicionar_subtitulo(doc, texto):
     """Adiciona um subtítulo (negrito, alinhado à esquerda, Arial 12)"""
-    p = doc.add_paragraph()
-    run = p.add_run(texto)
-    run.bold = True
-    run.font.size = Pt(12)
-    run.font.name = 'Arial'
-    p.paragraph_format.space_before = Pt(8)
-    p.paragraph_format.space_after = Pt(2)
-    return p
+    return _paragrafo_texto(doc, 'AgendaSubtitulo', texto)
 
 
 def adicionar_texto(doc, texto, tamanho=12, negrito=False, italico=False):
-    """Adiciona texto compacto (Arial 12)"""
-    p = doc.add_paragraph()
-    run = p.add_run(texto)
-    run.font.size = Pt(tamanho)
-    run.font.name = 'Arial'
-    run.bold = negrito
-    run.italic = italico
-    p.alignment = WD_ALIGN_PARAGRAPH.JUSTIFY
-    p.paragraph_format.space_before = Pt(0)
-    p.paragraph_format.space_after = Pt(2)
+    """Adiciona texto compacto e justificado (Arial 12)"""
+    p = _paragrafo(doc, 'AgendaTexto')
+    run = _adicionar_texto_run(p, texto, tamanho, negrito)
+    if italico:
+        run.italic = True
     return p
 
 
 def adicionar_linha(doc, texto, tamanho=12):
-    """Adiciona uma linha de texto (Arial 12)"""
-    p = doc.add_paragraph()
-    run = p.add_run(texto)
-    run.font.size = Pt(tamanho)
-    run.font.name = 'Arial'
-    p.paragraph_format.space_before = Pt(0)
-    p.paragraph_format.space_after = Pt(0)
-    p.paragraph_format.line_spacing = 1.0
-    return p
+    """Adiciona uma linha de texto (Arial 12, espaçamento simples)"""
+    return _paragrafo_texto(doc, 'AgendaLinha', texto, tamanho)
 
 
 def adicionar_espaco(doc, pts=6):
     """Adiciona um espaço vertical controlado"""
-    p = doc.add_paragraph()
-    p.paragraph_format.space_before = Pt(0)
-    p.paragraph_format.space_after = Pt(pts)
-    return p
-
-
-def obter_caminho_imagem(caminho_imagem):
-    """Retorna o caminho absoluto da imagem se existir, senão None"""
+    chave = ('espaco', pts)
+    prototipo = _prototipos.get(chave)
+    if prototipo is None:
+        # O mesmo XML do paragraph_format (space_before=0, space_after=pts)
+        prototipo = parse_xml(
+            f'<w:p {nsdecls("w")}><w:pPr><w:spacing w:before="0" '
+            f'w:after="{Pt(pts).twips}"/></w:pPr></w:p>'
+        )
+        _prototipos[chave] = prototipo
+    p = copy.deepcopy(prototipo)
+    _inserir_no_corpo(doc, p)
+    return Paragraph(p, doc._body)
+
+
+def obter_caminho_imagem(caminho_imagem, pasta_base=None):
+    """
+    Retorna o caminho absoluto da imagem se existir, senão None.
+    pasta_base: pasta do arquivo JSON (as fotos ficam em pasta_base/fotos).
+    """
     if not caminho_imagem:
         return None
 
@@ -178,10 +1182,7 @@ def obter_caminho_imagem(caminho_imagem):
             return caminho_imagem
         return None
 
-    try:
-        pasta_atual = os.path.dirname(os.path.abspath(data_file_path))
-    except:
-        pasta_atual = os.path.dirname(os.path.abspath('agenda_data.json'))
+    pasta_atual = pasta_base or os.path.dirname(os.path.abspath('agenda_data.json'))
 
     pasta_fotos = os.path.join(pasta_atual, 'fotos')
 
@@ -198,119 +1199,779 @@ def obter_caminho_imagem(caminho_imagem):
     return None
 
 
-def adicionar_item_com_foto(doc, foto_path, linhas_texto, largura_foto=0.6):
+def _chave_nome_foto(referencia):
+    """Chave de busca de uma foto: sem acentos, sem diferença de maiúsculas"""
+    nome = referencia.replace('\\', '/').strip()
+    nome = unicodedata.normalize('NFKD', nome)
+    nome = ''.join(c for c in nome if not unicodedata.combining(c))
+    partes = [parte for parte in nome.split('/') if parte not in ('', '.')]
+    return '/'.join(partes).casefold()
+
+
+class IndiceFotos:
+    """
+    Índice das fotos disponíveis: a pasta fotos/ (com subpastas) e os
+    arquivos da pasta base são listados uma única vez, na primeira busca,
+    em vez de testar com os.path.exists cada caminho candidato de cada foto
+    (em pastas de rede, cada teste é uma ida e volta ao servidor).
+    A busca ignora maiúsculas/minúsculas e acentos; um nome idêntico ao do
+    JSON tem preferência. Como antes, fotos/ vem antes da pasta base.
+    """
+
+    def __init__(self, pasta_base):
+        self.pasta_base = pasta_base
+        self.pasta_fotos = os.path.join(pasta_base, 'fotos')
+        self._lock = threading.Lock()
+        self._exatos = None
+        self._normalizados = None
+        # caminho -> (tamanho, mtime_ns), lido junto com a listagem
+        self._estatisticas = {}
+
+    def _listar(self, pasta, prefixo, recursivo, achados):
+        """Acrescenta a achados os pares (nome relativo, DirEntry) da pasta"""
+        try:
+            with os.scandir(pasta) as entradas:
+                for entrada in entradas:
+                    nome = prefixo + entrada.name
+                    try:
+                        if entrada.is_file():
+                            achados.append((nome, entrada))
+                        elif recursivo and entrada.is_dir():
+                            self._listar(entrada.path, nome + '/', True, achados)
+                    except OSError:
+                        continue
+        except OSError:
+            pass
+
+    def _indexar(self):
+        fotos = []
+        self._listar(self.pasta_fotos, '', True, fotos)
+        base = []
+        self._listar(self.pasta_base, '', False, base)
+
+        # Mesma prioridade dos caminhos tentados antes: pasta_base/fotos/<ref>
+        # e depois pasta_base/<ref> (que também alcança 'fotos/<nome>')
+        candidatos = fotos + base + [('fotos/' + nome, e) for nome, e in fotos]
+        exatos = {}
+        normalizados = {}
+        for nome, entrada in candidatos:
+            exatos.setdefault(nome, entrada.path)
+            normalizados.setdefault(_chave_nome_foto(nome), entrada.path)
+            if entrada.path not in self._estatisticas:
+                try:
+                    st = entrada.stat()
+                    self._estatisticas[entrada.path] = (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    pass
+        self._exatos = exatos
+        self._normalizados = normalizados
+
+    def localizar(self, referencia):
+        """
+        Retorna o caminho da foto referenciada no JSON, ou None.
+        Referências relativas valem em relação à pasta base (nunca à pasta
+        atual do processo): em fotos/ ou na própria base, só o índice
+        responde; em outra subpasta ou com '..', um único os.stat.
+        """
+        if not referencia:
+            return None
+        with self._lock:
+            if self._exatos is None:
+                self._indexar()
+        if os.path.isabs(referencia):
+            return self._conferir(referencia)
+
+        nome = '/'.join(
+            p for p in referencia.replace('\\', '/').split('/') if p not in ('', '.')
+        )
+        caminho = self._exatos.get(nome) or self._normalizados.get(
+            _chave_nome_foto(referencia)
+        )
+        if caminho or '/' not in nome:
+            return caminho
+
+        caminho = os.path.normpath(os.path.join(self.pasta_base, nome))
+        relativo = os.path.relpath(caminho, self.pasta_base).replace(os.sep, '/')
+        if relativo.startswith('fotos/') or '/' not in relativo:
+            # Cai de volta nas pastas indexadas ('fotos/../x.jpg')
+            return self._exatos.get(relativo) or self._normalizados.get(
+                _chave_nome_foto(relativo)
+            )
+        return self._conferir(caminho)
+
+    def _conferir(self, caminho):
+        """Caminho fora do índice: existe? (guarda tamanho e mtime do stat)"""
+        try:
+            st = os.stat(caminho)
+        except OSError:
+            return None
+        if not stat.S_ISREG(st.st_mode):
+            return None
+        self._estatisticas[caminho] = (st.st_size, st.st_mtime_ns)
+        return caminho
+
+    def estatisticas(self, caminho):
+        """(tamanho, mtime_ns) do arquivo, aproveitando a listagem do índice"""
+        if caminho not in self._estatisticas:
+            st = os.stat(caminho)
+            self._estatisticas[caminho] = (st.st_size, st.st_mtime_ns)
+        return self._estatisticas[caminho]
+
+
+# Sufixo dos relatórios de --profile (ignorados ao listar os JSON do lote)
+SUFIXO_PERFIL = '.perfil.json'
+
+
+class PerfilGeracao:
+    """
+    Perfil de uma geração (opção --profile): para cada fase, o tempo, o pico
+    de memória (tracemalloc) e quantos parágrafos, tabelas e imagens ela
+    acrescentou ao documento; no fim, o tamanho de cada imagem embutida.
+    No Python 3.8 (sem tracemalloc.reset_peak) o pico de cada fase é o maior
+    valor desde o início da geração. Com memoria=False o tracemalloc não é
+    usado (ele deixa tudo mais lento), só tempos e contagens.
+    """
+
+    def __init__(self, destino=None, memoria=True):
+        # Arquivo JSON do relatório (padrão: ao lado do .docx, .perfil.json)
+        self.destino = destino
+        self.memoria = memoria
+        self.fases = []
+        self.imagens = []
+        self.arquivo = None
+        self.bytes_arquivo = None
+        self._inicio = None
+        self._fim = None
+
+    @staticmethod
+    def _contar(doc):
+        """(parágrafos, tabelas, imagens) no corpo do documento"""
+        body = doc.element.body
+        return (
+            sum(1 for _ in body.iter(qn('w:p'))),
+            sum(1 for _ in body.iter(qn('w:tbl'))),
+            sum(1 for _ in body.iter(qn('a:blip'))),
+        )
+
+    @contextlib.contextmanager
+    def fase(self, nome, doc=None):
+        """Mede o bloco como uma fase; o dicionário retornado aceita anotações"""
+        if self.memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        antes = self._contar(doc) if doc is not None else None
+        if self.memoria:
+            if hasattr(tracemalloc, 'reset_peak'):
+                tracemalloc.reset_peak()
+            memoria_inicial = tracemalloc.get_traced_memory()[0]
+        registro = {'fase': nome}
+        inicio = time.perf_counter()
+        if self._inicio is None:
+            self._inicio = inicio
+        try:
+            yield registro
+        finally:
+            self._fim = time.perf_counter()
+            registro['tempo_ms'] = round((self._fim - inicio) * 1000, 3)
+            if self.memoria:
+                pico = tracemalloc.get_traced_memory()[1]
+                registro['pico_memoria_kb'] = round(
+                    max(0, pico - memoria_inicial) / 1024, 1
+                )
+            if antes is not None:
+                depois = self._contar(doc)
+                registro['paragrafos'] = depois[0] - antes[0]
+                registro['tabelas'] = depois[1] - antes[1]
+                registro['imagens'] = depois[2] - antes[2]
+            self.fases.append(registro)
+
+    def registrar_saida(self, caminho, origens=None):
+        """
+        Registra o tamanho do .docx e de cada imagem em word/media.
+        origens: sha1 do conteúdo -> foto original, para identificar as imagens
+        """
+        origens = origens or {}
+        self.arquivo = caminho
+        self.bytes_arquivo = os.path.getsize(caminho)
+        with zipfile.ZipFile(caminho) as pacote:
+            for info in pacote.infolist():
+                if not info.filename.startswith('word/media/'):
+                    continue
+                sha1 = hashlib.sha1(pacote.read(info)).hexdigest()
+                self.imagens.append(
+                    {
+                        'parte': info.filename,
+                        'bytes': info.file_size,
+                        'bytes_compactados': info.compress_size,
+                        'origem': origens.get(sha1),
+                    }
+                )
+        if self.memoria and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def relatorio(self):
+        """Dicionário com todas as medições (o conteúdo do JSON)"""
+        total = (self._fim - self._inicio) * 1000 if self._inicio is not None else 0
+        return {
+            'arquivo': self.arquivo,
+            'bytes_arquivo': self.bytes_arquivo,
+            'tempo_total_ms': round(total, 3),
+            'fases': self.fases,
+            'imagens': self.imagens,
+        }
+
+    def tabela(self):
+        """Relatório em texto, uma linha por fase e por imagem"""
+        linhas = [
+            f"{'Fase':<28}{'Tempo (ms)':>12}{'Memória (KB)':>14}"
+            f"{'Parágr.':>9}{'Tabelas':>9}{'Imagens':>9}",
+            '-' * 81,
+        ]
+        for registro in self.fases:
+            nome = registro['fase'] + (' (cache)' if registro.get('cache') else '')
+            contagens = ''.join(
+                f"{registro[campo]:>9}" if campo in registro else f"{'-':>9}"
+                for campo in ('paragrafos', 'tabelas', 'imagens')
+            )
+            memoria = registro.get('pico_memoria_kb')
+            memoria = f"{memoria:>14.1f}" if memoria is not None else f"{'-':>14}"
+            linhas.append(
+                f"{nome:<28}{registro['tempo_ms']:>12.1f}{memoria}{contagens}"
+            )
+        relatorio = self.relatorio()
+        linhas.append('-' * 81)
+        linhas.append(f"{'Total':<28}{relatorio['tempo_total_ms']:>12.1f}")
+
+        if self.imagens:
+            total_imagens = sum(imagem['bytes'] for imagem in self.imagens)
+            linhas.append('')
+            linhas.append(
+                f"Imagens embutidas: {len(self.imagens)} ({total_imagens / 1024:.1f} KB)"
+            )
+            for imagem in sorted(self.imagens, key=lambda i: -i['bytes']):
+                origem = os.path.basename(imagem['origem'] or '') or '?'
+                linhas.append(
+                    f"  {imagem['parte']:<32}{imagem['bytes'] / 1024:>10.1f} KB  {origem}"
+                )
+        if self.bytes_arquivo is not None:
+            linhas.append(f"Arquivo: {self.bytes_arquivo / 1024:.1f} KB")
+        return '\n'.join(linhas)
+
+    def salvar(self):
+        """Grava o relatório em JSON e mostra a tabela; retorna o caminho do JSON"""
+        destino = self.destino
+        if not destino:
+            destino = os.path.splitext(self.arquivo)[0] + SUFIXO_PERFIL
+        with open(destino, 'w', encoding='utf-8') as f:
+            json.dump(self.relatorio(), f, ensure_ascii=False, indent=2)
+        print(self.tabela())
+        print(f"[OK] Perfil gravado em: {destino}")
+        return destino
+
+
+class GeracaoCancelada(Exception):
+    """A geração foi interrompida por um pedido de cancelamento"""
+
+
+class ContextoGeracao:
+    """
+    Estado de uma geração de agenda: pasta base das fotos, índice das fotos
+    disponíveis, caches e opções. Cada geração usa o seu próprio contexto,
+    então várias agendas podem ser geradas ao mesmo tempo no mesmo processo
+    (threads, servidor ou interface gráfica) sem interferência.
+    """
+
+    def __init__(
+        self,
+        pasta_base=None,
+        cache=None,
+        dpi=DPI_IMAGENS,
+        cache_secoes=True,
+        nivel_compressao=NIVEL_COMPRESSAO_XML,
+        cancelamento=None,
+        tempo_limite=None,
+        reaproveitar_saida=True,
+        recorte='centro',
+    ):
+        if recorte not in MODOS_RECORTE:
+            raise ValueError(f"Modo de recorte desconhecido: {recorte}")
+        self.pasta_base = os.path.abspath(pasta_base or os.getcwd())
+        self.cache_imagens = cache if cache is not None else cache_imagens
+        self.dpi = dpi
+        # Recorte 3x4 das fotos sem recorte salvo no JSON (MODOS_RECORTE)
+        self.recorte = recorte
+        # Nível de deflate das partes XML do .docx (veja salvar_documento)
+        self.nivel_compressao = nivel_compressao
+        # True: cache padrão; None/False: renderizar todas as seções sempre
+        if cache_secoes is True:
+            cache_secoes = CacheSecoes()
+        self.cache_secoes = cache_secoes or None
+        self.fotos = IndiceFotos(self.pasta_base)
+        # (caminho, largura, altura, recorte) -> bytes da imagem pronta
+        self.imagens = {}
+        # Chamado ao fim de cada registro (membro, SAF, atividade...); o
+        # backend de streaming usa para gravar o que já foi renderizado
+        self.ao_fim_de_bloco = None
+        # PerfilGeracao quando a geração é perfilada (--profile)
+        self.perfil = None
+        # Funções chamadas com cada evento da geração (veja emitir)
+        self.ouvintes = []
+        # threading.Event que interrompe a geração quando marcado
+        self.cancelamento = cancelamento or threading.Event()
+        # Segundos que a geração pode levar antes de ser interrompida
+        self.tempo_limite = tempo_limite
+        self._prazo = time.monotonic() + tempo_limite if tempo_limite else None
+        self._etapa = None
+        self._ids_desenho = itertools.count(1)
+        # Não gerar de novo um .docx cujo manifesto já bate com os dados
+        # (veja gerar_agenda); saida_reaproveitada diz se isso aconteceu
+        self.reaproveitar_saida = reaproveitar_saida
+        self.saida_reaproveitada = False
+
+    @classmethod
+    def para_arquivo(cls, data_file, **opcoes):
+        """Cria o contexto para um arquivo JSON (fotos relativas à sua pasta)"""
+        return cls(os.path.dirname(os.path.abspath(data_file)), **opcoes)
+
+    @classmethod
+    def em_memoria(cls, pasta_base=None, **opcoes):
+        """
+        Contexto que não grava nada em disco: imagens reduzidas na memória e
+        sem cache de seções. As fotos continuam sendo lidas de pasta_base.
+        """
+        opcoes.setdefault('cache', CacheImagensMemoria())
+        opcoes.setdefault('cache_secoes', False)
+        return cls(pasta_base, **opcoes)
+
+    def resolver_imagem(self, caminho_imagem):
+        """Retorna o caminho da imagem (ou None) pelo índice de fotos"""
+        return self.fotos.localizar(caminho_imagem)
+
+    def fotos_ausentes(self, dados):
+        """Referências de fotos do JSON que não foram encontradas (sem repetição)"""
+        ausentes = []
+        for referencia in _referencias_fotos(dados):
+            if referencia not in ausentes and not self.resolver_imagem(referencia):
+                ausentes.append(referencia)
+        return ausentes
+
+    def preparar_imagem(self, caminho, largura_in, altura_in=None, recorte=None):
+        """
+        Imagem reduzida (e recortada) para o tamanho de impressão (veja
+        CacheImagens): os bytes já carregados por verificar_imagens, ou o
+        caminho do arquivo. recorte: o salvo no JSON junto da foto.
+        """
+        recorte = _normalizar_recorte(recorte)
+        conteudo = self.imagens.get((caminho, largura_in, altura_in, recorte))
+        if conteudo is not None:
+            return io.BytesIO(conteudo)
+        return self.cache_imagens.preparar(
+            caminho, largura_in, altura_in, self.dpi, recorte, self.recorte
+        )
+
+    def verificar_imagens(self, dados, carregar=True, jobs=None):
+        """
+        Verificação prévia de todas as imagens da agenda, antes de montar o
+        documento. Em paralelo, cada foto é lida, decodificada e reduzida
+        para o tamanho de impressão; com carregar=True os bytes prontos ficam
+        guardados para a montagem não voltar ao disco.
+        Levanta ValueError listando as imagens que não podem ser usadas, para
+        o erro aparecer antes de qualquer trabalho ser feito.
+        """
+        usos = {}
+        for referencia, largura, altura, recorte in _usos_imagens(dados):
+            caminho = self.resolver_imagem(referencia)
+            if caminho:
+                usos.setdefault(caminho, (referencia, []))[1].append(
+                    (largura, altura, recorte)
+                )
+        if carregar:
+            # Fotos já carregadas (herdar_imagens) não precisam ser relidas
+            for caminho, (_, tamanhos) in list(usos.items()):
+                tamanhos_doc = [t for t in tamanhos if t[0] is not None]
+                if tamanhos_doc and all(
+                    (caminho, *t) in self.imagens for t in tamanhos_doc
+                ):
+                    del usos[caminho]
+        if not usos:
+            return
+
+        def processar(caminho, tamanhos):
+            if self.cancelamento.is_set():
+                return {}
+            original = _verificar_imagem(caminho)
+            prontas = {}
+            for largura, altura, recorte in tamanhos:
+                if largura is None:
+                    continue
+                pronta = self.cache_imagens.preparar(
+                    caminho, largura, altura, self.dpi, recorte, self.recorte
+                )
+                if not carregar:
+                    continue
+                chave = (caminho, largura, altura, recorte)
+                if pronta == caminho:
+                    prontas[chave] = original
+                elif hasattr(pronta, 'read'):
+                    prontas[chave] = pronta.read()
+                else:
+                    with open(pronta, 'rb') as f:
+                        prontas[chave] = f.read()
+            return prontas
+
+        erros = []
+        with ThreadPoolExecutor(max_workers=jobs or min(8, len(usos))) as pool:
+            futuros = {
+                pool.submit(processar, caminho, tamanhos): (referencia, tamanhos)
+                for caminho, (referencia, tamanhos) in usos.items()
+            }
+            for futuro in as_completed(futuros):
+                referencia, tamanhos = futuros[futuro]
+                try:
+                    self.imagens.update(futuro.result())
+                except Exception as e:
+                    motivo = str(e) or type(e).__name__
+                    if all(t[0] is None for t in tamanhos):
+                        # Foto que não vai para o documento: só avisar
+                        self.avisar(f"Imagem inválida '{referencia}': {motivo}")
+                    else:
+                        erros.append(f"{referencia}: {motivo}")
+
+        if erros:
+            raise ValueError(
+                "Imagens inválidas:\n"
+                + "\n".join(f"  - {erro}" for erro in sorted(erros))
+            )
+
+    def herdar_imagens(self, anterior):
+        """
+        Reaproveita as imagens já carregadas por uma geração anterior (modo
+        --watch) cujas fotos não mudaram desde então (tamanho e data de
+        modificação lidos naquela geração)
+        """
+        estatisticas = anterior.fotos._estatisticas
+        for chave, conteudo in anterior.imagens.items():
+            caminho = chave[0]
+            try:
+                if (
+                    caminho in estatisticas
+                    and self.fotos.estatisticas(caminho) == estatisticas[caminho]
+                ):
+                    self.imagens[chave] = conteudo
+            except OSError:
+                continue
+
+    def cancelar(self):
+        """Pede o cancelamento da geração (pode ser chamado de outra thread)"""
+        self.cancelamento.set()
+
+    def verificar_cancelamento(self):
+        """
+        Levanta GeracaoCancelada se o cancelamento foi pedido ou se o tempo
+        limite passou. Chamado no início de cada etapa e após cada registro.
+        """
+        if self.cancelamento.is_set():
+            raise GeracaoCancelada("Geração cancelada")
+        if self._prazo is not None and time.monotonic() > self._prazo:
+            raise GeracaoCancelada(
+                f"Geração interrompida: tempo limite de {self.tempo_limite}s excedido"
+            )
+
+    def emitir(self, tipo, **dados):
+        """
+        Envia um evento aos ouvintes, como um dict com 'tipo' e os dados:
+          etapa_iniciada   etapa, indice, total (etapas em ETAPAS)
+          etapa_concluida  etapa, indice, total, tempo (s), cache (seções)
+          item             etapa, indice, total (registros da seção)
+          imagem           origem (foto ou arquivo do cache), bytes
+          aviso            mensagem
+        Os ouvintes rodam na thread da geração.
+        """
+        if self.ouvintes:
+            evento = dict(dados, tipo=tipo)
+            for ouvinte in self.ouvintes:
+                ouvinte(evento)
+
+    def avisar(self, mensagem):
+        """Mostra um aviso no console e o envia aos ouvintes"""
+        print(f"[AVISO] {mensagem}")
+        self.emitir('aviso', mensagem=mensagem)
+
+    def imagem_embutida(self, doc, rId, origem):
+        """Avisa os ouvintes que a imagem rId (vinda de origem) entrou no documento"""
+        if self.ouvintes:
+            self.emitir(
+                'imagem', origem=origem, bytes=len(doc.part.related_parts[rId].blob)
+            )
+
+    @contextlib.contextmanager
+    def fase(self, nome, doc=None):
+        """
+        Uma etapa da geração: confere o cancelamento, emite etapa_iniciada e
+        etapa_concluida e mede o bloco com o perfil (veja PerfilGeracao), se
+        houver. O dicionário retornado aceita anotações.
+        """
+        self.verificar_cancelamento()
+        indice = ETAPAS.index(nome) if nome in ETAPAS else None
+        self.emitir('etapa_iniciada', etapa=nome, indice=indice, total=len(ETAPAS))
+        self._etapa = nome
+        inicio = time.perf_counter()
+        medicao = (
+            contextlib.nullcontext({})
+            if self.perfil is None
+            else self.perfil.fase(nome, doc)
+        )
+        with medicao as registro:
+            yield registro
+        self.emitir(
+            'etapa_concluida',
+            etapa=nome,
+            indice=indice,
+            total=len(ETAPAS),
+            tempo=time.perf_counter() - inicio,
+            cache=registro.get('cache'),
+        )
+
+    def novo_id_desenho(self):
+        """
+        Id provisório de um desenho (wp:docPr), sem varrer o documento todo
+        como o next_id do python-docx (custo quadrático em agendas grandes).
+        Os ids finais são atribuídos por renumerar_desenhos ou pelo backend
+        de streaming.
+        """
+        return next(self._ids_desenho)
+
+    def fim_de_bloco(self, doc, indice=None, total=None):
+        """
+        Marca o fim de um registro renderizado no documento (o indice-ésimo,
+        contando de 1, de total registros da seção)
+        """
+        self.verificar_cancelamento()
+        if indice is not None:
+            self.emitir('item', etapa=self._etapa, indice=indice, total=total)
+        if self.ao_fim_de_bloco is not None:
+            self.ao_fim_de_bloco(doc)
+
+    def chave_secao(self, nome, entrada):
+        """
+        Chave do fragmento de uma seção: o nome da seção e o hash dos dados
+        dela, das fotos referenciadas (caminho, tamanho e data de
+        modificação), das opções e do código do gerador.
+        """
+        fotos = []
+        for referencia in _referencias_fotos(entrada):
+            caminho = self.resolver_imagem(referencia)
+            if caminho:
+                fotos.append([referencia, caminho, *self.fotos.estatisticas(caminho)])
+            else:
+                fotos.append([referencia, None])
+
+        conteudo = json.dumps(
+            [
+                ASSINATURA_GERADOR,
+                nome,
+                entrada,
+                fotos,
+                self.dpi,
+                self.cache_imagens.qualidade,
+                self.recorte,
+            ],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return f"{nome}-{hashlib.sha256(conteudo.encode('utf-8')).hexdigest()}"
+
+    def manifesto(self, dados, backend='docx'):
+        """
+        Hash de tudo o que determina os bytes do documento: dados, fotos
+        referenciadas (caminho, tamanho e data de modificação), opções e
+        código do gerador. Vai nas propriedades do .docx gerado.
+        """
+        fotos = []
+        for referencia in _referencias_fotos(dados):
+            caminho = self.resolver_imagem(referencia)
+            if caminho:
+                fotos.append([referencia, caminho, *self.fotos.estatisticas(caminho)])
+            else:
+                fotos.append([referencia, None])
+
+        conteudo = json.dumps(
+            [
+                ASSINATURA_GERADOR,
+                dados,
+                fotos,
+                backend,
+                self.dpi,
+                self.cache_imagens.qualidade,
+                self.recorte,
+                self.nivel_compressao,
+                DATA_FIXA.isoformat(),
+            ],
+            sort_keys=True,
+            ensure_ascii=False,
+        )
+        return hashlib.sha256(conteudo.encode('utf-8')).hexdigest()
+
+
+def _referencias_fotos(valor):
+    """Lista as referências de fotos ('foto', 'capa', 'calendario') em um trecho do JSON"""
+    referencias = []
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            if chave in ('foto', 'capa', 'calendario') and isinstance(item, str):
+                if item:
+                    referencias.append(item)
+            else:
+                referencias.extend(_referencias_fotos(item))
+    elif isinstance(valor, list):
+        for item in valor:
+            referencias.extend(_referencias_fotos(item))
+    return referencias
+
+
+def _usos_imagens(dados):
+    """
+    Lista (referência, largura_in, altura_in, recorte) de cada imagem da
+    agenda, com os mesmos tamanhos e recortes usados pelas seções. Largura
+    None: a foto está no JSON mas não vai para o documento (foto da
+    presidente).
+    """
+    usos = []
+    if isinstance(dados.get('presidente'), dict) and dados['presidente'].get('foto'):
+        usos.append((dados['presidente']['foto'], None, None, None))
+    for membro in dados.get('diretoria') or []:
+        if membro.get('nome') and membro.get('foto'):
+            largura = LARGURA_FOTO_DIRETORIA
+            usos.append(
+                (
+                    membro['foto'],
+                    largura,
+                    largura * (4 / 3),
+                    _normalizar_recorte(membro.get('recorte')),
+                )
+            )
+    for saf in dados.get('safs') or []:
+        if saf.get('foto'):
+            largura = LARGURA_FOTO_SAF
+            usos.append(
+                (
+                    saf['foto'],
+                    largura,
+                    largura * (4 / 3),
+                    _normalizar_recorte(saf.get('recorte')),
+                )
+            )
+    miss = (dados.get('informacoes_gerais') or {}).get('missionario_oracao') or {}
+    if miss.get('foto'):
+        largura = LARGURA_FOTO_MISSIONARIO
+        usos.append(
+            (
+                miss['foto'],
+                largura,
+                largura * (4 / 3),
+                _normalizar_recorte(miss.get('recorte')),
+            )
+        )
+    for chave in ('capa', 'calendario'):
+        if dados.get(chave):
+            usos.append((dados[chave], LARGURA_MEIA_PAGINA, None, None))
+    return usos
+
+
+def _verificar_imagem(caminho):
+    """
+    Lê a imagem e confere se ela pode ser embutida no Word e decodificada.
+    Retorna o conteúdo do arquivo; levanta exceção se a imagem for inválida.
+    """
+    with open(caminho, 'rb') as f:
+        conteudo = f.read()
+    # Mesmo leitor de cabeçalho usado pelo add_picture do python-docx
+    ImagemDocx.from_blob(conteudo)
+    if PIL_AVAILABLE:
+        with Image.open(io.BytesIO(conteudo)) as img:
+            # Decodificar tudo (em escala reduzida no JPEG) para pegar
+            # arquivos truncados ou corrompidos
+            img.draft('RGB', (256, 256))
+            img.load()
+    return conteudo
+
+
+def adicionar_item_com_foto(
+    doc, foto_path, linhas_texto, largura_foto=0.6, *, ctx, recorte=None
+):
     """
     Adiciona um item com foto à esquerda e texto à direita.
     linhas_texto: lista de tuplas (texto, tamanho, negrito)
+    ctx: ContextoGeracao da geração (índice de fotos, caches)
+    recorte: recorte 3x4 salvo no JSON para a foto (veja retangulo_recorte)
     """
-    caminho_foto = obter_caminho_imagem(foto_path) if foto_path else None
+    caminho_foto = ctx.resolver_imagem(foto_path)
 
-    if caminho_foto:
-        # Criar tabela de 2 colunas (foto | texto)
-        table = doc.add_table(rows=1, cols=2)
-        table.autofit = False
-
-        # Remover bordas da tabela
-        tbl = table._tbl
-        tblPr = tbl.tblPr if tbl.tblPr is not None else OxmlElement('w:tblPr')
-        tblBorders = OxmlElement('w:tblBorders')
-        for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-            border = OxmlElement(f'w:{border_name}')
-            border.set(qn('w:val'), 'nil')
-            tblBorders.append(border)
-        tblPr.append(tblBorders)
-        if tbl.tblPr is None:
-            tbl.insert(0, tblPr)
-
-        # Configurar larguras das colunas
-        cell_foto = table.rows[0].cells[0]
-        cell_texto = table.rows[0].cells[1]
-
-        cell_foto.width = Inches(largura_foto + 0.1)
-        cell_texto.width = Inches(4.0)
-
-        # Adicionar foto na célula esquerda
-        p_foto = cell_foto.paragraphs[0]
-        p_foto.alignment = WD_ALIGN_PARAGRAPH.CENTER
-        run = p_foto.add_run()
-
-        largura = Inches(largura_foto)
-        altura = Inches(largura_foto * (4 / 3))  # Proporção 3x4
-        run.add_picture(caminho_foto, width=largura, height=altura)
-
-        # Adicionar texto na célula direita
-        first_line = True
-        for linha_info in linhas_texto:
-            if isinstance(linha_info, tuple):
-                texto, tamanho, negrito = linha_info
-            else:
-                texto, tamanho, negrito = linha_info, 12, False
+    linhas = []
+    for linha_info in linhas_texto:
+        if isinstance(linha_info, tuple):
+            linhas.append(linha_info)
+        else:
+            linhas.append((linha_info, 12, False))
 
-            if first_line:
-                p = cell_texto.paragraphs[0]
-                first_line = False
+    if caminho_foto:
+        # Tabela de 2 colunas (foto | texto), sem bordas, copiada do protótipo
+        bloco = doc._body
+        tbl = copy.deepcopy(_prototipo_item_foto(LARGURA_BLOCO // 2, largura_foto))
+        tc_foto, tc_texto = tbl[-1]
+
+        # Foto na célula esquerda: só o rId, o nome e o id do desenho mudam
+        rId, imagem = doc.part.get_or_add_image(
+            ctx.preparar_imagem(
+                caminho_foto, largura_foto, largura_foto * (4 / 3), recorte
+            )
+        )
+        ctx.imagem_embutida(doc, rId, caminho_foto)
+        inline = tc_foto.find(qn('w:p') + '/' + qn('w:r') + '/' + qn('w:drawing'))[0]
+        id_desenho = ctx.novo_id_desenho()
+        docPr = inline.find(qn('wp:docPr'))
+        docPr.set('id', str(id_desenho))
+        docPr.set('name', f"Picture {id_desenho}")
+        inline.find('.//' + qn('pic:cNvPr')).set('name', imagem.filename)
+        inline.find('.//' + qn('a:blip')).set(qn('r:embed'), rId)
+
+        # Texto na célula direita
+        for texto, tamanho, negrito in linhas:
+            if any(c in texto for c in '\n\r\t'):
+                p = Paragraph(tc_texto._add_p(), bloco)
+                p._p.style = 'AgendaItem'
+                _adicionar_texto_run(p, texto, tamanho, negrito)
             else:
-                p = cell_texto.add_paragraph()
+                _novo_paragrafo(tc_texto, 'AgendaItem', texto, tamanho, negrito)
+        if not linhas:
+            tc_texto._add_p()
 
-            run = p.add_run(texto)
-            run.font.size = Pt(tamanho)
-            run.font.name = 'Arial'
-            run.bold = negrito
-            p.paragraph_format.space_before = Pt(0)
-            p.paragraph_format.space_after = Pt(1)
-
-        return table
+        _inserir_no_corpo(doc, tbl)
+        return Table(tbl, bloco)
     else:
         # Sem foto - apenas texto normal
-        for linha_info in linhas_texto:
-            if isinstance(linha_info, tuple):
-                texto, tamanho, negrito = linha_info
-            else:
-                texto, tamanho, negrito = linha_info, 12, False
-
-            p = doc.add_paragraph()
-            run = p.add_run(texto)
-            run.font.size = Pt(tamanho)
-            run.font.name = 'Arial'
-            run.bold = negrito
-            p.paragraph_format.space_before = Pt(0)
-            p.paragraph_format.space_after = Pt(1)
+        for texto, tamanho, negrito in linhas:
+            _paragrafo_texto(doc, 'AgendaItem', texto, tamanho, negrito)
 
         return None
 
 
-def adicionar_imagem(doc, caminho_imagem, largura_base=None):
+def _rid_imagem(forma):
+    """rId da imagem de um InlineShape criado pelo add_picture"""
+    return forma._inline.graphic.graphicData.pic.blipFill.blip.embed
+
+
+def adicionar_imagem(doc, caminho_imagem, largura_base=None, *, ctx, recorte=None):
     """
-    Adiciona uma imagem ao documento Word no formato 3x4.
+    Adiciona uma imagem ao documento Word no formato 3x4 (recortada, não
+    esticada; recorte: o salvo no JSON para a foto).
+    ctx: ContextoGeracao da geração (índice de fotos, caches)
     """
     if not caminho_imagem:
         return False
 
     try:
-        caminho_final = None
-
-        if os.path.isabs(caminho_imagem):
-            caminho_final = caminho_imagem
-        else:
-            try:
-                pasta_atual = os.path.dirname(os.path.abspath(data_file_path))
-            except:
-                pasta_atual = os.path.dirname(os.path.abspath('agenda_data.json'))
-
-            pasta_fotos = os.path.join(pasta_atual, 'fotos')
-
-            caminhos_tentar = [
-                os.path.join(pasta_fotos, caminho_imagem),
-                os.path.join(pasta_atual, caminho_imagem),
-                caminho_imagem,
-            ]
-
-            for caminho in caminhos_tentar:
-                if os.path.exists(caminho):
-                    caminho_final = caminho
-                    break
-
-        if not caminho_final or not os.path.exists(caminho_final):
+        caminho_final = ctx.resolver_imagem(caminho_imagem)
+        if not caminho_final:
             return False
 
         p = doc.add_paragraph()
@@ -325,22 +1986,27 @@ def adicionar_imagem(doc, caminho_imagem, largura_base=None):
         largura = largura_base
         altura = Inches(largura_base.inches * (4 / 3))
 
-        run = p.add_run()
-        run.add_picture(caminho_final, width=largura, height=altura)
+        forma = p.add_run().add_picture(
+            ctx.preparar_imagem(caminho_final, largura.inches, altura.inches, recorte),
+            width=largura,
+            height=altura,
+        )
+        ctx.imagem_embutida(doc, _rid_imagem(forma), caminho_final)
         return True
     except Exception as e:
         return False
 
 
-def adicionar_capa(doc, caminho_capa):
+def adicionar_capa(doc, caminho_capa, ctx):
     """
     Adiciona a capa na primeira página (meia folha, uma coluna, sem linha vertical).
+    ctx: ContextoGeracao da geração (índice de fotos, caches)
     """
     if not caminho_capa:
         return False
 
-    caminho_final = obter_caminho_imagem(caminho_capa)
-    if not caminho_final or not os.path.exists(caminho_final):
+    caminho_final = ctx.resolver_imagem(caminho_capa)
+    if not caminho_final:
         return False
 
     # Configurar primeira seção para 1 coluna (meia folha) sem linha divisória
@@ -351,31 +2017,35 @@ def adicionar_capa(doc, caminho_capa):
     # NÃO adicionar linha vertical no header (essa página não deve ter)
 
     # Adicionar imagem da capa alinhada à esquerda (mesmo tamanho do calendário)
-    p = doc.add_paragraph()
+    # No esqueleto com capa, o primeiro parágrafo é a quebra de seção da capa
+    if doc.paragraphs:
+        p = doc.paragraphs[0].insert_paragraph_before()
+    else:
+        p = doc.add_paragraph()
     p.alignment = WD_ALIGN_PARAGRAPH.LEFT
 
-    # Calcular tamanho IDÊNTICO ao calendário
-    # Mesmas dimensões usadas no calendário na última página
-    largura_total = Inches(11.69 - 0.8)  # Largura útil da página
-    largura_capa = Inches((largura_total.inches / 2) - 0.3)  # Igual ao calendário
+    # Mesma largura do calendário da última página (mantém proporção)
+    largura_capa = Inches(LARGURA_MEIA_PAGINA)
 
-    run = p.add_run()
-    try:
-        # Usar exatamente a mesma largura do calendário (mantém proporção)
-        run.add_picture(caminho_final, width=largura_capa)
-    except:
-        # Se falhar, tentar novamente
-        run.add_picture(caminho_final, width=largura_capa)
+    forma = p.add_run().add_picture(
+        ctx.preparar_imagem(caminho_final, LARGURA_MEIA_PAGINA), width=largura_capa
+    )
+    ctx.imagem_embutida(doc, _rid_imagem(forma), caminho_final)
 
     return True
 
 
-def adicionar_ultima_pagina(doc, caminho_calendario):
+def adicionar_ultima_pagina(doc, caminho_calendario, ctx):
     """
     Adiciona a última página com calendário à esquerda e anotações gerais à direita.
     Sem linha vertical.
     """
-    # Criar nova seção para a última página
+    iniciar_secao_ultima_pagina(doc)
+    adicionar_conteudo_ultima_pagina(doc, caminho_calendario, ctx)
+
+
+def iniciar_secao_ultima_pagina(doc):
+    """Cria a seção (nova página) da última página"""
     section = doc.add_section(WD_SECTION.NEW_PAGE)
 
     # Configurar margens
@@ -386,22 +2056,13 @@ def adicionar_ultima_pagina(doc, caminho_calendario):
 
     # NÃO configurar colunas (vamos usar tabela para layout lado a lado)
     # NÃO adicionar linha vertical no header (essa página não deve ter)
+    return section
 
-    # Criar tabela de 2 colunas: calendário à esquerda, anotações à direita
-    table = doc.add_table(rows=1, cols=2)
-    table.autofit = False
 
-    # Remover bordas da tabela
-    tbl = table._tbl
-    tblPr = tbl.tblPr if tbl.tblPr is not None else OxmlElement('w:tblPr')
-    tblBorders = OxmlElement('w:tblBorders')
-    for border_name in ['top', 'left', 'bottom', 'right', 'insideH', 'insideV']:
-        border = OxmlElement(f'w:{border_name}')
-        border.set(qn('w:val'), 'nil')
-        tblBorders.append(border)
-    tblPr.append(tblBorders)
-    if tbl.tblPr is None:
-        tbl.insert(0, tblPr)
+def adicionar_conteudo_ultima_pagina(doc, caminho_calendario, ctx):
+    """Tabela da última página: calendário à esquerda, anotações à direita"""
+    # Criar tabela de 2 colunas sem bordas: calendário à esquerda, anotações à direita
+    table = _tabela_sem_bordas(doc)
 
     # Configurar larguras das colunas (50% cada)
     cell_calendario = table.rows[0].cells[0]
@@ -413,25 +2074,22 @@ def adicionar_ultima_pagina(doc, caminho_calendario):
 
     # === COLUNA ESQUERDA: CALENDÁRIO ===
     if caminho_calendario:
-        caminho_final = obter_caminho_imagem(caminho_calendario)
-        if caminho_final and os.path.exists(caminho_final):
+        caminho_final = ctx.resolver_imagem(caminho_calendario)
+        if caminho_final:
             p_calendario = cell_calendario.paragraphs[0]
             p_calendario.alignment = WD_ALIGN_PARAGRAPH.LEFT
             p_calendario.paragraph_format.space_before = Pt(0)
             p_calendario.paragraph_format.space_after = Pt(0)
 
-            # Calcular tamanho para a célula esquerda (meia página)
-            # Largura da célula menos margem
-            largura_calendario = Inches((largura_total.inches / 2) - 0.3)
-            # Altura proporcional (não ocupar toda a página para não empurrar anotações)
-            altura_calendario = Inches(7.0)
+            # Largura da célula (meia página) menos margem; a altura segue
+            # a proporção da imagem
+            largura_calendario = Inches(LARGURA_MEIA_PAGINA)
 
-            run = p_calendario.add_run()
-            try:
-                # Usar largura para manter proporção correta
-                run.add_picture(caminho_final, width=largura_calendario)
-            except:
-                run.add_picture(caminho_final, width=largura_calendario)
+            forma = p_calendario.add_run().add_picture(
+                ctx.preparar_imagem(caminho_final, LARGURA_MEIA_PAGINA),
+                width=largura_calendario,
+            )
+            ctx.imagem_embutida(doc, _rid_imagem(forma), caminho_final)
     else:
         # Se não houver calendário, deixar célula esquerda vazia
         p_vazio = cell_calendario.paragraphs[0]
@@ -447,12 +2105,9 @@ def adicionar_ultima_pagina(doc, caminho_calendario):
     p_titulo = cell_anotacoes.paragraphs[0]
     p_titulo.clear()
 
-    # Adicionar título "Anotações gerais" (centralizado)
-    run_titulo = p_titulo.add_run("Anotações gerais")
-    run_titulo.bold = True
-    run_titulo.font.size = Pt(14)
-    run_titulo.font.name = 'Arial'
-    p_titulo.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    # Adicionar título "Anotações gerais" (estilo de título, mais espaço abaixo)
+    p_titulo._p.style = 'AgendaTitulo'
+    p_titulo.add_run("Anotações gerais")
     p_titulo.paragraph_format.space_before = Pt(0)
     p_titulo.paragraph_format.space_after = Pt(15)
 
@@ -474,72 +2129,240 @@ def adicionar_ultima_pagina(doc, caminho_calendario):
     # Adicionar linhas horizontais centralizadas até o fim da célula
     for i in range(num_linhas):
         try:
-            p = cell_anotacoes.add_paragraph()
-            # Linha horizontal simples centralizada
-            run = p.add_run("_" * 50)  # Linha de sublinhado ajustada para meia folha
-            run.font.size = Pt(12)
-            run.font.name = 'Arial'
-            p.alignment = WD_ALIGN_PARAGRAPH.CENTER  # Centralizar linhas
-            p.paragraph_format.space_before = Pt(0)
-            p.paragraph_format.space_after = Pt(3)
-            p.paragraph_format.line_spacing = 1.0
+            # Linha de sublinhado centralizada, ajustada para meia folha
+            _paragrafo(cell_anotacoes, 'AgendaAnotacao', "_" * 50)
         except Exception as e:
             # Se houver erro, continuar tentando
             print(f"Erro ao adicionar linha {i}: {e}")
             continue
 
 
-# Variável global para armazenar o caminho do arquivo de dados
-data_file_path = 'agenda_data.json'
+def _elementos_corpo(doc):
+    """Elementos do corpo do documento, sem o sectPr final"""
+    return [el for el in doc.element.body if el.tag != qn('w:sectPr')]
 
 
-def gerar_agenda(data_file='agenda_data.json', output_file=None):
-    """Gera o documento Word da agenda a partir do JSON"""
+def _anexar_bloco(pai, elemento):
+    """
+    Acrescenta um parágrafo/tabela ao fim do corpo ou de uma célula. No
+    corpo entra antes do sectPr final, olhando só o último filho: o
+    _insert_p/_insert_tbl do python-docx percorre todos os filhos a cada
+    inserção, o que deixa agendas grandes quadráticas.
+    """
+    try:
+        ultimo = pai[-1]
+    except IndexError:
+        ultimo = None
+    if ultimo is not None and ultimo.tag == qn('w:sectPr'):
+        ultimo.addprevious(elemento)
+    else:
+        pai.append(elemento)
 
-    global data_file_path
-    data_file_path = os.path.abspath(data_file)
 
-    # Carregar dados
-    with open(data_file, 'r', encoding='utf-8') as f:
-        dados = json.load(f)
+def _inserir_no_corpo(doc, elemento):
+    """Insere um elemento no fim do corpo (antes do sectPr final)"""
+    _anexar_bloco(doc.element.body, elemento)
 
-    doc = Document()
 
-    # Configurar página - A4 paisagem
-    section = doc.sections[0]
-    section.page_height = Inches(8.27)
-    section.page_width = Inches(11.69)
-    section.left_margin = Inches(0.4)
-    section.right_margin = Inches(0.4)
-    section.top_margin = Inches(0.4)
-    section.bottom_margin = Inches(0.4)
+def renderizar_secao(doc, dados, ctx, nome, funcao, entrada):
+    """
+    Renderiza uma seção do conteúdo no fim do documento.
+    Com cache de seções, reaproveita o fragmento OOXML se os dados da seção
+    e suas fotos não mudaram; senão renderiza e guarda o fragmento novo.
+    """
+    cache = ctx.cache_secoes
+    if cache is None:
+        funcao(doc, dados, ctx)
+        return False
 
-    # ==================== CAPA ====================
-    # Adicionar capa na primeira página (se existir)
-    if dados.get('capa'):
-        adicionar_capa(doc, dados.get('capa'))
-        # Após a capa, criar nova seção para o conteúdo com colunas
-        section = doc.add_section(WD_SECTION.NEW_PAGE)
-        section.page_height = Inches(8.27)
-        section.page_width = Inches(11.69)
-        section.left_margin = Inches(0.4)
-        section.right_margin = Inches(0.4)
-        section.top_margin = Inches(0.4)
-        section.bottom_margin = Inches(0.4)
-    else:
-        # Se não houver capa, usar a primeira seção normalmente
-        pass
+    chave = ctx.chave_secao(nome, entrada)
+    fragmento = cache.obter(chave)
+    if fragmento is not None:
+        # Readicionar as imagens ao pacote e ajustar os rIds do fragmento
+        novos_rids = {}
+        for rId, arquivo in fragmento['imagens'].items():
+            origem = os.path.join(cache.pasta_midia, arquivo)
+            novos_rids[rId], _ = doc.part.get_or_add_image(origem)
+            ctx.imagem_embutida(doc, novos_rids[rId], origem)
+        for xml in fragmento['elementos']:
+            elemento = parse_xml(xml)
+            for blip in elemento.iter(qn('a:blip')):
+                rId = blip.get(qn('r:embed'))
+                if rId in novos_rids:
+                    blip.set(qn('r:embed'), novos_rids[rId])
+            _inserir_no_corpo(doc, elemento)
+        return True
 
-    # CONFIGURAR 2 COLUNAS COM LINHA DIVISÓRIA NO CENTRO
-    configurar_colunas_secao(
-        section, num_colunas=2, espacamento=0.25, linha_divisoria=True
+    inicio = len(_elementos_corpo(doc))
+    funcao(doc, dados, ctx)
+    elementos = _elementos_corpo(doc)[inicio:]
+
+    imagens = {}
+    for elemento in elementos:
+        for blip in elemento.iter(qn('a:blip')):
+            rId = blip.get(qn('r:embed'))
+            imagens[rId] = doc.part.related_parts[rId]
+    try:
+        cache.guardar(chave, elementos, imagens)
+    except OSError as e:
+        ctx.avisar(f"Não foi possível gravar o cache da seção '{nome}': {e}")
+    return False
+
+
+def renumerar_desenhos(doc):
+    """
+    Renumera os ids dos desenhos (wp:docPr) em sequência. Fragmentos vindos
+    do cache trazem os ids da geração em que foram renderizados.
+    """
+    for i, docPr in enumerate(doc.element.body.iter(qn('wp:docPr')), 1):
+        docPr.set('id', str(i))
+
+
+def _partes_pacote(doc):
+    """
+    Lista (nome no zip, bytes) de todas as partes do documento, na mesma
+    ordem em que o doc.save do python-docx as grava.
+    """
+    pacote = doc.part.package
+    partes = list(pacote.parts)
+    for parte in partes:
+        parte.before_marshal()
+    itens = [
+        ('[Content_Types].xml', _ContentTypesItem.from_parts(partes).blob),
+        ('_rels/.rels', pacote.rels.xml),
+    ]
+    for parte in partes:
+        itens.append((parte.partname.membername, parte.blob))
+        if len(parte.rels):
+            itens.append((parte.partname.rels_uri.membername, parte.rels.xml))
+    return itens
+
+
+def tipo_compressao(nome):
+    """ZIP_STORED para imagens já comprimidas, ZIP_DEFLATED para o resto"""
+    extensao = nome.rsplit('.', 1)[-1].lower()
+    if extensao in EXTENSOES_SEM_COMPRESSAO:
+        return zipfile.ZIP_STORED
+    return zipfile.ZIP_DEFLATED
+
+
+def _comprimir_parte(nome, conteudo, nivel):
+    """Retorna (nome, método, crc32, dados gravados, tamanho original)"""
+    crc = zlib.crc32(conteudo)
+    if nivel > 0 and tipo_compressao(nome) == zipfile.ZIP_DEFLATED:
+        compressor = zlib.compressobj(nivel, zlib.DEFLATED, -15)
+        comprimido = compressor.compress(conteudo) + compressor.flush()
+        if len(comprimido) < len(conteudo):
+            return nome, zipfile.ZIP_DEFLATED, crc, comprimido, len(conteudo)
+    return nome, zipfile.ZIP_STORED, crc, conteudo, len(conteudo)
+
+
+def _gravar_zip(arquivo, entradas):
+    """
+    Grava um zip (sem zip64) com entradas já comprimidas.
+    entradas: tuplas de _comprimir_parte, na ordem do arquivo
+    """
+    # Data fixa: o mesmo documento gera sempre o mesmo arquivo
+    data = DATA_FIXA
+    hora_dos = (data.hour << 11) | (data.minute << 5) | (data.second // 2)
+    data_dos = ((data.year - 1980) << 9) | (data.month << 5) | data.day
+
+    diretorio = []
+    posicao = 0
+    for nome, metodo, crc, dados, tamanho in entradas:
+        nome_bytes = nome.encode('utf-8')
+        # Bit 11: nome em UTF-8
+        flags = 0 if nome.isascii() else 0x800
+        campos = (metodo, hora_dos, data_dos, crc, len(dados), tamanho)
+        if max(posicao, len(dados), tamanho) > 0xFFFFFFFF:
+            raise ValueError("Documento grande demais para o formato zip sem zip64")
+        cabecalho = struct.pack(
+            '<IHHHHHIIIHH', 0x04034B50, 20, flags, *campos, len(nome_bytes), 0
+        )
+        arquivo.write(cabecalho)
+        arquivo.write(nome_bytes)
+        arquivo.write(dados)
+        diretorio.append(
+            struct.pack(
+                '<IHHHHHHIIIHHHHHII',
+                0x02014B50,
+                20,
+                20,
+                flags,
+                *campos,
+                len(nome_bytes),
+                0,
+                0,
+                0,
+                0,
+                0,
+                posicao,
+            )
+            + nome_bytes
+        )
+        posicao += len(cabecalho) + len(nome_bytes) + len(dados)
+
+    central = b''.join(diretorio)
+    arquivo.write(central)
+    arquivo.write(
+        struct.pack(
+            '<IHHHHIIH',
+            0x06054B50,
+            0,
+            0,
+            len(diretorio),
+            len(diretorio),
+            len(central),
+            posicao,
+            0,
+        )
     )
-    # Adicionar linha vertical preta no header (aparece em todas as páginas)
-    adicionar_linha_vertical_pagina(section)
 
-    # ==================== CONTEÚDO ====================
 
-    # === PALAVRA DA PRESIDENTE ===
+def salvar_documento(doc, destino, nivel=NIVEL_COMPRESSAO_XML, jobs=None):
+    """
+    Salva o documento como o doc.save, mas com empacotamento próprio:
+    imagens JPEG/PNG/GIF (já comprimidas) vão sem deflate, as partes XML
+    usam o nível de compressão informado e as partes grandes são
+    comprimidas em paralelo antes de montar o zip.
+    destino: caminho do .docx ou objeto de arquivo gravável
+    nivel: 0 (sem compressão) a 9 (máxima)
+    jobs: threads de compressão (padrão: CPUs)
+    """
+    partes = _partes_pacote(doc)
+    entradas = [None] * len(partes)
+    grandes = []
+    for i, (nome, conteudo) in enumerate(partes):
+        if (
+            nivel > 0
+            and len(conteudo) >= LIMIAR_COMPRESSAO_PARALELA
+            and tipo_compressao(nome) == zipfile.ZIP_DEFLATED
+        ):
+            grandes.append(i)
+        else:
+            entradas[i] = _comprimir_parte(nome, conteudo, nivel)
+
+    jobs = min(jobs or os.cpu_count() or 1, len(grandes))
+    if jobs > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futuros = {
+                i: pool.submit(_comprimir_parte, *partes[i], nivel) for i in grandes
+            }
+            for i, futuro in futuros.items():
+                entradas[i] = futuro.result()
+    else:
+        for i in grandes:
+            entradas[i] = _comprimir_parte(*partes[i], nivel)
+
+    if hasattr(destino, 'write'):
+        _gravar_zip(destino, entradas)
+    else:
+        with open(destino, 'wb') as arquivo:
+            _gravar_zip(arquivo, entradas)
+
+
+def secao_palavra_presidente(doc, dados, ctx):
+    """Seção PALAVRA DA PRESIDENTE"""
     adicionar_titulo_secao(doc, "PALAVRA DA PRESIDENTE")
 
     mensagem = dados['presidente']['mensagem'].replace('\n\n', '\n').strip()
@@ -547,36 +2370,48 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
     adicionar_texto(doc, dados['presidente']['nome'], tamanho=10, negrito=True)
     adicionar_espaco(doc, 8)
 
-    # === DIRETORIA ===
+
+def secao_diretoria(doc, dados, ctx):
+    """Seção I - DIRETORIA (membros com foto)"""
     adicionar_titulo_secao(doc, "I - DIRETORIA")
 
-    for membro in dados['diretoria']:
-        if membro.get('nome'):
-            # Montar linhas de texto
-            linhas = []
+    membros = [membro for membro in dados['diretoria'] if membro.get('nome')]
+    for i, membro in enumerate(membros, 1):
+        # Montar linhas de texto
+        linhas = []
 
-            # Cargo e Nome
-            cargo_nome = f"{membro['cargo']}: {membro['nome']}"
-            if membro.get('data_nascimento'):
-                cargo_nome += f" (DN: {membro['data_nascimento']})"
-            linhas.append((cargo_nome, 12, True))
+        # Cargo e Nome
+        cargo_nome = f"{membro['cargo']}: {membro['nome']}"
+        if membro.get('data_nascimento'):
+            cargo_nome += f" (DN: {membro['data_nascimento']})"
+        linhas.append((cargo_nome, 12, True))
 
-            # Email e endereço
-            if membro.get('email'):
-                linhas.append((f"Email: {membro['email']}", 10, False))
-            if membro.get('endereco'):
-                linhas.append((f"End: {membro['endereco']}", 10, False))
+        # Email e endereço
+        if membro.get('email'):
+            linhas.append((f"Email: {membro['email']}", 10, False))
+        if membro.get('endereco'):
+            linhas.append((f"End: {membro['endereco']}", 10, False))
 
-            # Adicionar com foto à esquerda
-            adicionar_item_com_foto(doc, membro.get('foto'), linhas, largura_foto=0.5)
-            adicionar_espaco(doc, 2)
+        # Adicionar com foto à esquerda
+        adicionar_item_com_foto(
+            doc,
+            membro.get('foto'),
+            linhas,
+            largura_foto=LARGURA_FOTO_DIRETORIA,
+            ctx=ctx,
+            recorte=membro.get('recorte'),
+        )
+        adicionar_espaco(doc, 2)
+        ctx.fim_de_bloco(doc, i, len(membros))
 
     adicionar_espaco(doc, 6)
 
-    # === SAFs ===
+
+def secao_safs(doc, dados, ctx):
+    """Seção II - SAFs FILIADAS (uma ficha com foto por SAF)"""
     adicionar_titulo_secao(doc, "II - SAFs FILIADAS")
 
-    for saf in dados['safs']:
+    for i, saf in enumerate(dados['safs'], 1):
         # Título da SAF
         adicionar_subtitulo(doc, f"{saf['numero']}. {saf['nome']}")
 
@@ -627,21 +2462,35 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
             )
 
         # Adicionar com foto à esquerda
-        adicionar_item_com_foto(doc, saf.get('foto'), linhas, largura_foto=0.6)
+        adicionar_item_com_foto(
+            doc,
+            saf.get('foto'),
+            linhas,
+            largura_foto=LARGURA_FOTO_SAF,
+            ctx=ctx,
+            recorte=saf.get('recorte'),
+        )
         adicionar_espaco(doc, 4)
+        ctx.fim_de_bloco(doc, i, len(dados['safs']))
+
 
-    # === ATIVIDADES REALIZADAS ===
+def secao_atividades_realizadas(doc, dados, ctx):
+    """Seção III - ATIVIDADES REALIZADAS"""
     adicionar_titulo_secao(doc, "III - ATIVIDADES REALIZADAS EM 2023")
 
-    for atividade in dados.get('atividades_realizadas_2023', []):
+    atividades = dados.get('atividades_realizadas_2023', [])
+    for i, atividade in enumerate(atividades, 1):
         linha = atividade['descricao']
         if atividade.get('data'):
             linha = f"{atividade['data']} - {linha}"
         adicionar_linha(doc, f"• {linha}")
+        ctx.fim_de_bloco(doc, i, len(atividades))
 
     adicionar_espaco(doc, 8)
 
-    # === ATIVIDADES PLANEJADAS ===
+
+def secao_atividades_planejadas(doc, dados, ctx):
+    """Seção IV - ATIVIDADES PLANEJADAS (por mês)"""
     ano_atual = dados.get('ano', 2024)
     adicionar_titulo_secao(doc, f"IV - ATIVIDADES PLANEJADAS PARA {ano_atual}")
 
@@ -662,6 +2511,8 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
 
     chave_atividades = f'atividades_planejadas_{ano_atual}'
     atividades_planejadas = dados.get(chave_atividades, {})
+    total = sum(len(atividades_planejadas.get(mes) or []) for mes in meses_pt)
+    feitas = 0
 
     for mes_key, mes_nome in meses_pt.items():
         if mes_key in atividades_planejadas and atividades_planejadas[mes_key]:
@@ -672,10 +2523,14 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
                 if atividade.get('data'):
                     linha = f"{atividade['data']} - {linha}"
                 adicionar_linha(doc, f"• {linha}")
+                feitas += 1
+                ctx.fim_de_bloco(doc, feitas, total)
 
     adicionar_espaco(doc, 8)
 
-    # === INFORMAÇÕES GERAIS ===
+
+def secao_informacoes_gerais(doc, dados, ctx):
+    """Seção V - INFORMAÇÕES GERAIS (missionário, observações, lema)"""
     adicionar_titulo_secao(doc, "V - INFORMAÇÕES GERAIS")
 
     if dados.get('informacoes_gerais'):
@@ -697,15 +2552,21 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
             ]
 
             adicionar_item_com_foto(
-                doc, miss.get('foto'), linhas_miss, largura_foto=0.6
+                doc,
+                miss.get('foto'),
+                linhas_miss,
+                largura_foto=LARGURA_FOTO_MISSIONARIO,
+                ctx=ctx,
+                recorte=miss.get('recorte'),
             )
             adicionar_espaco(doc, 4)
 
         # Observações
         if info.get('observacoes'):
             adicionar_subtitulo(doc, "Observações:")
-            for obs in info['observacoes']:
+            for i, obs in enumerate(info['observacoes'], 1):
                 adicionar_linha(doc, f"• {obs}")
+                ctx.fim_de_bloco(doc, i, len(info['observacoes']))
             adicionar_espaco(doc, 4)
 
         # Lema
@@ -715,46 +2576,546 @@ def gerar_agenda(data_file='agenda_data.json', output_file=None):
                 p = adicionar_linha(doc, linha)
                 p.alignment = WD_ALIGN_PARAGRAPH.CENTER
 
-    # ==================== ÚLTIMA PÁGINA ====================
-    # Adicionar última página com calendário e anotações gerais
-    # Sempre adicionar, mesmo sem calendário
-    calendario_path = dados.get('calendario', '')
-    print(f"[DEBUG] Adicionando última página. Calendário: {calendario_path}")
-    adicionar_ultima_pagina(doc, calendario_path)
-    print(f"[DEBUG] Última página adicionada com sucesso")
 
-    # Salvar documento - sempre usar o ano do JSON
-    ano = dados.get('ano', 2024)
+def secao_ultima_pagina(doc, dados, ctx):
+    """Conteúdo da última página (calendário e anotações gerais)"""
+    adicionar_conteudo_ultima_pagina(doc, dados.get('calendario', ''), ctx)
+
+
+# Seções do conteúdo, na ordem do documento.
+# Cada item: (nome, função que renderiza, parte do JSON usada pela seção).
+# A parte do JSON (mais as fotos que ela referencia) forma a chave do cache
+# de fragmentos, então só seções alteradas são renderizadas de novo.
+SECOES = [
+    ('palavra_presidente', secao_palavra_presidente, lambda d: d['presidente']),
+    ('diretoria', secao_diretoria, lambda d: d['diretoria']),
+    ('safs', secao_safs, lambda d: d['safs']),
+    (
+        'atividades_realizadas',
+        secao_atividades_realizadas,
+        lambda d: d.get('atividades_realizadas_2023', []),
+    ),
+    (
+        'atividades_planejadas',
+        secao_atividades_planejadas,
+        lambda d: [
+            d.get('ano', 2024),
+            d.get(f"atividades_planejadas_{d.get('ano', 2024)}", {}),
+        ],
+    ),
+    (
+        'informacoes_gerais',
+        secao_informacoes_gerais,
+        lambda d: d.get('informacoes_gerais'),
+    ),
+    (
+        'ultima_pagina',
+        secao_ultima_pagina,
+        lambda d: {'calendario': d.get('calendario', '')},
+    ),
+]
+
+# Etapas de uma geração, na ordem, para o progresso (veja ContextoGeracao.fase)
+ETAPAS = ('json', 'imagens', 'capa') + tuple(nome for nome, _, _ in SECOES) + ('save',)
+
+
+# Backends de geração: 'docx' monta o documento inteiro com o python-docx;
+# 'streaming' grava o document.xml aos poucos (agendas muito grandes)
+BACKENDS = ('docx', 'streaming')
+
+
+def montar_agenda(dados, destino, ctx, backend='docx', manifesto=None):
+    """
+    Monta a agenda a partir dos dados já carregados e grava em destino
+    (caminho ou objeto de arquivo gravável), sem mexer no nome do arquivo.
+    manifesto: ctx.manifesto(dados, backend), se já calculado
+    """
+    if manifesto is None:
+        manifesto = ctx.manifesto(dados, backend)
+
+    with ctx.fase('imagens'):
+        # Fotos faltando são listadas de uma vez, antes de começar a montar
+        for referencia in ctx.fotos_ausentes(dados):
+            ctx.avisar(f"Foto não encontrada: {referencia}")
+        # Imagens lidas e conferidas em paralelo: uma foto corrompida
+        # interrompe a geração aqui, não no meio da montagem. O backend de
+        # streaming não guarda os bytes, para manter a memória constante.
+        ctx.verificar_imagens(dados, carregar=(backend == 'docx'))
+
+    if backend == 'streaming':
+        import gerar_agenda_streaming
+
+        gerar_agenda_streaming.gerar_agenda_streaming(dados, destino, ctx, manifesto)
+    else:
+        # Página A4 paisagem, seção de 2 colunas e linha vertical já vêm prontas
+        doc = novo_documento(com_capa=bool(dados.get('capa')))
+
+        # ==================== CAPA ====================
+        # Adicionar capa na primeira página (se existir)
+        with ctx.fase('capa', doc):
+            if dados.get('capa'):
+                adicionar_capa(doc, dados.get('capa'), ctx)
+
+        # ==================== CONTEÚDO ====================
+        # Seções numeradas (na mesma seção de 2 colunas), reaproveitando do
+        # cache os fragmentos cujos dados não mudaram
+        for nome, funcao, entrada in SECOES:
+            with ctx.fase(nome, doc) as registro:
+                if nome == 'ultima_pagina':
+                    # ==================== ÚLTIMA PÁGINA ====================
+                    # Sempre adicionar, mesmo sem calendário (seção própria)
+                    iniciar_secao_ultima_pagina(doc)
+                registro['cache'] = renderizar_secao(
+                    doc, dados, ctx, nome, funcao, entrada(dados)
+                )
+
+        with ctx.fase('save'):
+            renumerar_desenhos(doc)
+            _gravar_manifesto(doc, manifesto)
+            salvar_documento(doc, destino, ctx.nivel_compressao)
+
+
+def gerar_documento(dados, destino=None, ctx=None, backend='docx'):
+    """
+    Gera a agenda sem passar pelo sistema de arquivos (só as fotos são lidas),
+    para uso como biblioteca (serviço web, interface gráfica).
+    dados: dicionário já carregado ou stream com o JSON (texto ou binário)
+    destino: objeto de arquivo gravável; se None, retorna os bytes do .docx
+    ctx: ContextoGeracao (padrão: ContextoGeracao.em_memoria(), com as fotos
+         relativas à pasta atual)
+    backend: 'docx' (padrão) ou 'streaming'; o streaming usa uma pasta
+             temporária para as imagens
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    if ctx is None:
+        ctx = ContextoGeracao.em_memoria()
+
+    if not isinstance(dados, dict):
+        with ctx.fase('json'):
+            dados = json.load(dados)
 
+    if destino is None:
+        buffer = io.BytesIO()
+        montar_agenda(dados, buffer, ctx, backend)
+        return buffer.getvalue()
+    montar_agenda(dados, destino, ctx, backend)
+    return None
+
+
+def nome_arquivo_saida(output_file, ano):
+    """
+    Nome do .docx gerado: 'Agenda <ano>.docx' por padrão; em um nome dado,
+    qualquer ano é substituído pelo ano do JSON
+    """
     if output_file is None:
-        output_file = f"Agenda {ano}.docx"
-    else:
-        # Substituir qualquer ano no nome do arquivo pelo ano do JSON
-        nome_base, ext = os.path.splitext(output_file)
-        # Remover qualquer ano existente (4 dígitos)
-        nome_base = re.sub(r'\s*\d{4}\s*', f' {ano} ', nome_base)
-        nome_base = nome_base.strip()
-        # Garantir que o ano está no nome
-        if str(ano) not in nome_base:
-            nome_base = f"{nome_base} {ano}"
-        output_file = f"{nome_base}{ext}"
-
-    doc.save(output_file)
+        return f"Agenda {ano}.docx"
+    # Substituir qualquer ano no nome do arquivo pelo ano do JSON; só no
+    # nome, não nas pastas do caminho ("/tmp/Agendas 2025/norte.docx")
+    pasta, nome = os.path.split(output_file)
+    nome_base, ext = os.path.splitext(nome)
+    # Remover qualquer ano existente (4 dígitos)
+    nome_base = re.sub(r'\s*\d{4}\s*', f' {ano} ', nome_base)
+    nome_base = nome_base.strip()
+    # Garantir que o ano está no nome
+    if str(ano) not in nome_base:
+        nome_base = f"{nome_base} {ano}"
+    return os.path.join(pasta, f"{nome_base}{ext}")
+
+
+def gerar_agenda(
+    data_file='agenda_data.json', output_file=None, ctx=None, backend='docx'
+):
+    """
+    Gera o documento Word da agenda a partir do JSON.
+    ctx: ContextoGeracao opcional (padrão: fotos relativas à pasta do JSON).
+    backend: 'docx' (padrão) ou 'streaming' (memória constante)
+    Se o arquivo de saída já existe e foi gerado com os mesmos dados, fotos
+    e versão (mesmo manifesto), ele é mantido (ctx.saida_reaproveitada).
+    Retorna o caminho do arquivo gerado.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconhecido: {backend}")
+
+    if ctx is None:
+        ctx = ContextoGeracao.para_arquivo(data_file)
+
+    # Carregar dados
+    with ctx.fase('json'):
+        with open(data_file, 'r', encoding='utf-8') as f:
+            dados = json.load(f)
+
+    # Salvar documento - sempre usar o ano do JSON
+    output_file = nome_arquivo_saida(output_file, dados.get('ano', 2024))
+
+    # Com --profile a geração sempre roda, para ser medida
+    manifesto = ctx.manifesto(dados, backend)
+    if (
+        ctx.reaproveitar_saida
+        and ctx.perfil is None
+        and ler_manifesto(output_file) == manifesto
+    ):
+        ctx.saida_reaproveitada = True
+        print(f"[OK] Documento já está atualizado: {output_file}")
+        return output_file
+
+    montar_agenda(dados, output_file, ctx, backend, manifesto)
+
     print(f"[OK] Documento gerado com sucesso: {output_file}")
+    if ctx.perfil is not None:
+        origens = {
+            hashlib.sha1(conteudo).hexdigest(): caminho
+            for (caminho, *_), conteudo in ctx.imagens.items()
+        }
+        ctx.perfil.registrar_saida(output_file, origens)
+        ctx.perfil.salvar()
+    return output_file
 
 
-if __name__ == "__main__":
-    import sys
+def _sem_perfis(arquivos):
+    """Arquivos em ordem, sem os relatórios de --profile"""
+    return sorted(a for a in arquivos if not a.endswith(SUFIXO_PERFIL))
 
-    data_file = sys.argv[1] if len(sys.argv) > 1 else 'agenda_data.json'
-    output_file = sys.argv[2] if len(sys.argv) > 2 else None
 
+def listar_arquivos_dados(entradas):
+    """
+    Expande as entradas do modo lote em uma lista de arquivos JSON.
+    Cada entrada pode ser um arquivo, uma pasta (todos os *.json) ou um glob;
+    nas pastas e globs, os relatórios de --profile (*.perfil.json, gravados
+    ao lado das saídas) não são agendas e ficam de fora.
+    """
+    arquivos = []
+    for entrada in entradas:
+        if os.path.isdir(entrada):
+            encontrados = _sem_perfis(glob.glob(os.path.join(entrada, '*.json')))
+        elif glob.has_magic(entrada):
+            encontrados = _sem_perfis(glob.glob(entrada))
+        else:
+            encontrados = [entrada]
+
+        for arquivo in encontrados:
+            if arquivo not in arquivos:
+                arquivos.append(arquivo)
+    return arquivos
+
+
+def _gerar_arquivo_lote(
+    data_file,
+    output_file,
+    cache_secoes=True,
+    backend='docx',
+    perfil=False,
+    nivel_compressao=NIVEL_COMPRESSAO_XML,
+    tempo_limite=None,
+    reaproveitar_saida=True,
+    recorte='centro',
+):
+    """Gera um arquivo do lote (executado em um processo do pool)"""
+    inicio = time.perf_counter()
     try:
-        gerar_agenda(data_file, output_file)
+        ctx = ContextoGeracao.para_arquivo(
+            data_file,
+            cache_secoes=cache_secoes,
+            nivel_compressao=nivel_compressao,
+            tempo_limite=tempo_limite,
+            reaproveitar_saida=reaproveitar_saida,
+            recorte=recorte,
+        )
+        if perfil:
+            ctx.perfil = PerfilGeracao()
+        saida = gerar_agenda(data_file, output_file, ctx, backend)
+        return {
+            'arquivo': data_file,
+            'ok': True,
+            'saida': saida,
+            'reaproveitada': ctx.saida_reaproveitada,
+            'tempo': time.perf_counter() - inicio,
+        }
+    except Exception as e:
+        return {
+            'arquivo': data_file,
+            'ok': False,
+            'erro': f"{type(e).__name__}: {e}",
+            'tempo': time.perf_counter() - inicio,
+        }
+
+
+def gerar_lote(
+    entradas,
+    pasta_saida=None,
+    jobs=None,
+    cache_secoes=True,
+    backend='docx',
+    perfil=False,
+    nivel_compressao=NIVEL_COMPRESSAO_XML,
+    tempo_limite=None,
+    reaproveitar_saida=True,
+    recorte='centro',
+):
+    """
+    Gera várias agendas em paralelo, uma por arquivo JSON.
+    entradas: arquivos, pastas ou globs (veja listar_arquivos_dados)
+    pasta_saida: onde salvar os .docx (padrão: a pasta de cada JSON)
+    jobs: número de processos (padrão: número de CPUs)
+    cache_secoes: False para renderizar todas as seções sem usar o cache
+    backend: 'docx' ou 'streaming' (veja gerar_agenda)
+    perfil: grava um perfil (.perfil.json) ao lado de cada .docx
+    nivel_compressao: nível de deflate das partes XML (0 a 9)
+    tempo_limite: segundos por agenda; a que passar disso é interrompida
+    reaproveitar_saida: False para gerar de novo os .docx já atualizados
+    recorte: recorte 3x4 das fotos sem recorte salvo (MODOS_RECORTE)
+    Um arquivo com erro não interrompe os demais.
+    Retorna a lista de resultados (dicts com arquivo, ok, saida/erro, tempo).
+    """
+    arquivos = listar_arquivos_dados(entradas)
+    if not arquivos:
+        print("Nenhum arquivo JSON encontrado.")
+        return []
+
+    if pasta_saida:
+        os.makedirs(pasta_saida, exist_ok=True)
+
+    tarefas = []
+    for arquivo in arquivos:
+        nome_base = os.path.splitext(os.path.basename(arquivo))[0]
+        pasta = pasta_saida or os.path.dirname(os.path.abspath(arquivo))
+        tarefas.append((arquivo, os.path.join(pasta, f"{nome_base}.docx")))
+
+    jobs = max(1, min(jobs or os.cpu_count() or 1, len(tarefas)))
+    print(f"Gerando {len(tarefas)} agenda(s) com {jobs} processo(s)...")
+
+    def _relatar(resultado):
+        if resultado['ok']:
+            situacao = ", sem mudanças" if resultado.get('reaproveitada') else ""
+            print(
+                f"[OK] {resultado['arquivo']} -> {resultado['saida']} "
+                f"({resultado['tempo']:.2f}s{situacao})"
+            )
+        else:
+            print(
+                f"[ERRO] {resultado['arquivo']}: {resultado['erro']} "
+                f"({resultado['tempo']:.2f}s)"
+            )
+
+    inicio = time.perf_counter()
+    resultados = []
+    if jobs == 1:
+        for arquivo, saida in tarefas:
+            resultado = _gerar_arquivo_lote(
+                arquivo,
+                saida,
+                cache_secoes,
+                backend,
+                perfil,
+                nivel_compressao,
+                tempo_limite,
+                reaproveitar_saida,
+                recorte,
+            )
+            _relatar(resultado)
+            resultados.append(resultado)
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            futuros = {
+                pool.submit(
+                    _gerar_arquivo_lote,
+                    arquivo,
+                    saida,
+                    cache_secoes,
+                    backend,
+                    perfil,
+                    nivel_compressao,
+                    tempo_limite,
+                    reaproveitar_saida,
+                    recorte,
+                ): arquivo
+                for arquivo, saida in tarefas
+            }
+            for futuro in as_completed(futuros):
+                try:
+                    resultado = futuro.result()
+                except Exception as e:
+                    # Processo do pool morreu (ex.: falta de memória)
+                    resultado = {
+                        'arquivo': futuros[futuro],
+                        'ok': False,
+                        'erro': f"{type(e).__name__}: {e}",
+                        'tempo': 0.0,
+                    }
+                _relatar(resultado)
+                resultados.append(resultado)
+
+    ok = sum(1 for r in resultados if r['ok'])
+    print(
+        f"\nConcluído: {ok} de {len(resultados)} agenda(s) gerada(s) "
+        f"em {time.perf_counter() - inicio:.2f}s"
+    )
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera a Agenda da Federação de SAFs em Word (.docx)"
+    )
+    parser.add_argument(
+        'dados', nargs='?', default='agenda_data.json', help="arquivo JSON de dados"
+    )
+    parser.add_argument('saida', nargs='?', help="arquivo .docx de saída")
+    parser.add_argument(
+        '--lote',
+        nargs='+',
+        metavar='ENTRADA',
+        help="gera várias agendas (arquivos JSON, pastas ou globs)",
+    )
+    parser.add_argument(
+        '--jobs', type=int, help="processos em paralelo no modo lote (padrão: CPUs)"
+    )
+    parser.add_argument(
+        '--pasta-saida', help="pasta dos .docx no modo lote (padrão: pasta do JSON)"
+    )
+    parser.add_argument(
+        '--sem-cache',
+        action='store_true',
+        help="renderiza todas as seções, sem reaproveitar fragmentos em cache",
+    )
+    parser.add_argument(
+        '--backend',
+        choices=BACKENDS,
+        default='docx',
+        help="'streaming' grava o documento aos poucos, para agendas muito grandes",
+    )
+    parser.add_argument(
+        '--compressao',
+        type=int,
+        choices=range(10),
+        default=NIVEL_COMPRESSAO_XML,
+        metavar='NIVEL',
+        help="nível de compressão das partes XML do .docx, de 0 a 9 "
+        f"(padrão: {NIVEL_COMPRESSAO_XML}); as fotos vão sem recompressão",
+    )
+    parser.add_argument(
+        '--recorte',
+        choices=MODOS_RECORTE,
+        default='centro',
+        help="como recortar em 3x4 as fotos sem recorte salvo no JSON: pelo "
+        "centro (padrão) ou 'automatico', procurando rostos e detalhes",
+    )
+    parser.add_argument(
+        '--tempo-limite',
+        type=float,
+        metavar='SEGUNDOS',
+        help="interrompe a geração (de cada agenda, no modo lote) que passar "
+        "deste tempo",
+    )
+    parser.add_argument(
+        '--watch',
+        action='store_true',
+        help="continua rodando e gera de novo a cada mudança no JSON ou nas fotos",
+    )
+    parser.add_argument(
+        '--forcar',
+        action='store_true',
+        help="gera de novo mesmo que o .docx de saída já corresponda aos dados, "
+        "fotos e versão do gerador",
+    )
+    parser.add_argument(
+        '--servidor',
+        action='store_true',
+        help="usa o servidor local de geração (servidor_agenda.py) se ele estiver "
+        "rodando, evitando a partida do Python e a importação das bibliotecas",
+    )
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        help="mede tempo, memória e conteúdo de cada fase e grava o relatório "
+        "em JSON (<saída>.perfil.json)",
+    )
+    parser.add_argument(
+        '--arquivo-perfil', help="onde gravar o JSON do --profile (arquivo único)"
+    )
+    args = parser.parse_args(argv)
+    cache_secoes = not args.sem_cache
+    if args.watch and (args.lote or args.servidor):
+        parser.error("--watch não pode ser usado com --lote ou --servidor")
+
+    if args.watch:
+        import observar_agenda
+
+        return observar_agenda.observar(
+            args.dados,
+            args.saida,
+            args.backend,
+            cache_secoes,
+            args.compressao,
+            recorte=args.recorte,
+        )
+
+    if args.lote:
+        resultados = gerar_lote(
+            args.lote,
+            args.pasta_saida,
+            args.jobs,
+            cache_secoes,
+            args.backend,
+            perfil=args.profile,
+            nivel_compressao=args.compressao,
+            tempo_limite=args.tempo_limite,
+            reaproveitar_saida=not args.forcar,
+            recorte=args.recorte,
+        )
+        return 0 if resultados and all(r['ok'] for r in resultados) else 1
+
+    if args.servidor:
+        import servidor_agenda
+
+        cliente = servidor_agenda.ClienteAgenda()
+        if cliente.disponivel():
+            try:
+                saida = cliente.gerar(
+                    args.dados,
+                    args.saida,
+                    args.backend,
+                    cache_secoes,
+                    args.compressao,
+                    not args.forcar,
+                    args.recorte,
+                )
+            except (OSError, servidor_agenda.ErroServidor) as e:
+                print(f"Erro ao gerar agenda no servidor: {e}")
+                return 1
+            print(f"[OK] Documento gerado com sucesso: {saida}")
+            return 0
+        print("[AVISO] Servidor de geração não está rodando; gerando localmente")
+
+    try:
+        ctx = ContextoGeracao.para_arquivo(
+            args.dados,
+            cache_secoes=cache_secoes,
+            nivel_compressao=args.compressao,
+            tempo_limite=args.tempo_limite,
+            reaproveitar_saida=not args.forcar,
+            recorte=args.recorte,
+        )
+        if args.profile or args.arquivo_perfil:
+            ctx.perfil = PerfilGeracao(args.arquivo_perfil)
+        gerar_agenda(args.dados, args.saida, ctx, args.backend)
     except FileNotFoundError:
-        print(f"Erro: Arquivo '{data_file}' não encontrado!")
+        print(f"Erro: Arquivo '{args.dados}' não encontrado!")
+        return 1
+    except GeracaoCancelada as e:
+        print(f"Erro: {e}")
+        return 1
     except Exception as e:
         print(f"Erro ao gerar agenda: {e}")
         import traceback
 
         traceback.print_exc()
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    import sys
+
+    sys.exit(main())
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Backend de streaming para gerar a Agenda da Federação de SAFs.
+
+Em vez de montar o documento inteiro na memória (python-docx) e salvar tudo
+de uma vez, grava o word/document.xml aos poucos direto no arquivo .docx com
+o xmlfile do lxml. Cada registro (membro, SAF, atividade...) é renderizado
+pelas mesmas funções do gerar_agenda em um documento de rascunho, gravado no
+arquivo e descartado em seguida, então o uso de memória não cresce com o
+tamanho da agenda. O layout é idêntico ao do backend padrão.
+"""
+
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+
+from docx.oxml import OxmlElement, parse_xml
+from docx.oxml.ns import qn
+from lxml import etree
+
+import gerar_agenda
+
+NS_RELS = 'http://schemas.openxmlformats.org/package/2006/relationships'
+NS_CONTENT_TYPES = 'http://schemas.openxmlformats.org/package/2006/content-types'
+RT_IMAGE = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships/image'
+
+
+class EscritorStreaming:
+    """
+    Grava o corpo do documento incrementalmente.
+    Os elementos renderizados no rascunho são escritos no xmlfile e
+    removidos; as imagens vão para uma pasta temporária e só entram no zip
+    depois que o document.xml termina.
+    """
+
+    def __init__(self, xf, pasta_midia, proximo_rid):
+        self.xf = xf
+        self.pasta_midia = pasta_midia
+        self.proximo_rid = proximo_rid
+        self.proximo_desenho = 1
+        # sha1 da imagem -> (rId, nome do arquivo em word/media, content type)
+        self.imagens = {}
+        # Documento python-docx vazio onde cada registro é renderizado
+        self.rascunho = gerar_agenda.novo_documento(com_capa=False)
+
+    def _registrar_imagem(self, image_part):
+        """Copia a imagem para a pasta temporária e retorna o rId final"""
+        if image_part.sha1 not in self.imagens:
+            rId = f"rId{self.proximo_rid}"
+            self.proximo_rid += 1
+            nome = f"image{len(self.imagens) + 1}.{image_part.partname.ext}"
+            with open(os.path.join(self.pasta_midia, nome), 'wb') as f:
+                f.write(image_part.blob)
+            self.imagens[image_part.sha1] = (rId, nome, image_part.content_type)
+        return self.imagens[image_part.sha1][0]
+
+    def escrever(self, elemento):
+        """Escreve um elemento do corpo (já com rIds e ids finais)"""
+        self.xf.write(elemento)
+
+    def _liberar_imagem(self, doc, rId):
+        """Remove a imagem do rascunho para ela não ficar na memória"""
+        image_part = doc.part.related_parts[rId]
+        doc.part.rels.pop(rId)
+        # O python-docx guarda as imagens do pacote em uma lista própria
+        # (usada para não repetir imagens); sem remover dali, todas as
+        # fotos da agenda continuariam na memória até o fim.
+        imagens_pacote = doc.part.package.image_parts._image_parts
+        if image_part in imagens_pacote:
+            imagens_pacote.remove(image_part)
+
+    def descarregar(self, doc):
+        """Escreve e remove do rascunho tudo o que já foi renderizado"""
+        for elemento in gerar_agenda._elementos_corpo(doc):
+            novos_rids = {}
+            for blip in elemento.iter(qn('a:blip')):
+                rId = blip.get(qn('r:embed'))
+                if rId not in novos_rids:
+                    image_part = doc.part.related_parts[rId]
+                    novos_rids[rId] = self._registrar_imagem(image_part)
+                blip.set(qn('r:embed'), novos_rids[rId])
+            for rId in novos_rids:
+                self._liberar_imagem(doc, rId)
+            for docPr in elemento.iter(qn('wp:docPr')):
+                docPr.set('id', str(self.proximo_desenho))
+                self.proximo_desenho += 1
+            doc.element.body.remove(elemento)
+            self.escrever(elemento)
+
+
+def _quebra_de_secao(sectPr):
+    """Parágrafo vazio que encerra uma seção (como o add_section do python-docx)"""
+    p = OxmlElement('w:p')
+    pPr = OxmlElement('w:pPr')
+    pPr.append(sectPr.clone())
+    p.append(pPr)
+    return p
+
+
+def gerar_agenda_streaming(dados, destino, ctx, manifesto=''):
+    """
+    Gera a agenda com o backend de streaming.
+    dados: dicionário já carregado do JSON
+    destino: caminho do .docx ou objeto de arquivo gravável
+    ctx: ContextoGeracao (pasta das fotos, caches e opções)
+    manifesto: gravado nas propriedades do documento (docProps/custom.xml)
+    """
+    nivel = ctx.nivel_compressao
+    com_capa = bool(dados.get('capa'))
+    esqueleto = zipfile.ZipFile(io.BytesIO(gerar_agenda.pacote_esqueleto(com_capa)))
+
+    documento = parse_xml(esqueleto.read('word/document.xml'))
+    body = documento.find(qn('w:body'))
+    sectPr_final = body.find(qn('w:sectPr'))
+    # No esqueleto com capa, o corpo tem a quebra de seção da capa
+    quebras = [el for el in body if el is not sectPr_final]
+
+    rels = etree.fromstring(esqueleto.read('word/_rels/document.xml.rels'))
+    rids = [int(r.get('Id')[3:]) for r in rels if r.get('Id', '').startswith('rId')]
+
+    pasta_midia = tempfile.mkdtemp(prefix='agenda-midia-')
+    ao_fim_de_bloco_anterior = ctx.ao_fim_de_bloco
+    try:
+        # Todas as entradas usam gerar_agenda.info_zip (data fixa), para o
+        # mesmo documento gerar sempre os mesmos bytes
+        with zipfile.ZipFile(destino, 'w') as saida:
+            # Partes do esqueleto que não mudam
+            for nome in esqueleto.namelist():
+                if nome == 'docProps/custom.xml':
+                    saida.writestr(
+                        gerar_agenda.info_zip(nome, nivel),
+                        gerar_agenda._xml_propriedades_personalizadas(manifesto),
+                    )
+                elif nome not in (
+                    'word/document.xml',
+                    'word/_rels/document.xml.rels',
+                    '[Content_Types].xml',
+                ):
+                    saida.writestr(
+                        gerar_agenda.info_zip(nome, nivel), esqueleto.read(nome)
+                    )
+
+            with saida.open(
+                gerar_agenda.info_zip('word/document.xml', nivel), 'w'
+            ) as stream:
+                with etree.xmlfile(stream, encoding='UTF-8') as xf:
+                    xf.write_declaration(standalone=True)
+                    with xf.element(
+                        qn('w:document'), dict(documento.attrib), nsmap=documento.nsmap
+                    ):
+                        with xf.element(qn('w:body')):
+                            escritor = EscritorStreaming(
+                                xf, pasta_midia, max(rids, default=0) + 1
+                            )
+                            ctx.ao_fim_de_bloco = escritor.descarregar
+                            _escrever_corpo(dados, ctx, escritor, quebras, sectPr_final)
+
+            # Relações e tipos de conteúdo das imagens gravadas
+            content_types = etree.fromstring(esqueleto.read('[Content_Types].xml'))
+            extensoes = {
+                el.get('Extension').lower()
+                for el in content_types
+                if el.get('Extension') is not None
+            }
+            for rId, nome, content_type in escritor.imagens.values():
+                etree.SubElement(
+                    rels,
+                    f'{{{NS_RELS}}}Relationship',
+                    Id=rId,
+                    Type=RT_IMAGE,
+                    Target=f'media/{nome}',
+                )
+                ext = os.path.splitext(nome)[1][1:].lower()
+                if ext not in extensoes:
+                    etree.SubElement(
+                        content_types,
+                        f'{{{NS_CONTENT_TYPES}}}Default',
+                        Extension=ext,
+                        ContentType=content_type,
+                    )
+                    extensoes.add(ext)
+
+            saida.writestr(
+                gerar_agenda.info_zip('word/_rels/document.xml.rels', nivel),
+                etree.tostring(rels, xml_declaration=True, encoding='UTF-8'),
+            )
+            saida.writestr(
+                gerar_agenda.info_zip('[Content_Types].xml', nivel),
+                etree.tostring(
+                    content_types,
+                    xml_declaration=True,
+                    encoding='UTF-8',
+                    standalone=True,
+                ),
+            )
+            # Imagens já comprimidas (JPEG/PNG) vão sem deflate
+            for _, nome, _ in escritor.imagens.values():
+                with open(os.path.join(pasta_midia, nome), 'rb') as f:
+                    saida.writestr(
+                        gerar_agenda.info_zip(f'word/media/{nome}', nivel), f.read()
+                    )
+    except BaseException:
+        # Não deixar um .docx pela metade (erro ou geração cancelada)
+        if isinstance(destino, (str, os.PathLike)) and os.path.exists(destino):
+            os.remove(destino)
+        raise
+    finally:
+        ctx.ao_fim_de_bloco = ao_fim_de_bloco_anterior
+        shutil.rmtree(pasta_midia, ignore_errors=True)
+
+
+def _escrever_corpo(dados, ctx, escritor, quebras, sectPr_final):
+    """Escreve capa, seções do conteúdo e última página, na ordem do documento"""
+    # ==================== CAPA ====================
+    with ctx.fase('capa'):
+        if dados.get('capa'):
+            gerar_agenda.adicionar_capa(escritor.rascunho, dados.get('capa'), ctx)
+            escritor.descarregar(escritor.rascunho)
+        for quebra in quebras:
+            escritor.escrever(quebra)
+
+    # ==================== CONTEÚDO ====================
+    for nome, funcao, _ in gerar_agenda.SECOES:
+        with ctx.fase(nome):
+            if nome == 'ultima_pagina':
+                # Nova seção: a atual (2 colunas, com header) fecha em um
+                # parágrafo e a última herda a configuração, sem o header
+                escritor.escrever(_quebra_de_secao(sectPr_final))
+                for referencia in sectPr_final.findall(qn('w:headerReference')):
+                    sectPr_final.remove(referencia)
+            funcao(escritor.rascunho, dados, ctx)
+            escritor.descarregar(escritor.rascunho)
+
+    escritor.escrever(sectPr_final)
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Importação de fotos para a pasta fotos/ da agenda.
+
+Cada foto importada é normalizada antes de ser guardada: a rotação do EXIF
+é aplicada nos pixels, os metadados (EXIF, GPS, XMP, comentários) são
+removidos, fotos maiores que o necessário para a impressão são reduzidas e
+o resultado é gravado com o nome tirado do próprio conteúdo (sha256). Assim
+duas fotos diferentes com o mesmo nome (IMG_0001.jpg de câmeras diferentes)
+não se sobrescrevem, e a mesma foto importada duas vezes vira um só arquivo.
+
+As funções são independentes da interface, para rodar em outro processo
+(o editor usa um pool de processos).
+"""
+
+import hashlib
+import io
+import os
+import sys
+import tempfile
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Maior lado guardado, em pixels. As fotos 3x4 saem com até ~1,5" (450 px a
+# 300 DPI), com folga para o recorte; capa e calendário ocupam meia página
+# A4 deitada (7,47" de altura = 2241 px).
+LADO_MAXIMO_FOTO = 1600
+LADO_MAXIMO_PAGINA = 2400
+QUALIDADE_JPEG = 90
+# Caracteres do sha256 usados no nome do arquivo
+TAMANHO_NOME = 16
+
+# Informações de um JPEG que não são metadados do autor/câmera
+_INFO_JPEG_NEUTRA = {
+    'jfif',
+    'jfif_version',
+    'jfif_unit',
+    'jfif_density',
+    'dpi',
+    'progressive',
+    'progression',
+    'icc_profile',
+    'adobe',
+    'adobe_transform',
+}
+
+
+def _normalizar(conteudo, lado_maximo):
+    """
+    (bytes, extensão) da imagem normalizada. JPEGs já pequenos, sem rotação
+    e sem metadados são mantidos como estão, sem perder qualidade.
+    """
+    with Image.open(io.BytesIO(conteudo)) as img:
+        formato = img.format
+        orientacao = img.getexif().get(0x0112, 1)
+        if (
+            formato == 'JPEG'
+            and max(img.size) <= lado_maximo
+            and orientacao == 1
+            and set(img.info) <= _INFO_JPEG_NEUTRA
+        ):
+            return conteudo, '.jpg'
+
+        # JPEG: decodificar já reduzido (a escala do DCT mantém >= lado_maximo)
+        img.draft('RGB', (lado_maximo, lado_maximo))
+        icc = img.info.get('icc_profile')
+        img = ImageOps.exif_transpose(img)
+
+    transparente = img.mode in ('RGBA', 'LA', 'PA') or (
+        img.mode == 'P' and 'transparency' in img.info
+    )
+    img = img.convert('RGBA' if transparente else 'RGB')
+    img.thumbnail((lado_maximo, lado_maximo), Image.LANCZOS)
+    # O save grava o que ficar em info (EXIF, comentário...); só o perfil de
+    # cor é mantido, para as cores não mudarem
+    img.info = {}
+
+    saida = io.BytesIO()
+    if transparente:
+        img.save(saida, 'PNG', optimize=True, icc_profile=icc)
+        return saida.getvalue(), '.png'
+    img.save(saida, 'JPEG', quality=QUALIDADE_JPEG, optimize=True, icc_profile=icc)
+    return saida.getvalue(), '.jpg'
+
+
+def _gravar(pasta_fotos, nome, conteudo):
+    """Grava de forma atômica (outro processo pode gravar o mesmo arquivo)"""
+    destino = os.path.join(pasta_fotos, nome)
+    if os.path.exists(destino):
+        return
+    fd, temporario = tempfile.mkstemp(dir=pasta_fotos, prefix='.importando-')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(conteudo)
+        os.replace(temporario, destino)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+def importar_foto(caminho_origem, pasta_fotos, lado_maximo=LADO_MAXIMO_FOTO):
+    """
+    Importa uma foto para pasta_fotos e retorna o nome do arquivo gravado
+    (<sha256>.jpg ou .png). Se o mesmo conteúdo já foi importado, o arquivo
+    existente é reaproveitado.
+    Sem o Pillow, a foto é copiada como está (também com nome pelo conteúdo).
+    """
+    with open(caminho_origem, 'rb') as f:
+        conteudo = f.read()
+
+    if PIL_AVAILABLE:
+        try:
+            conteudo, extensao = _normalizar(conteudo, lado_maximo)
+        except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+            raise ValueError(
+                f"{os.path.basename(caminho_origem)} não é uma imagem válida"
+            ) from e
+    else:
+        extensao = os.path.splitext(caminho_origem)[1].lower() or '.jpg'
+
+    nome = hashlib.sha256(conteudo).hexdigest()[:TAMANHO_NOME] + extensao
+    os.makedirs(pasta_fotos, exist_ok=True)
+    _gravar(pasta_fotos, nome, conteudo)
+    return nome
+
+
+def main():
+    """Importa as fotos passadas na linha de comando para ./fotos"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="Importa fotos para a pasta fotos/ (normalizadas, nome pelo conteúdo)"
+    )
+    parser.add_argument('fotos', nargs='+', help="Fotos a importar")
+    parser.add_argument('--pasta', default='fotos', help="Pasta de destino")
+    parser.add_argument(
+        '--lado-maximo',
+        type=int,
+        default=LADO_MAXIMO_FOTO,
+        help=f"Maior lado em pixels (padrão: {LADO_MAXIMO_FOTO})",
+    )
+    args = parser.parse_args()
+
+    erros = 0
+    for caminho in args.fotos:
+        try:
+            nome = importar_foto(caminho, args.pasta, args.lado_maximo)
+        except (OSError, ValueError) as e:
+            print(f"[ERRO] {caminho}: {e}")
+            erros += 1
+            continue
+        print(f"[OK] {caminho} -> {os.path.join(args.pasta, nome)}")
+    return 1 if erros else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
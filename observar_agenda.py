@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Modo --watch da Agenda da Federação de SAFs.
+
+Mantém o gerador carregado e gera o .docx de novo sempre que o JSON ou as
+fotos mudam. As mudanças são vistas pelo inotify do Linux (via ctypes) ou,
+onde ele não existe (Windows, macOS), por uma varredura periódica das
+pastas. Uma sequência de mudanças seguidas (o editor salvando, várias fotos
+copiadas) vira uma única geração. Cada geração só refaz o que mudou: as
+seções em cache e as fotos já carregadas na geração anterior são
+reaproveitadas.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+import gerar_agenda
+
+# Fotos também podem ficar soltas na pasta do JSON (veja IndiceFotos)
+EXTENSOES_IMAGEM = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tif', '.tiff'}
+
+# Tempo sem novas mudanças antes de gerar, em segundos
+ESPERA_PADRAO = 0.3
+# Intervalo entre varreduras quando não há inotify, em segundos
+INTERVALO_VARREDURA = 1.0
+
+# Constantes do inotify (sys/inotify.h)
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = getattr(os, 'O_CLOEXEC', 0o2000000)
+MASCARA_EVENTOS = (
+    IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+)
+_EVENTO = struct.Struct('iIII')
+
+
+class ArquivosObservados:
+    """Quais arquivos interessam: o JSON, tudo em fotos/ e imagens na pasta base"""
+
+    def __init__(self, data_file):
+        self.arquivo_dados = os.path.abspath(data_file)
+        self.pasta_base = os.path.dirname(self.arquivo_dados)
+        self.pasta_fotos = os.path.join(self.pasta_base, 'fotos')
+
+    def relevante(self, caminho):
+        nome = os.path.basename(caminho)
+        # Temporários de editores e do Word, arquivos ocultos
+        if nome.startswith(('.', '~')) or nome.endswith(('~', '.tmp', '.swp')):
+            return False
+        if caminho == self.arquivo_dados:
+            return True
+        if caminho == self.pasta_fotos or caminho.startswith(self.pasta_fotos + os.sep):
+            return True
+        return (
+            os.path.dirname(caminho) == self.pasta_base
+            and os.path.splitext(nome)[1].lower() in EXTENSOES_IMAGEM
+        )
+
+
+class ObservadorInotify:
+    """Mudanças pelo inotify: a pasta base e a árvore de fotos/"""
+
+    def __init__(self, arquivos):
+        self.arquivos = arquivos
+        nome_libc = ctypes.util.find_library('c') or 'libc.so.6'
+        self._libc = ctypes.CDLL(nome_libc, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            erro = ctypes.get_errno()
+            raise OSError(erro, os.strerror(erro))
+        # descritor do watch -> pasta
+        self.pastas = {}
+        self._observar(arquivos.pasta_base)
+        self._observar_arvore(arquivos.pasta_fotos)
+
+    def _observar(self, pasta):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(pasta), MASCARA_EVENTOS)
+        if wd >= 0:
+            self.pastas[wd] = pasta
+
+    def _observar_arvore(self, pasta):
+        if not os.path.isdir(pasta):
+            return
+        self._observar(pasta)
+        for raiz, subpastas, _ in os.walk(pasta):
+            for subpasta in subpastas:
+                self._observar(os.path.join(raiz, subpasta))
+
+    def esperar(self, timeout=None):
+        """Caminhos alterados até o timeout (segundos; None: sem limite)"""
+        prontos, _, _ = select.select([self.fd], [], [], timeout)
+        if not prontos:
+            return set()
+        try:
+            dados = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+
+        alterados = set()
+        posicao = 0
+        while posicao + _EVENTO.size <= len(dados):
+            wd, mascara, _, tamanho = _EVENTO.unpack_from(dados, posicao)
+            posicao += _EVENTO.size
+            nome = dados[posicao : posicao + tamanho].rstrip(b'\0')
+            posicao += tamanho
+            if mascara & IN_Q_OVERFLOW:
+                # Eventos perdidos: considerar que tudo pode ter mudado
+                alterados.add(self.arquivos.arquivo_dados)
+                continue
+            if mascara & IN_IGNORED:
+                self.pastas.pop(wd, None)
+                continue
+            pasta = self.pastas.get(wd)
+            if pasta is None:
+                continue
+            caminho = os.path.join(pasta, os.fsdecode(nome)) if nome else pasta
+            if mascara & IN_ISDIR and mascara & (IN_CREATE | IN_MOVED_TO):
+                # Pasta nova (inclusive a própria fotos/): observar também, e
+                # contar o que foi copiado para ela antes do watch existir
+                if self.arquivos.relevante(caminho):
+                    self._observar_arvore(caminho)
+                    for raiz, _, nomes in os.walk(caminho):
+                        alterados.update(os.path.join(raiz, nome) for nome in nomes)
+            if self.arquivos.relevante(caminho):
+                alterados.add(caminho)
+        return alterados
+
+    def fechar(self):
+        os.close(self.fd)
+
+
+class ObservadorVarredura:
+    """Mudanças por comparação periódica de tamanho e data dos arquivos"""
+
+    def __init__(self, arquivos, intervalo=INTERVALO_VARREDURA):
+        self.arquivos = arquivos
+        self.intervalo = intervalo
+        self._estado = self._varrer()
+
+    def _varrer(self):
+        estado = {}
+        candidatos = [self.arquivos.arquivo_dados]
+        try:
+            with os.scandir(self.arquivos.pasta_base) as entradas:
+                candidatos.extend(entrada.path for entrada in entradas)
+        except OSError:
+            pass
+        for raiz, _, nomes in os.walk(self.arquivos.pasta_fotos):
+            candidatos.extend(os.path.join(raiz, nome) for nome in nomes)
+        for caminho in candidatos:
+            if not self.arquivos.relevante(caminho):
+                continue
+            try:
+                st = os.stat(caminho)
+            except OSError:
+                continue
+            estado[caminho] = (st.st_size, st.st_mtime_ns)
+        return estado
+
+    def esperar(self, timeout=None):
+        """Caminhos alterados até o timeout (segundos; None: sem limite)"""
+        limite = None if timeout is None else time.monotonic() + timeout
+        while True:
+            pausa = self.intervalo
+            if limite is not None:
+                pausa = min(pausa, max(0.0, limite - time.monotonic()))
+            time.sleep(pausa)
+            estado = self._varrer()
+            alterados = {
+                caminho
+                for caminho in estado.keys() | self._estado.keys()
+                if estado.get(caminho) != self._estado.get(caminho)
+            }
+            self._estado = estado
+            if alterados or (limite is not None and time.monotonic() >= limite):
+                return alterados
+
+    def fechar(self):
+        pass
+
+
+def criar_observador(data_file):
+    """inotify quando disponível (Linux), senão varredura periódica"""
+    arquivos = ArquivosObservados(data_file)
+    try:
+        return ObservadorInotify(arquivos)
+    except (OSError, AttributeError):
+        # Sem libc com inotify (Windows, macOS) ou limite de watches atingido
+        return ObservadorVarredura(arquivos)
+
+
+def _descrever(alterados, pasta_base):
+    nomes = sorted(os.path.relpath(caminho, pasta_base) for caminho in alterados)
+    if len(nomes) > 3:
+        return ", ".join(nomes[:3]) + f" e mais {len(nomes) - 3}"
+    return ", ".join(nomes)
+
+
+def observar(
+    data_file,
+    output_file=None,
+    backend='docx',
+    cache_secoes=True,
+    nivel_compressao=gerar_agenda.NIVEL_COMPRESSAO_XML,
+    espera=ESPERA_PADRAO,
+    recorte='centro',
+):
+    """
+    Gera a agenda e continua gerando a cada mudança no JSON ou nas fotos,
+    até Ctrl+C. Erros (um JSON salvo pela metade, uma foto inválida) são
+    mostrados e a observação continua.
+    espera: segundos sem novas mudanças antes de gerar (agrupa rajadas)
+    recorte: recorte 3x4 das fotos sem recorte salvo (MODOS_RECORTE)
+    """
+    observador = criar_observador(data_file)
+    pasta_base = observador.arquivos.pasta_base
+    modo = 'inotify' if isinstance(observador, ObservadorInotify) else 'varredura'
+    anterior = None
+
+    def gerar():
+        nonlocal anterior
+        inicio = time.perf_counter()
+        ctx = gerar_agenda.ContextoGeracao.para_arquivo(
+            data_file,
+            cache_secoes=cache_secoes,
+            nivel_compressao=nivel_compressao,
+            recorte=recorte,
+        )
+        if anterior is not None:
+            ctx.herdar_imagens(anterior)
+        try:
+            gerar_agenda.gerar_agenda(data_file, output_file, ctx, backend)
+        except Exception as e:
+            print(f"[ERRO] {type(e).__name__}: {e}")
+            return
+        anterior = ctx
+        print(f"       ({time.perf_counter() - inicio:.2f}s)")
+
+    try:
+        gerar()
+        print(f"Observando {data_file} e as fotos ({modo}); Ctrl+C para parar")
+        while True:
+            alterados = observador.esperar()
+            # Juntar as mudanças que chegam em sequência
+            while True:
+                mais = observador.esperar(espera)
+                if not mais:
+                    break
+                alterados |= mais
+            if not alterados:
+                continue
+            print(f"\nMudou: {_descrever(alterados, pasta_base)}")
+            gerar()
+    except KeyboardInterrupt:
+        print()
+    finally:
+        observador.fechar()
+    return 0
@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Servidor local de geração da Agenda da Federação de SAFs.
+
+Mantém um processo Python aberto com python-docx, lxml e Pillow já
+importados, o esqueleto do documento montado e os caches de imagens
+aquecidos, para que cada geração pela linha de comando (ou por outro
+programa) não pague de novo a partida do interpretador. Escuta em HTTP
+apenas no localhost.
+
+As gerações entram em uma fila com limite de tamanho e rodam com um número
+limitado de threads; pedidos idênticos feitos ao mesmo tempo (mesmo JSON,
+mesmo conteúdo, mesma saída e opções) viram uma única geração.
+
+Uso:
+    python servidor_agenda.py [--porta 8765] [--jobs 2] [--fila 32]
+    python servidor_agenda.py agenda_data.json [saida.docx]   (cliente)
+
+Rotas:
+    GET  /status  versão, gerações em andamento e tamanho da fila
+    POST /gerar   gera um .docx; corpo em JSON (Content-Type
+                  application/json) com "dados" (caminho absoluto do JSON)
+                  e, opcionais, "saida", "backend", "sem_cache",
+                  "compressao" (0 a 9), "recorte", "tempo_limite"
+                  (segundos) e "forcar". Sem "saida", grava
+                  "Agenda <ano>.docx" na pasta do JSON.
+                  Responde {"ok": true, "saida": ..., "tempo": ...,
+                  "reaproveitada": ..., "compartilhado": ...} ou
+                  {"ok": false, "erro": ...}
+
+Todo pedido precisa do cabeçalho X-Agenda-Token com o token sorteado
+quando o servidor inicia. Ele fica em um arquivo que só o usuário lê, na
+pasta de cache (servidor-<porta>.token): outro processo, de outro usuário
+do computador, não consegue pedir gerações (que gravam arquivos em
+qualquer caminho permitido ao usuário do servidor). Pedidos vindos de
+páginas web (com cabeçalho Origin) também são recusados.
+"""
+
+import argparse
+import hashlib
+import hmac
+import json
+import os
+import secrets
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+HOST = '127.0.0.1'
+PORTA_PADRAO = 8765
+CABECALHO_TOKEN = 'X-Agenda-Token'
+
+# Campos de um pedido de geração (POST /gerar)
+CAMPOS_PEDIDO = (
+    'dados',
+    'saida',
+    'backend',
+    'sem_cache',
+    'compressao',
+    'recorte',
+    'tempo_limite',
+    'forcar',
+)
+
+
+def obter_porta():
+    """Porta do servidor (pode ser trocada por AGENDA_SAF_PORTA)"""
+    return int(os.environ.get('AGENDA_SAF_PORTA') or PORTA_PADRAO)
+
+
+def arquivo_token(porta):
+    """
+    Arquivo com o token do servidor da porta, na pasta de cache do usuário
+    (a mesma de gerar_agenda.obter_pasta_cache, sem importar o gerador)
+    """
+    pasta = os.environ.get('AGENDA_SAF_CACHE')
+    if not pasta:
+        base = (
+            os.environ.get('LOCALAPPDATA')
+            or os.environ.get('XDG_CACHE_HOME')
+            or os.path.join(os.path.expanduser('~'), '.cache')
+        )
+        pasta = os.path.join(base, 'agenda-saf')
+    return os.path.join(pasta, f"servidor-{porta}.token")
+
+
+def _gravar_token(caminho, token):
+    """
+    Grava o token só para o usuário: o mkstemp cria o arquivo com permissão
+    0600 (no Windows, a pasta do usuário já é só dele)
+    """
+    pasta = os.path.dirname(caminho)
+    os.makedirs(pasta, exist_ok=True)
+    fd, temporario = tempfile.mkstemp(dir=pasta, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='ascii') as f:
+            f.write(token)
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+
+
+class FilaCheia(RuntimeError):
+    """O servidor já tem o máximo de gerações esperando"""
+
+
+class ServicoGeracao:
+    """
+    Executa as gerações com concorrência limitada e junta pedidos idênticos
+    em andamento: o segundo pedido espera o resultado do primeiro.
+    """
+
+    def __init__(self, jobs=2, max_fila=32, tempo_limite=None):
+        import gerar_agenda
+
+        self.gerar_agenda = gerar_agenda
+        self.max_fila = max_fila
+        # Gerações que passam deste tempo (s) são interrompidas
+        self.tempo_limite = tempo_limite
+        self._pool = ThreadPoolExecutor(max_workers=jobs, thread_name_prefix='geracao')
+        self._lock = threading.Lock()
+        # chave do pedido -> Future da geração em andamento
+        self._em_andamento = {}
+        # Esqueletos montados antes do primeiro pedido
+        gerar_agenda.pacote_esqueleto(False)
+        gerar_agenda.pacote_esqueleto(True)
+
+    def _chave(self, pedido):
+        """Hash do pedido e do conteúdo atual do JSON"""
+        h = hashlib.sha256()
+        with open(pedido['dados'], 'rb') as f:
+            h.update(f.read())
+        for campo in CAMPOS_PEDIDO:
+            h.update(repr(pedido.get(campo)).encode())
+        return h.hexdigest()
+
+    def _executar(self, pedido):
+        inicio = time.perf_counter()
+        ctx = self.gerar_agenda.ContextoGeracao.para_arquivo(
+            pedido['dados'],
+            cache_secoes=not pedido.get('sem_cache'),
+            nivel_compressao=pedido.get(
+                'compressao', self.gerar_agenda.NIVEL_COMPRESSAO_XML
+            ),
+            tempo_limite=pedido.get('tempo_limite', self.tempo_limite),
+            reaproveitar_saida=not pedido.get('forcar'),
+            recorte=pedido.get('recorte') or 'centro',
+        )
+        # Sem saída, na pasta do JSON (e não na pasta em que o servidor foi
+        # iniciado); nome_arquivo_saida acrescenta o ano
+        destino = pedido.get('saida') or os.path.join(
+            os.path.dirname(pedido['dados']), 'Agenda.docx'
+        )
+        saida = self.gerar_agenda.gerar_agenda(
+            pedido['dados'], destino, ctx, pedido.get('backend', 'docx')
+        )
+        return {
+            'ok': True,
+            'saida': os.path.abspath(saida),
+            'tempo': time.perf_counter() - inicio,
+            'reaproveitada': ctx.saida_reaproveitada,
+        }
+
+    def _finalizar(self, chave, futuro):
+        with self._lock:
+            if self._em_andamento.get(chave) is futuro:
+                del self._em_andamento[chave]
+
+    def gerar(self, pedido):
+        """
+        Gera a agenda do pedido e retorna o resultado (dict).
+        Levanta FilaCheia se já houver max_fila gerações esperando.
+        """
+        chave = self._chave(pedido)
+        with self._lock:
+            futuro = self._em_andamento.get(chave)
+            compartilhado = futuro is not None
+            if not compartilhado:
+                if len(self._em_andamento) >= self.max_fila:
+                    raise FilaCheia(
+                        f"Fila cheia ({self.max_fila} gerações); tente novamente"
+                    )
+                futuro = self._pool.submit(self._executar, pedido)
+                self._em_andamento[chave] = futuro
+                futuro.add_done_callback(
+                    lambda f, chave=chave: self._finalizar(chave, f)
+                )
+        resultado = dict(futuro.result())
+        resultado['compartilhado'] = compartilhado
+        return resultado
+
+    def status(self):
+        with self._lock:
+            em_andamento = len(self._em_andamento)
+        return {
+            'ok': True,
+            'versao': self.gerar_agenda.VERSAO_GERADOR,
+            'pid': os.getpid(),
+            'em_andamento': em_andamento,
+            'max_fila': self.max_fila,
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'AgendaSAF'
+
+    def _responder(self, codigo, corpo):
+        conteudo = json.dumps(corpo, ensure_ascii=False).encode('utf-8')
+        self.send_response(codigo)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(conteudo)))
+        self.end_headers()
+        self.wfile.write(conteudo)
+
+    def _autorizado(self):
+        """Confere o token do pedido; se não confere, já responde 401"""
+        token = self.headers.get(CABECALHO_TOKEN) or ''
+        if hmac.compare_digest(token.encode(), self.server.token.encode()):
+            return True
+        self._responder(401, {'ok': False, 'erro': 'Token ausente ou inválido'})
+        return False
+
+    def do_GET(self):
+        if not self._autorizado():
+            return
+        if self.path == '/status':
+            self._responder(200, self.server.servico.status())
+        else:
+            self._responder(404, {'ok': False, 'erro': 'Rota não encontrada'})
+
+    def do_POST(self):
+        if not self._autorizado():
+            return
+        if self.path != '/gerar':
+            self._responder(404, {'ok': False, 'erro': 'Rota não encontrada'})
+            return
+        # Navegadores mandam Origin em todo POST entre sites, e só mandam
+        # application/json depois de uma verificação (preflight) que este
+        # servidor nunca aprova
+        if self.headers.get('Origin') is not None:
+            self._responder(
+                403, {'ok': False, 'erro': 'Pedidos de páginas web não são aceitos'}
+            )
+            return
+        if self.headers.get_content_type() != 'application/json':
+            self._responder(
+                415, {'ok': False, 'erro': 'O corpo deve ser application/json'}
+            )
+            return
+        try:
+            tamanho = int(self.headers.get('Content-Length') or 0)
+            pedido = json.loads(self.rfile.read(tamanho) or b'{}')
+            if not isinstance(pedido, dict) or not pedido.get('dados'):
+                raise ValueError("Campo 'dados' (caminho do JSON) é obrigatório")
+            if not os.path.isabs(pedido['dados']) or (
+                pedido.get('saida') and not os.path.isabs(pedido['saida'])
+            ):
+                raise ValueError("Os caminhos de 'dados' e 'saida' devem ser absolutos")
+            modos_recorte = self.server.servico.gerar_agenda.MODOS_RECORTE
+            if pedido.get('recorte') not in (None, *modos_recorte):
+                raise ValueError(
+                    f"'recorte' deve ser um de: {', '.join(modos_recorte)}"
+                )
+            backends = self.server.servico.gerar_agenda.BACKENDS
+            if pedido.get('backend') not in (None, *backends):
+                raise ValueError(f"'backend' deve ser um de: {', '.join(backends)}")
+            compressao = pedido.get('compressao')
+            if compressao is not None and (
+                type(compressao) is not int or not 0 <= compressao <= 9
+            ):
+                raise ValueError("'compressao' deve ser um inteiro de 0 a 9")
+            tempo_limite = pedido.get('tempo_limite')
+            if tempo_limite is not None and (
+                type(tempo_limite) not in (int, float) or not tempo_limite > 0
+            ):
+                raise ValueError("'tempo_limite' deve ser um número positivo")
+            for campo in ('sem_cache', 'forcar'):
+                if type(pedido.get(campo, False)) is not bool:
+                    raise ValueError(f"'{campo}' deve ser true ou false")
+        except ValueError as e:
+            self._responder(400, {'ok': False, 'erro': str(e)})
+            return
+
+        try:
+            self._responder(200, self.server.servico.gerar(pedido))
+        except FilaCheia as e:
+            self._responder(503, {'ok': False, 'erro': str(e)})
+        except self.server.servico.gerar_agenda.GeracaoCancelada as e:
+            # Passou do tempo limite
+            self._responder(504, {'ok': False, 'erro': str(e)})
+        except FileNotFoundError as e:
+            self._responder(404, {'ok': False, 'erro': str(e)})
+        except Exception as e:
+            self._responder(500, {'ok': False, 'erro': f"{type(e).__name__}: {e}"})
+
+    def log_message(self, formato, *args):
+        print(f"[{self.log_date_time_string()}] {formato % args}")
+
+
+def criar_servidor(porta=None, jobs=2, max_fila=32, tempo_limite=None):
+    """
+    Cria o servidor HTTP (ainda sem atender); porta 0 escolhe uma livre.
+    Sorteia o token e o grava em arquivo_token(porta); fechar_servidor
+    apaga o arquivo.
+    """
+    servidor = ThreadingHTTPServer(
+        (HOST, obter_porta() if porta is None else porta), _Handler
+    )
+    servidor.daemon_threads = True
+    try:
+        servidor.servico = ServicoGeracao(jobs, max_fila, tempo_limite)
+        servidor.token = secrets.token_urlsafe(32)
+        servidor.arquivo_token = arquivo_token(servidor.server_address[1])
+        _gravar_token(servidor.arquivo_token, servidor.token)
+    except BaseException:
+        servidor.server_close()
+        raise
+    return servidor
+
+
+def fechar_servidor(servidor):
+    """Fecha o servidor e apaga o arquivo do token (se ainda for o dele)"""
+    servidor.server_close()
+    try:
+        with open(servidor.arquivo_token, encoding='ascii') as f:
+            if f.read() != servidor.token:
+                return
+        os.remove(servidor.arquivo_token)
+    except OSError:
+        pass
+
+
+class ErroServidor(RuntimeError):
+    """Erro devolvido pelo servidor de geração"""
+
+
+class ClienteAgenda:
+    """
+    Cliente do servidor de geração, usado pela linha de comando
+    (servidor_agenda.py <json> e gerar_agenda.py --servidor).
+    """
+
+    def __init__(self, porta=None, timeout=600):
+        self.porta = obter_porta() if porta is None else porta
+        self.url = f"http://{HOST}:{self.porta}"
+        self.timeout = timeout
+
+    def _token(self):
+        """Token do servidor da porta (relido a cada pedido: ele pode ter reiniciado)"""
+        try:
+            with open(arquivo_token(self.porta), encoding='ascii') as f:
+                return f.read().strip()
+        except OSError:
+            return ''
+
+    def _pedir(self, rota, corpo=None, timeout=None):
+        dados = None if corpo is None else json.dumps(corpo).encode('utf-8')
+        requisicao = urllib.request.Request(
+            self.url + rota,
+            data=dados,
+            headers={
+                'Content-Type': 'application/json',
+                CABECALHO_TOKEN: self._token(),
+            },
+        )
+        try:
+            with urllib.request.urlopen(
+                requisicao, timeout=timeout or self.timeout
+            ) as resposta:
+                return json.loads(resposta.read())
+        except urllib.error.HTTPError as e:
+            try:
+                erro = json.loads(e.read()).get('erro')
+            except ValueError:
+                erro = None
+            raise ErroServidor(erro or f"HTTP {e.code}") from None
+
+    def disponivel(self):
+        """True se há um servidor respondendo na porta"""
+        try:
+            return bool(self._pedir('/status', timeout=1).get('ok'))
+        except (OSError, ValueError, ErroServidor):
+            return False
+
+    def iniciar_servidor(self, espera=15):
+        """
+        Inicia o servidor em segundo plano (se ainda não estiver rodando) e
+        espera ele responder. Retorna True se ficou disponível.
+        """
+        if self.disponivel():
+            return True
+        if getattr(sys, 'frozen', False):
+            # Executável empacotado: não há um Python para rodar o script
+            return False
+        script = os.path.abspath(__file__)
+        opcoes = {}
+        if os.name == 'nt':
+            opcoes['creationflags'] = subprocess.CREATE_NO_WINDOW
+        else:
+            opcoes['start_new_session'] = True
+        subprocess.Popen(
+            [sys.executable, script, '--porta', str(self.porta)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            **opcoes,
+        )
+        limite = time.monotonic() + espera
+        while time.monotonic() < limite:
+            if self.disponivel():
+                return True
+            time.sleep(0.2)
+        return False
+
+    def gerar(
+        self,
+        data_file,
+        output_file=None,
+        backend='docx',
+        cache_secoes=True,
+        nivel_compressao=None,
+        reaproveitar_saida=True,
+        recorte=None,
+    ):
+        """
+        Pede a geração ao servidor e retorna o caminho do .docx gerado.
+        Levanta ErroServidor com a mensagem do servidor em caso de falha.
+        """
+        # Sem saída, o mesmo padrão da geração local: 'Agenda <ano>.docx' na
+        # pasta atual do cliente (o servidor acrescenta o ano ao nome)
+        pedido = {
+            'dados': os.path.abspath(data_file),
+            'saida': os.path.abspath(output_file or 'Agenda.docx'),
+            'backend': backend,
+            'sem_cache': not cache_secoes,
+            'forcar': not reaproveitar_saida,
+        }
+        if nivel_compressao is not None:
+            pedido['compressao'] = nivel_compressao
+        if recorte is not None:
+            pedido['recorte'] = recorte
+        return self._pedir('/gerar', pedido)['saida']
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Servidor local de geração da Agenda da Federação de SAFs"
+    )
+    parser.add_argument(
+        'dados',
+        nargs='?',
+        help="com um JSON, age como cliente: pede a geração ao servidor "
+        "(iniciando-o se preciso) e sai",
+    )
+    parser.add_argument('saida', nargs='?', help="arquivo .docx de saída (cliente)")
+    parser.add_argument(
+        '--porta',
+        type=int,
+        help=f"porta no localhost (padrão: {PORTA_PADRAO} ou AGENDA_SAF_PORTA)",
+    )
+    parser.add_argument(
+        '--jobs', type=int, default=2, help="gerações simultâneas (padrão: 2)"
+    )
+    parser.add_argument(
+        '--fila',
+        type=int,
+        default=32,
+        help="máximo de gerações esperando; acima disso responde 503 (padrão: 32)",
+    )
+    parser.add_argument(
+        '--tempo-limite',
+        type=float,
+        metavar='SEGUNDOS',
+        help="interrompe gerações que passarem deste tempo (padrão: sem limite)",
+    )
+    args = parser.parse_args(argv)
+
+    if args.dados:
+        # Cliente leve: não importa python-docx/lxml, quem gera é o servidor
+        cliente = ClienteAgenda(args.porta)
+        if not cliente.iniciar_servidor():
+            print("Erro: não foi possível iniciar o servidor de geração")
+            return 1
+        try:
+            saida = cliente.gerar(args.dados, args.saida)
+        except (OSError, ErroServidor) as e:
+            print(f"Erro ao gerar agenda: {e}")
+            return 1
+        print(f"[OK] Documento gerado com sucesso: {saida}")
+        return 0
+
+    servidor = criar_servidor(args.porta, args.jobs, args.fila, args.tempo_limite)
+    host, porta = servidor.server_address[:2]
+    print(f"Servidor da agenda em http://{host}:{porta} (Ctrl+C para parar)")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        fechar_servidor(servidor)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
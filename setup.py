@@ -34,6 +34,10 @@ setup(
     py_modules=[
         "editar_agenda_gui",
         "gerar_agenda",
+        "gerar_agenda_streaming",
+        "servidor_agenda",
+        "observar_agenda",
+        "importar_fotos",
         "gerar_com_fotos",
         "extrair_fotos",
     ],
@@ -46,6 +50,7 @@ setup(
         "console_scripts": [
             "agenda-editor=editar_agenda_gui:main",
             "agenda-gerar=gerar_agenda:main",
+            "agenda-servidor=servidor_agenda:main",
         ],
     },
     include_package_data=True,